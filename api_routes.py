@@ -7,56 +7,43 @@ from datetime import datetime
 from flask import request, jsonify
 from pathlib import Path
 
+from audit_sink import write_audit
+from audit_history import get_history_page, HISTORY_PAGE_SIZE
+from history_triggers import history_mark, recorded_changes
+
 DATABASE_PATH = Path(__file__).parent / 'eos_data.db'
 
 def log_change(table_name, record_id, action, changed_by, changes, ip_address=None):
-    """Log all changes to audit_log table"""
-    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
-    conn.execute('PRAGMA journal_mode=WAL')
-    conn.execute('PRAGMA busy_timeout=30000')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT INTO audit_log (table_name, record_id, action, changed_by, changes, ip_address)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (table_name, record_id, action, changed_by, json.dumps(changes), ip_address))
-    
-    conn.commit()
-    conn.close()
+    """Log all changes to audit_log table (queued on the audit sink)"""
+    write_audit(table_name, record_id, action, changes=json.dumps(changes),
+                changed_by=changed_by, ip_address=ip_address)
 
 def update_rock(rock_id, field, new_value, changed_by):
-    """Update a rock field and track the change"""
+    """Update a rock field; the rocks_history row is written by trigger"""
     conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
     conn.execute('PRAGMA journal_mode=WAL')
     conn.execute('PRAGMA busy_timeout=30000')
     cursor = conn.cursor()
+    mark = history_mark(conn, 'rocks')
     
-    # Get current value
-    cursor.execute(f'SELECT {field} FROM rocks WHERE id = ?', (rock_id,))
-    old_value = cursor.fetchone()[0] if cursor.fetchone() else None
-    
-    # Update the field
+    # Update the field (history_triggers.py records the old and new value)
     cursor.execute(f'''
         UPDATE rocks 
         SET {field} = ?, updated_at = ?, updated_by = ?
         WHERE id = ?
     ''', (new_value, datetime.now(), changed_by, rock_id))
-    
-    # Log to history
-    cursor.execute('''
-        INSERT INTO rocks_history (rock_id, field_changed, old_value, new_value, changed_by)
-        VALUES (?, ?, ?, ?, ?)
-    ''', (rock_id, field, str(old_value), str(new_value), changed_by))
+    change = recorded_changes(conn, 'rocks', rock_id, mark).get(field)
     
     conn.commit()
     conn.close()
     
-    # Log to audit
-    log_change('rocks', rock_id, 'UPDATE', changed_by, {
-        'field': field,
-        'old_value': old_value,
-        'new_value': new_value
-    })
+    # Log to audit (only if the value actually changed)
+    if change:
+        log_change('rocks', rock_id, 'UPDATE', changed_by, {
+            'field': field,
+            'old_value': change['old'],
+            'new_value': new_value
+        })
 
 def ids_workflow_issue(issue_id, stage, changed_by, notes=None, solution=None):
     """
@@ -64,17 +51,15 @@ def ids_workflow_issue(issue_id, stage, changed_by, notes=None, solution=None):
     1. IDENTIFY - Issue is recognized
     2. DISCUSS - Team discusses root cause and options
     3. SOLVE - Solution is implemented
+    issues_history rows for each changed field are written by trigger.
     """
     conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
     conn.execute('PRAGMA journal_mode=WAL')
     conn.execute('PRAGMA busy_timeout=30000')
     cursor = conn.cursor()
+    mark = history_mark(conn, 'issues')
     
-    # Get current stage
-    cursor.execute('SELECT ids_stage FROM issues WHERE id = ?', (issue_id,))
-    old_stage = cursor.fetchone()[0]
-    
-    updates = {'ids_stage': stage, 'updated_at': datetime.now()}
+    updates = {'ids_stage': stage, 'updated_at': datetime.now(), 'updated_by': changed_by}
     
     if notes:
         updates['discussion_notes'] = notes
@@ -91,79 +76,52 @@ def ids_workflow_issue(issue_id, stage, changed_by, notes=None, solution=None):
     values = list(updates.values()) + [issue_id]
     
     cursor.execute(f'UPDATE issues SET {set_clause} WHERE id = ?', values)
-    
-    # Log to history
-    cursor.execute('''
-        INSERT INTO issues_history (issue_id, field_changed, old_value, new_value, changed_by, change_note)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (issue_id, 'ids_stage', old_stage, stage, changed_by, notes or ''))
+    stage_change = recorded_changes(conn, 'issues', issue_id, mark).get('ids_stage')
     
     conn.commit()
     conn.close()
     
     # Log to audit
     log_change('issues', issue_id, 'IDS_WORKFLOW', changed_by, {
-        'old_stage': old_stage,
+        'old_stage': stage_change['old'] if stage_change else stage,
         'new_stage': stage,
         'notes': notes,
         'solution': solution
     })
 
-def get_rock_history(rock_id):
-    """Get full history of changes for a rock"""
+def _history_entries(items):
+    """History rows in the shape the history endpoints return"""
+    return [{
+        'field': row['field_changed'],
+        'old_value': row['old_value'],
+        'new_value': row['new_value'],
+        'changed_by': row['changed_by'],
+        'changed_at': row['changed_at'],
+        'note': row['change_note']
+    } for row in items]
+
+def get_rock_history(rock_id, cursor=None, limit=HISTORY_PAGE_SIZE):
+    """Get one page of rock changes, newest first; returns (history, next_cursor)"""
     conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
-    conn.execute('PRAGMA journal_mode=WAL')
+    conn.row_factory = sqlite3.Row
     conn.execute('PRAGMA busy_timeout=30000')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT field_changed, old_value, new_value, changed_by, changed_at, change_note
-        FROM rocks_history
-        WHERE rock_id = ?
-        ORDER BY changed_at DESC
-    ''', (rock_id,))
-    
-    history = []
-    for row in cursor.fetchall():
-        history.append({
-            'field': row[0],
-            'old_value': row[1],
-            'new_value': row[2],
-            'changed_by': row[3],
-            'changed_at': row[4],
-            'note': row[5]
-        })
-    
-    conn.close()
-    return history
+    try:
+        page = get_history_page(conn, 'rocks_history', rock_id, cursor=cursor, limit=limit)
+    finally:
+        conn.close()
+    return _history_entries(page['items']), page['next_cursor']
 
-def get_issue_history(issue_id):
-    """Get full IDS workflow history for an issue"""
+def get_issue_history(issue_id, cursor=None, limit=HISTORY_PAGE_SIZE):
+    """Get one page of IDS workflow history for an issue, oldest first; returns (history, next_cursor)"""
     conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
-    conn.execute('PRAGMA journal_mode=WAL')
+    conn.row_factory = sqlite3.Row
     conn.execute('PRAGMA busy_timeout=30000')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT field_changed, old_value, new_value, changed_by, changed_at, change_note
-        FROM issues_history
-        WHERE issue_id = ?
-        ORDER BY changed_at ASC
-    ''', (issue_id,))
-    
-    history = []
-    for row in cursor.fetchall():
-        history.append({
-            'field': row[0],
-            'old_value': row[1],
-            'new_value': row[2],
-            'changed_by': row[3],
-            'changed_at': row[4],
-            'note': row[5]
-        })
-    
-    conn.close()
-    return history
+    try:
+        page = get_history_page(conn, 'issues_history', issue_id, cursor=cursor, limit=limit,
+                                newest_first=False)
+    finally:
+        conn.close()
+    return _history_entries(page['items']), page['next_cursor']
 
 # Flask route helpers to add to app.py:
 
@@ -188,8 +146,10 @@ def add_api_routes(app):
     def get_rock_history_api(rock_id):
         """Get rock change history"""
         try:
-            history = get_rock_history(rock_id)
-            return jsonify({'success': True, 'history': history})
+            history, next_cursor = get_rock_history(
+                rock_id, cursor=request.args.get('cursor'),
+                limit=request.args.get('limit', HISTORY_PAGE_SIZE, type=int))
+            return jsonify({'success': True, 'history': history, 'next_cursor': next_cursor})
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)}), 400
     
@@ -212,7 +172,9 @@ def add_api_routes(app):
     def get_issue_history_api(issue_id):
         """Get issue IDS workflow history"""
         try:
-            history = get_issue_history(issue_id)
-            return jsonify({'success': True, 'history': history})
+            history, next_cursor = get_issue_history(
+                issue_id, cursor=request.args.get('cursor'),
+                limit=request.args.get('limit', HISTORY_PAGE_SIZE, type=int))
+            return jsonify({'success': True, 'history': history, 'next_cursor': next_cursor})
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)}), 400
@@ -9,7 +9,14 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import pandas as pd
 import json
+import hashlib
 import warnings
+from parse_cache import cached_parse, get_cache_stats
+from datasheet_index import get_index
+from sync_generation import get_generation_info
+from audit_sink import write_audit, get_audit_stats
+from audit_history import get_history_page, HISTORY_PAGE_SIZE
+from history_triggers import ensure_history_triggers, install_on_first_request, history_mark, recorded_changes, TRACKED_TABLES
 warnings.filterwarnings('ignore')
 
 app = Flask(__name__)
@@ -21,20 +28,47 @@ DATABASE_PATH = Path(__file__).parent / 'eos_data.db'
 DATASHEETS_DIR = os.path.join(os.path.dirname(__file__), 'datasheets')
 ARCHIVE_DIR = os.path.join(os.path.dirname(__file__), 'archive')
 
+def _install_history_triggers():
+    """
+    rocks/issues/V/TO history rows are written by triggers; install them if missing
+    Returns True once they are in place. Runs from the first request (see
+    install_on_first_request), so importing app never writes to the database.
+    """
+    if not DATABASE_PATH.exists():
+        return False
+    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
+    try:
+        if ensure_history_triggers(conn):
+            print("Installed rocks/issues/V/TO history triggers")
+        return True
+    except Exception as e:
+        print(f"ERROR: history triggers are not installed - rock, issue and V/TO edits "
+              f"are not being recorded: {e}")
+        return False
+    finally:
+        conn.close()
+
+install_on_first_request(app, _install_history_triggers)
+
 def get_latest_file(patterns):
     """Get the most recent file matching one or more patterns"""
-    if isinstance(patterns, str):
-        patterns = [patterns]
-    patterns = [p.lower() for p in patterns]
-    files = [
-        f for f in os.listdir(DATASHEETS_DIR)
-        if any(p in f.lower() for p in patterns)
-    ]
-    if not files:
-        return None
-    latest = max(files, key=lambda f: os.path.getmtime(os.path.join(DATASHEETS_DIR, f)))
-    return os.path.join(DATASHEETS_DIR, latest)
+    return get_index(DATASHEETS_DIR).latest(patterns)
+
+def _text_column(df, name, default=''):
+    """
+    Column as stripped strings, matching str(row.get(name, default)).strip()
+    Missing cells render as 'nan' just like str() on the iterrows value.
+    """
+    if name not in df.columns:
+        return pd.Series(str(default).strip(), index=df.index, dtype=object)
+    col = df[name].astype(object)
+    return col.where(col.notna(), 'nan').astype(str).str.strip()
+
+def _count(counts, key):
+    """Look up a value_counts() bucket as a plain int"""
+    return int(counts.get(key, 0))
 
+@cached_parse
 def parse_rocks(filepath):
     """
     Parse Quarterly Rocks CSV
@@ -42,22 +76,28 @@ def parse_rocks(filepath):
     """
     try:
         df = pd.read_csv(filepath, delimiter='|')
-        rocks = []
-        for _, row in df.iterrows():
-            rocks.append({
-                'description': str(row.get('Description', '')).strip(),
-                'owner': str(row.get('Owner', '')).strip(),
-                'status': str(row.get('Status', 'NOT STARTED')).strip(),
-                'due_date': str(row.get('DueDate', '')).strip(),
-                'progress': int(row.get('Progress', 0)) if pd.notna(row.get('Progress')) else 0
-            })
-        
+
+        status = _text_column(df, 'Status', 'NOT STARTED')
+        if 'Progress' in df.columns:
+            progress = pd.to_numeric(df['Progress']).fillna(0).astype('int64')
+        else:
+            progress = pd.Series(0, index=df.index, dtype='int64')
+
+        rocks = pd.DataFrame({
+            'description': _text_column(df, 'Description'),
+            'owner': _text_column(df, 'Owner'),
+            'status': status,
+            'due_date': _text_column(df, 'DueDate'),
+            'progress': progress
+        }).to_dict('records')
+
         # Calculate summary metrics
+        counts = status.str.upper().value_counts()
         total = len(rocks)
-        complete = len([r for r in rocks if r['status'].upper() == 'COMPLETE'])
-        on_track = len([r for r in rocks if r['status'].upper() in ['COMPLETE', 'ON TRACK']])
-        at_risk = len([r for r in rocks if r['status'].upper() in ['AT RISK', 'BLOCKED']])
-        
+        complete = _count(counts, 'COMPLETE')
+        on_track = complete + _count(counts, 'ON TRACK')
+        at_risk = _count(counts, 'AT RISK') + _count(counts, 'BLOCKED')
+
         return {
             'rocks': rocks,
             'summary': {
@@ -72,6 +112,7 @@ def parse_rocks(filepath):
         print(f"Error parsing rocks: {e}")
         return {'rocks': [], 'summary': {'total': 0, 'complete': 0, 'on_track': 0, 'at_risk': 0, 'completion_pct': 0}}
 
+@cached_parse
 def parse_scorecard(filepath):
     """
     Parse Weekly Scorecard CSV
@@ -79,43 +120,39 @@ def parse_scorecard(filepath):
     """
     try:
         df = pd.read_csv(filepath, delimiter='|')
-        metrics = []
-        
-        for _, row in df.iterrows():
-            # Get week columns (Week1 through Week13)
-            weeks = []
-            for i in range(1, 14):
-                week_col = f'Week{i}'
-                if week_col in row:
-                    val = row[week_col]
-                    weeks.append(float(val) if pd.notna(val) else None)
-            
-            metrics.append({
-                'metric': str(row.get('Metric', '')).strip(),
-                'owner': str(row.get('Owner', '')).strip(),
-                'goal': str(row.get('Goal', '')).strip(),
-                'weeks': weeks,
-                'status': str(row.get('Status', 'YELLOW')).strip().upper()
-            })
-        
+
+        # Week columns (Week1 through Week13) that are present, blanks as None
+        week_cols = [f'Week{i}' for i in range(1, 14) if f'Week{i}' in df.columns]
+        week_values = df[week_cols].apply(pd.to_numeric).astype(float)
+        weeks = week_values.astype(object).where(week_values.notna(), None).values.tolist()
+
+        status = _text_column(df, 'Status', 'YELLOW').str.upper()
+
+        metrics = pd.DataFrame({
+            'metric': _text_column(df, 'Metric'),
+            'owner': _text_column(df, 'Owner'),
+            'goal': _text_column(df, 'Goal'),
+            'weeks': pd.Series(weeks, index=df.index, dtype=object),
+            'status': status
+        }).to_dict('records')
+
         # Calculate summary
-        green = len([m for m in metrics if m['status'] == 'GREEN'])
-        yellow = len([m for m in metrics if m['status'] == 'YELLOW'])
-        red = len([m for m in metrics if m['status'] == 'RED'])
-        
+        counts = status.value_counts()
+
         return {
             'metrics': metrics,
             'summary': {
                 'total': len(metrics),
-                'green': green,
-                'yellow': yellow,
-                'red': red
+                'green': _count(counts, 'GREEN'),
+                'yellow': _count(counts, 'YELLOW'),
+                'red': _count(counts, 'RED')
             }
         }
     except Exception as e:
         print(f"Error parsing scorecard: {e}")
         return {'metrics': [], 'summary': {'total': 0, 'green': 0, 'yellow': 0, 'red': 0}}
 
+@cached_parse
 def parse_issues(filepath):
     """
     Parse Issues List CSV
@@ -123,37 +160,39 @@ def parse_issues(filepath):
     """
     try:
         df = pd.read_csv(filepath, delimiter='|')
-        issues = []
-        
-        for _, row in df.iterrows():
-            status = str(row.get('Status', 'OPEN')).strip().upper()
-            if status in ['OPEN', 'IN PROGRESS']:  # Only show open issues
-                issues.append({
-                    'issue': str(row.get('Issue', '')).strip(),
-                    'priority': str(row.get('Priority', 'MEDIUM')).strip().upper(),
-                    'owner': str(row.get('Owner', '')).strip(),
-                    'date_added': str(row.get('DateAdded', '')).strip(),
-                    'status': status
-                })
-        
+
+        status = _text_column(df, 'Status', 'OPEN').str.upper()
+        open_rows = status.isin(['OPEN', 'IN PROGRESS'])  # Only show open issues
+        df = df[open_rows]
+
+        priority = _text_column(df, 'Priority', 'MEDIUM').str.upper()
+
+        issues = pd.DataFrame({
+            'issue': _text_column(df, 'Issue'),
+            'priority': priority,
+            'owner': _text_column(df, 'Owner'),
+            'date_added': _text_column(df, 'DateAdded'),
+            'status': status[open_rows]
+        }).to_dict('records')
+
         # Calculate summary
-        high = len([i for i in issues if i['priority'] == 'HIGH'])
-        medium = len([i for i in issues if i['priority'] == 'MEDIUM'])
-        low = len([i for i in issues if i['priority'] == 'LOW'])
-        
+        counts = priority.value_counts()
+
         return {
             'issues': issues,
             'summary': {
                 'total': len(issues),
-                'high': high,
-                'medium': medium,
-                'low': low
+                'high': _count(counts, 'HIGH'),
+                'medium': _count(counts, 'MEDIUM'),
+                'low': _count(counts, 'LOW')
             }
         }
     except Exception as e:
         print(f"Error parsing issues: {e}")
         return {'issues': [], 'summary': {'total': 0, 'high': 0, 'medium': 0, 'low': 0}}
 
+# Overdue/days-until flags are relative to today, so key on the date too
+@cached_parse(extra_key=lambda: datetime.now().date())
 def parse_todos(filepath):
     """
     Parse To-Dos CSV
@@ -161,37 +200,33 @@ def parse_todos(filepath):
     """
     try:
         df = pd.read_csv(filepath, delimiter='|')
-        todos = []
-        
-        today = datetime.now().date()
-        
-        for _, row in df.iterrows():
-            status = str(row.get('Status', 'OPEN')).strip().upper()
-            if status != 'COMPLETE':
-                due_str = str(row.get('DueDate', '')).strip()
-                try:
-                    due_date = datetime.strptime(due_str, '%m/%d/%Y').date()
-                    is_overdue = due_date < today
-                    days_until = (due_date - today).days
-                except:
-                    due_date = None
-                    is_overdue = False
-                    days_until = None
-                
-                todos.append({
-                    'task': str(row.get('Task', '')).strip(),
-                    'owner': str(row.get('Owner', '')).strip(),
-                    'due_date': due_str,
-                    'status': status,
-                    'source': str(row.get('Source', '')).strip(),
-                    'is_overdue': is_overdue,
-                    'days_until': days_until
-                })
-        
+
+        status = _text_column(df, 'Status', 'OPEN').str.upper()
+        not_complete = status != 'COMPLETE'
+        df = df[not_complete]
+
+        # Unparseable due dates become NaT: not overdue, no days_until
+        due_str = _text_column(df, 'DueDate')
+        due_date = pd.to_datetime(due_str, format='%m/%d/%Y', errors='coerce')
+        today = pd.Timestamp(datetime.now().date())
+        is_overdue = due_date < today
+        days = (due_date - today).dt.days.astype('Int64')
+        days_until = days.astype(object).where(days.notna(), None)
+
+        todos = pd.DataFrame({
+            'task': _text_column(df, 'Task'),
+            'owner': _text_column(df, 'Owner'),
+            'due_date': due_str,
+            'status': status[not_complete],
+            'source': _text_column(df, 'Source'),
+            'is_overdue': is_overdue,
+            'days_until': days_until
+        }).to_dict('records')
+
         # Calculate summary
-        this_week = len([t for t in todos if t['days_until'] is not None and 0 <= t['days_until'] <= 7])
-        overdue = len([t for t in todos if t['is_overdue']])
-        
+        this_week = int(days.between(0, 7).fillna(False).sum())
+        overdue = int(is_overdue.sum())
+
         return {
             'todos': todos,
             'summary': {
@@ -204,6 +239,7 @@ def parse_todos(filepath):
         print(f"Error parsing todos: {e}")
         return {'todos': [], 'summary': {'total': 0, 'this_week': 0, 'overdue': 0}}
 
+@cached_parse
 def parse_vto(filepath):
     """
     Parse Vision/Traction Organizer CSV
@@ -223,6 +259,7 @@ def parse_vto(filepath):
         print(f"Error parsing VTO: {e}")
         return {}
 
+@cached_parse
 def parse_accountability_chart(filepath):
     """
     Parse Accountability Chart CSV
@@ -345,6 +382,27 @@ def get_summary():
     
     return jsonify(summary)
 
+def _data_etag(paths):
+    """
+    ETag for /api/data: sync generation, the sheet files it reads and today's
+    date (to-do overdue flags change at midnight)
+    """
+    generation = get_generation_info()['generation']
+    wanted = set(p for p in paths if p)
+    files = [(path, mtime, size) for _, path, mtime, size in get_index(DATASHEETS_DIR).files()
+             if path in wanted]
+    key = json.dumps([generation, str(datetime.now().date()), sorted(files)])
+    return hashlib.sha1(key.encode()).hexdigest()
+
+@app.route('/api/generation')
+def get_generation():
+    """Sync generation for browsers to poll; /api/data only needs re-fetching when it moves"""
+    info = get_generation_info()
+    response = jsonify(info)
+    response.set_etag(str(info['generation']))
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
 @app.route('/api/data')
 def get_data():
     """API endpoint to fetch all EOS data"""
@@ -357,6 +415,14 @@ def get_data():
     vto_file = get_latest_file('vto')
     accountability_file = get_latest_file('accountability')
     
+    # Nothing new since the client's copy: skip parsing and the payload
+    etag = _data_etag([rocks_file, scorecard_file, issues_file, todos_file, vto_file, accountability_file])
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    
     data = {
         'timestamp': datetime.now().isoformat(),
         'rocks': {'rocks': [], 'summary': {}},
@@ -386,7 +452,10 @@ def get_data():
     if accountability_file:
         data['accountability'] = parse_accountability_chart(accountability_file)
     
-    return jsonify(data)
+    response = jsonify(data)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/health')
 def health_check():
@@ -399,7 +468,10 @@ def health_check():
             'status': 'healthy',
             'timestamp': datetime.now().isoformat(),
             'datasheets_accessible': files_exist,
-            'database_accessible': db_exists
+            'database_accessible': db_exists,
+            'parse_cache': get_cache_stats(),
+            'sync_generation': get_generation_info(),
+            'audit': get_audit_stats()
         }), 200
     except Exception as e:
         return jsonify({
@@ -412,17 +484,9 @@ def health_check():
 # =============================================================================
 
 def log_change(table_name, record_id, action, changed_by, changes, ip_address=None):
-    """Log all changes to audit_log table"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT INTO audit_log (table_name, record_id, action, changed_by, changes, ip_address)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (table_name, record_id, action, changed_by, json.dumps(changes), ip_address))
-    
-    conn.commit()
-    conn.close()
+    """Log all changes to audit_log table (queued on the audit sink)"""
+    write_audit(table_name, record_id, action, changes=json.dumps(changes),
+                changed_by=changed_by, ip_address=ip_address)
 
 @app.route('/api/rocks/<int:rock_id>', methods=['PUT'])
 def update_rock_api(rock_id):
@@ -435,34 +499,26 @@ def update_rock_api(rock_id):
     try:
         conn = sqlite3.connect(DATABASE_PATH)
         cursor = conn.cursor()
+        mark = history_mark(conn, 'rocks')
         
-        # Get current value
-        cursor.execute(f'SELECT {field} FROM rocks WHERE id = ?', (rock_id,))
-        result = cursor.fetchone()
-        old_value = result[0] if result else None
-        
-        # Update the field
+        # Update the field (the rocks_history row is written by trigger)
         cursor.execute(f'''
             UPDATE rocks 
             SET {field} = ?, updated_at = ?, updated_by = ?
             WHERE id = ?
         ''', (value, datetime.now().isoformat(), changed_by, rock_id))
-        
-        # Log to history
-        cursor.execute('''
-            INSERT INTO rocks_history (rock_id, field_changed, old_value, new_value, changed_by)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (rock_id, field, str(old_value), str(value), changed_by))
+        change = recorded_changes(conn, 'rocks', rock_id, mark).get(field)
         
         conn.commit()
         conn.close()
         
-        # Log to audit
-        log_change('rocks', rock_id, 'UPDATE', changed_by, {
-            'field': field,
-            'old_value': old_value,
-            'new_value': value
-        })
+        # Log to audit (only if the value actually changed)
+        if change:
+            log_change('rocks', rock_id, 'UPDATE', changed_by, {
+                'field': field,
+                'old_value': change['old'],
+                'new_value': value
+            })
         
         return jsonify({'success': True, 'message': 'Rock updated'})
     except Exception as e:
@@ -473,28 +529,22 @@ def get_rock_history_api(rock_id):
     """Get rock change history"""
     try:
         conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT field_changed, old_value, new_value, changed_by, changed_at, change_note
-            FROM rocks_history
-            WHERE rock_id = ?
-            ORDER BY changed_at DESC
-        ''', (rock_id,))
-        
-        history = []
-        for row in cursor.fetchall():
-            history.append({
-                'field': row[0],
-                'old_value': row[1],
-                'new_value': row[2],
-                'changed_by': row[3],
-                'changed_at': row[4],
-                'note': row[5]
-            })
-        
-        conn.close()
-        return jsonify({'success': True, 'history': history})
+        conn.row_factory = sqlite3.Row
+        try:
+            page = get_history_page(conn, 'rocks_history', rock_id, cursor=request.args.get('cursor'),
+                                    limit=request.args.get('limit', HISTORY_PAGE_SIZE, type=int))
+        finally:
+            conn.close()
+        
+        history = [{
+            'field': row['field_changed'],
+            'old_value': row['old_value'],
+            'new_value': row['new_value'],
+            'changed_by': row['changed_by'],
+            'changed_at': row['changed_at'],
+            'note': row['change_note']
+        } for row in page['items']]
+        return jsonify({'success': True, 'history': history, 'next_cursor': page['next_cursor']})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
@@ -510,14 +560,11 @@ def ids_workflow_api(issue_id):
     try:
         conn = sqlite3.connect(DATABASE_PATH)
         cursor = conn.cursor()
+        mark = history_mark(conn, 'issues')
         
-        # Get current stage
-        cursor.execute('SELECT ids_stage FROM issues WHERE id = ?', (issue_id,))
-        result = cursor.fetchone()
-        old_stage = result[0] if result else None
-        
-        updates = [stage, datetime.now().isoformat()]
-        query = 'UPDATE issues SET ids_stage = ?, updated_at = ?'
+        # issues_history rows are written by trigger
+        updates = [stage, datetime.now().isoformat(), changed_by]
+        query = 'UPDATE issues SET ids_stage = ?, updated_at = ?, updated_by = ?'
         
         if notes:
             query += ', discussion_notes = ?'
@@ -535,19 +582,14 @@ def ids_workflow_api(issue_id):
         updates.append(issue_id)
         
         cursor.execute(query, updates)
-        
-        # Log to history
-        cursor.execute('''
-            INSERT INTO issues_history (issue_id, field_changed, old_value, new_value, changed_by, change_note)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (issue_id, 'ids_stage', old_stage, stage, changed_by, notes))
+        stage_change = recorded_changes(conn, 'issues', issue_id, mark).get('ids_stage')
         
         conn.commit()
         conn.close()
         
         # Log to audit
         log_change('issues', issue_id, 'IDS_WORKFLOW', changed_by, {
-            'old_stage': old_stage,
+            'old_stage': stage_change['old'] if stage_change else stage,
             'new_stage': stage,
             'notes': notes,
             'solution': solution
@@ -562,28 +604,23 @@ def get_issue_history_api(issue_id):
     """Get issue IDS workflow history"""
     try:
         conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT field_changed, old_value, new_value, changed_by, changed_at, change_note
-            FROM issues_history
-            WHERE issue_id = ?
-            ORDER BY changed_at ASC
-        ''', (issue_id,))
-        
-        history = []
-        for row in cursor.fetchall():
-            history.append({
-                'field': row[0],
-                'old_value': row[1],
-                'new_value': row[2],
-                'changed_by': row[3],
-                'changed_at': row[4],
-                'note': row[5]
-            })
-        
-        conn.close()
-        return jsonify({'success': True, 'history': history})
+        conn.row_factory = sqlite3.Row
+        try:
+            page = get_history_page(conn, 'issues_history', issue_id, cursor=request.args.get('cursor'),
+                                    limit=request.args.get('limit', HISTORY_PAGE_SIZE, type=int),
+                                    newest_first=False)
+        finally:
+            conn.close()
+        
+        history = [{
+            'field': row['field_changed'],
+            'old_value': row['old_value'],
+            'new_value': row['new_value'],
+            'changed_by': row['changed_by'],
+            'changed_at': row['changed_at'],
+            'note': row['change_note']
+        } for row in page['items']]
+        return jsonify({'success': True, 'history': history, 'next_cursor': page['next_cursor']})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
@@ -813,11 +850,9 @@ def update_vto():
             field = change['field']
             new_value = change['value']
             
-            # Get old value for history
-            cursor.execute(f'SELECT {field} FROM {table} WHERE id = ?', (record_id,))
-            old_value = cursor.fetchone()[0] if cursor.fetchone() else None
-            
-            # Update the field
+            # Update the field (the {table}_history row is written by trigger)
+            tracked = table in TRACKED_TABLES
+            mark = history_mark(conn, table) if tracked else None
             cursor.execute(f'''
                 UPDATE {table} 
                 SET {field} = ?, 
@@ -826,17 +861,10 @@ def update_vto():
                 WHERE id = ?
             ''', (new_value, changed_by, record_id))
             
-            # Log to history table
-            history_table = f'{table}_history'
-            cursor.execute(f'''
-                INSERT INTO {history_table} 
-                ({"core_value_id" if "core_values" in table else "core_focus_id" if "core_focus" in table else "core_target_id" if "core_target" in table else "marketing_strategy_id" if "marketing" in table else "three_year_picture_id" if "three_year" in table else "one_year_plan_id"}, 
-                 field_changed, old_value, new_value, changed_by, change_note)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (record_id, field, old_value, new_value, changed_by, f'Updated {field} from web interface'))
-            
-            # Log to audit log
-            log_change(cursor, table, record_id, 'UPDATE', changed_by, {field: {'old': old_value, 'new': new_value}})
+            # Log to audit log (only fields whose value actually changed)
+            recorded = recorded_changes(conn, table, record_id, mark) if tracked else {field: new_value}
+            if recorded:
+                log_change(table, record_id, 'UPDATE', changed_by, recorded)
         
         conn.commit()
         conn.close()
@@ -951,7 +979,8 @@ def resolve_l10_issue(meeting_id, issue_id):
         # Update issue to SOLVE stage
         cursor.execute('''
             UPDATE issues 
-            SET ids_stage = 'SOLVE', status = 'IN_PROGRESS'
+            SET ids_stage = 'SOLVE', status = 'IN_PROGRESS',
+                updated_by = 'System', updated_at = CURRENT_TIMESTAMP
             WHERE id = ?
         ''', (issue_id,))
         
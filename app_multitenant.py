@@ -4,13 +4,22 @@ Steensma Enterprises Strategic Dashboard with hierarchical organization support
 """
 
 import os
-from flask import Flask, session, request
+from flask import Flask, session, request, jsonify
 from datetime import timedelta
 from pathlib import Path
 
 # Initialize Flask app
 app = Flask(__name__)
 
+# Behind nginx: take the client address from X-Forwarded-For/X-Forwarded-Proto,
+# trusting only the number of proxies we actually run (EOS_PROXY_HOPS, 0 = none).
+# Without this every request comes from 127.0.0.1 and the per-IP login
+# throttle becomes a site-wide one.
+PROXY_HOPS = int(os.environ.get('EOS_PROXY_HOPS', '1'))
+if PROXY_HOPS > 0:
+    from werkzeug.middleware.proxy_fix import ProxyFix
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_HOPS, x_proto=PROXY_HOPS)
+
 # Secret key for sessions
 app.secret_key = os.environ.get('SECRET_KEY', 'e7254a50fc2634e2b103f222034d16ca04a5a4ea6a41bc81fabe603678f3d49e')
 
@@ -57,6 +66,29 @@ register_accountability_routes(app)
 register_corporate_routes(app)
 register_pdf_routes(app)
 
+def _install_history_triggers():
+    """
+    Field-level history is written by triggers; install them if this database predates them
+    Returns True once they are in place. Runs from the first request (see
+    install_on_first_request), not at import or only under __main__.
+    """
+    from db_utils import get_db
+    from history_triggers import ensure_history_triggers
+    conn = get_db()
+    try:
+        if ensure_history_triggers(conn):
+            print("Installed rocks/issues/V/TO history triggers")
+        return True
+    except Exception as e:
+        print(f"ERROR: history triggers are not installed - rock, issue and V/TO edits "
+              f"are not being recorded: {e}")
+        return False
+    finally:
+        conn.close()
+
+from history_triggers import install_on_first_request
+install_on_first_request(app, _install_history_triggers)
+
 # =====================================================
 # AWS SSO Auto-Login via oauth2-proxy headers
 # =====================================================
@@ -79,60 +111,63 @@ def auto_login_from_sso():
     if not auth_email:
         return
     
-    # Look up user by email
-    from auth import _get_db
-    conn = _get_db()
-    cursor = conn.cursor()
+    # Cached email -> user lookup; last_login is written in the background
+    from sso_identity import resolve_sso_user, record_last_login
+    from auth import get_user_permissions
+    user = resolve_sso_user(auth_email)
+    if not user:
+        return  # No matching EOS user, fall through to normal login
+    
+    record_last_login(user['id'])
+    get_user_permissions(user['id'])
+    
+    # Set session (same structure as authenticate_user)
+    session['user'] = user
+    session['auth_method'] = 'aws_sso'
+    session.permanent = True
+
+# Hand pooled DB connections back even when a handler skipped close()
+@app.teardown_request
+def release_db_connection(exc):
+    from db_utils import release_thread_connection
+    release_thread_connection()
+
+@app.route('/health')
+def health_check():
+    """Health check endpoint for monitoring"""
+    from db_utils import get_db, get_pool_stats
+    from pdf_cache import get_pdf_cache_stats
+    from pdf_jobs import get_pdf_job_stats
+    from sync_generation import get_generation_info
+    from auth import get_permission_cache_stats
+    from sso_identity import get_sso_stats
+    from login_guard import get_login_stats
+    from saml_auth import get_saml_cache_stats
+    from audit_sink import get_audit_stats
+    from l10_events import get_l10_stream_stats
+    from l10_autosave import get_autosave_stats
     try:
-        cursor.execute("""
-            SELECT id, username, email, full_name
-            FROM users WHERE email = ? AND is_active = 1
-        """, (auth_email,))
-        user_row = cursor.fetchone()
-        
-        if not user_row:
-            return  # No matching EOS user, fall through to normal login
-        
-        # Get roles
-        cursor.execute("""
-            SELECT
-                ur.id as assignment_id,
-                r.name as role_name,
-                r.display_name as role_display,
-                r.level as role_level,
-                ur.organization_id,
-                ur.division_id,
-                o.name as org_name,
-                o.slug as org_slug,
-                d.name as division_name,
-                d.slug as division_slug,
-                d.full_slug as division_full_slug
-            FROM user_roles ur
-            JOIN roles r ON ur.role_id = r.id
-            LEFT JOIN organizations o ON ur.organization_id = o.id
-            LEFT JOIN divisions d ON ur.division_id = d.id
-            WHERE ur.user_id = ? AND ur.is_active = 1
-        """, (user_row['id'],))
-        roles = [dict(row) for row in cursor.fetchall()]
-        
-        # Update last login
-        cursor.execute("UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?",
-                       (user_row['id'],))
-        conn.commit()
-        
-        # Set session (same structure as authenticate_user)
-        session['user'] = {
-            'id': user_row['id'],
-            'username': user_row['username'],
-            'email': user_row['email'],
-            'full_name': user_row['full_name'],
-            'roles': roles,
-            'is_parent_admin': any(r['role_name'] == 'PARENT_ADMIN' for r in roles)
-        }
-        session['auth_method'] = 'aws_sso'
-        session.permanent = True
-    finally:
-        conn.close()
+        conn = get_db()
+        try:
+            conn.execute('SELECT 1').fetchone()
+        finally:
+            conn.close()
+        return jsonify({
+            'status': 'healthy',
+            'db_pool': get_pool_stats(),
+            'pdf_cache': get_pdf_cache_stats(),
+            'pdf_render': get_pdf_job_stats(),
+            'sync_generation': get_generation_info(),
+            'permissions': get_permission_cache_stats(),
+            'sso': get_sso_stats(),
+            'login': get_login_stats(),
+            'saml': get_saml_cache_stats(),
+            'audit': get_audit_stats(),
+            'l10_live': get_l10_stream_stats(),
+            'l10_autosave': get_autosave_stats()
+        }), 200
+    except Exception as e:
+        return jsonify({'status': 'unhealthy', 'error': str(e), 'db_pool': get_pool_stats()}), 503
 
 # Template context processor to make datetime available
 @app.context_processor
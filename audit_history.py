@@ -0,0 +1,335 @@
+"""
+EOS Platform - Audit History
+Keyset-paginated reads and archival for audit_log and the *_history tables.
+
+Pages are ordered by (changed_at, id) and continue from an opaque cursor, so
+fetching page 50 of a record's history costs the same index range scan as
+page 1. The archival job moves rows older than the retention period into
+history_archive: one zlib-compressed JSON chunk per source table and month,
+written in the same transaction as the DELETE, so a row is never both live
+and archived or neither.
+
+Run the archival job from cron:
+    python audit_history.py archive             # audit_log older than EOS_AUDIT_RETENTION_DAYS
+    python audit_history.py archive --dry-run
+    python audit_history.py export audit_log 2025-01 > audit_2025-01.jsonl
+
+Configuration (environment variables):
+    EOS_AUDIT_RETENTION_DAYS    - Days audit_log rows stay live (default: 365)
+    EOS_HISTORY_RETENTION_DAYS  - Days *_history rows stay live, 0 keeps them forever (default: 0)
+"""
+
+import base64
+import json
+import os
+import sys
+import zlib
+from datetime import datetime, timedelta, timezone
+
+AUDIT_RETENTION_DAYS = int(os.environ.get('EOS_AUDIT_RETENTION_DAYS', '365'))
+HISTORY_RETENTION_DAYS = int(os.environ.get('EOS_HISTORY_RETENTION_DAYS', '0'))
+
+HISTORY_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Rows moved per archival transaction, so the write lock is held briefly
+ARCHIVE_BATCH = 5000
+
+# History table -> column holding the record id
+HISTORY_TABLES = {
+    'audit_log': 'record_id',
+    'rocks_history': 'rock_id',
+    'issues_history': 'issue_id',
+    'l10_meeting_history': 'meeting_id',
+    'vto_core_values_history': 'core_value_id',
+    'vto_core_focus_history': 'core_focus_id',
+    'vto_core_target_history': 'core_target_id',
+    'vto_marketing_strategy_history': 'marketing_strategy_id',
+    'vto_three_year_picture_history': 'three_year_picture_id',
+    'vto_one_year_plan_history': 'one_year_plan_id',
+}
+
+
+# =====================================================
+# SCHEMA
+# =====================================================
+
+def install_history_indexes(conn):
+    """
+    Time-ordered indexes for paging and archival, plus the archive table
+    Tables that don't exist in this database are skipped. Idempotent.
+    """
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    for table, record_col in HISTORY_TABLES.items():
+        if table not in existing:
+            continue
+        if table == 'audit_log':
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_audit_log_record_time
+                ON audit_log(table_name, record_id, changed_at, id)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_audit_log_user_time
+                ON audit_log(user_id, changed_at, id)
+            """)
+            # Superseded by idx_audit_log_record_time (same leading columns)
+            conn.execute("DROP INDEX IF EXISTS idx_audit_log_table")
+        else:
+            conn.execute(f"""
+                CREATE INDEX IF NOT EXISTS idx_{table}_record_time
+                ON {table}({record_col}, changed_at, id)
+            """)
+        # Time-range queries and the archival scan
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_time ON {table}(changed_at, id)")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS history_archive (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source_table TEXT NOT NULL,
+            month TEXT NOT NULL,
+            first_id INTEGER NOT NULL,
+            last_id INTEGER NOT NULL,
+            row_count INTEGER NOT NULL,
+            oldest TIMESTAMP,
+            newest TIMESTAMP,
+            columns JSON NOT NULL,
+            payload BLOB NOT NULL,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_history_archive_month
+        ON history_archive(source_table, month)
+    """)
+
+
+# =====================================================
+# KEYSET PAGINATION
+# =====================================================
+
+def encode_cursor(changed_at, row_id):
+    """Opaque page cursor for a (changed_at, id) position"""
+    raw = json.dumps([changed_at, row_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(changed_at, id) from a cursor; raises ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        changed_at, row_id = json.loads(raw)
+        return str(changed_at), int(row_id)
+    except Exception:
+        raise ValueError("Invalid history cursor")
+
+
+def _page(conn, table, where, params, cursor=None, limit=HISTORY_PAGE_SIZE,
+          since=None, until=None, newest_first=True):
+    """One page of rows from table; returns {'items', 'next_cursor'}"""
+    limit = max(1, min(int(limit or HISTORY_PAGE_SIZE), MAX_PAGE_SIZE))
+    where, params = list(where), list(params)
+
+    if since:
+        where.append("changed_at >= ?")
+        params.append(since)
+    if until:
+        where.append("changed_at < ?")
+        params.append(until)
+    if cursor:
+        changed_at, row_id = decode_cursor(cursor)
+        # Row-value comparison: SQLite plans it as a range on the
+        # (..., changed_at, id) index; the expanded OR form scans
+        op = '<' if newest_first else '>'
+        where.append(f"(changed_at, id) {op} (?, ?)")
+        params.extend([changed_at, row_id])
+
+    direction = 'DESC' if newest_first else 'ASC'
+    rows = conn.execute(f"""
+        SELECT * FROM {table}
+        WHERE {' AND '.join(where) or '1'}
+        ORDER BY changed_at {direction}, id {direction}
+        LIMIT ?
+    """, params + [limit + 1]).fetchall()
+
+    items = [dict(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last['changed_at'], last['id'])
+    return {'items': items, 'next_cursor': next_cursor}
+
+
+def get_history_page(conn, table, record_id, cursor=None, limit=HISTORY_PAGE_SIZE,
+                     since=None, until=None, newest_first=True):
+    """
+    One page of a record's change history from a *_history table
+    conn must have row_factory = sqlite3.Row.
+    """
+    if table not in HISTORY_TABLES or table == 'audit_log':
+        raise ValueError(f"Unknown history table: {table}")
+    return _page(conn, table, [f"{HISTORY_TABLES[table]} = ?"], [record_id],
+                 cursor, limit, since, until, newest_first)
+
+
+def get_audit_page(conn, table_name=None, record_id=None, user_id=None, cursor=None,
+                   limit=HISTORY_PAGE_SIZE, since=None, until=None, newest_first=True):
+    """One page of audit_log, optionally for one record or user and a time range"""
+    where, params = [], []
+    if table_name:
+        where.append("table_name = ?")
+        params.append(table_name)
+        if record_id is not None:
+            where.append("record_id = ?")
+            params.append(record_id)
+    if user_id is not None:
+        where.append("user_id = ?")
+        params.append(user_id)
+    return _page(conn, 'audit_log', where, params, cursor, limit, since, until, newest_first)
+
+
+# =====================================================
+# ARCHIVAL
+# =====================================================
+
+def _cutoff(days):
+    """changed_at value older than `days` (UTC, same format as CURRENT_TIMESTAMP)"""
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def archive_table(conn, table, days, batch_size=ARCHIVE_BATCH, dry_run=False):
+    """
+    Move rows of table older than `days` into history_archive
+    Each batch is one transaction: the compressed chunks are inserted and the
+    rows deleted together. Returns {month: rows archived}.
+    """
+    cutoff = _cutoff(days)
+    archived = {}
+
+    if dry_run:
+        for row in conn.execute(f"""
+            SELECT substr(changed_at, 1, 7) AS month, COUNT(*) AS n
+            FROM {table} WHERE changed_at < ?
+            GROUP BY month ORDER BY month
+        """, (cutoff,)):
+            archived[row[0]] = row[1]
+        return archived
+
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = conn.execute(f"""
+                SELECT * FROM {table}
+                WHERE changed_at < ?
+                ORDER BY changed_at, id
+                LIMIT ?
+            """, (cutoff, batch_size))
+            columns = [d[0] for d in cur.description]
+            rows = cur.fetchall()
+            if not rows:
+                conn.rollback()
+                break
+
+            id_index = columns.index('id')
+            time_index = columns.index('changed_at')
+            months = {}
+            for row in rows:
+                months.setdefault(str(row[time_index])[:7], []).append(tuple(row))
+
+            for month, month_rows in months.items():
+                payload = zlib.compress(json.dumps(month_rows, default=str).encode('utf-8'), 9)
+                conn.execute("""
+                    INSERT INTO history_archive (
+                        source_table, month, first_id, last_id, row_count,
+                        oldest, newest, columns, payload
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (table, month,
+                      min(r[id_index] for r in month_rows), max(r[id_index] for r in month_rows),
+                      len(month_rows), month_rows[0][time_index], month_rows[-1][time_index],
+                      json.dumps(columns), payload))
+                archived[month] = archived.get(month, 0) + len(month_rows)
+
+            conn.executemany(f"DELETE FROM {table} WHERE id = ?", [(row[id_index],) for row in rows])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        if len(rows) < batch_size:
+            break
+
+    return archived
+
+
+def run_archival(conn, audit_days=AUDIT_RETENTION_DAYS, history_days=HISTORY_RETENTION_DAYS,
+                 dry_run=False):
+    """
+    Archive audit_log, and the *_history tables when history_days > 0
+    A dry run only counts rows and leaves the schema alone.
+    """
+    if not dry_run:
+        install_history_indexes(conn)
+        conn.commit()
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    results = {}
+    for table in HISTORY_TABLES:
+        days = audit_days if table == 'audit_log' else history_days
+        if table not in existing or not days or days <= 0:
+            continue
+        moved = archive_table(conn, table, days, dry_run=dry_run)
+        if moved:
+            results[table] = moved
+    return results
+
+
+def iter_archived_rows(conn, source_table, month=None):
+    """Yield archived rows of source_table (one month, or all) as dicts, oldest first"""
+    query = "SELECT columns, payload FROM history_archive WHERE source_table = ?"
+    params = [source_table]
+    if month:
+        query += " AND month = ?"
+        params.append(month)
+    for columns, payload in conn.execute(query + " ORDER BY month, first_id", params).fetchall():
+        columns = json.loads(columns)
+        for row in json.loads(zlib.decompress(payload)):
+            yield dict(zip(columns, row))
+
+
+# =====================================================
+# COMMAND LINE
+# =====================================================
+
+if __name__ == '__main__':
+    import argparse
+    import sqlite3
+    from db_utils import DATABASE_PATH
+
+    parser = argparse.ArgumentParser(description="Archive and export audit history")
+    sub = parser.add_subparsers(dest='command', required=True)
+    archive = sub.add_parser('archive', help="Move old rows into history_archive")
+    archive.add_argument('--audit-days', type=int, default=AUDIT_RETENTION_DAYS)
+    archive.add_argument('--history-days', type=int, default=HISTORY_RETENTION_DAYS)
+    archive.add_argument('--dry-run', action='store_true', help="Only count what would move")
+    export = sub.add_parser('export', help="Print archived rows as JSON lines")
+    export.add_argument('table')
+    export.add_argument('month', nargs='?', help="YYYY-MM")
+    args = parser.parse_args()
+
+    # Autocommit: archive_table opens its own transactions
+    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0, isolation_level=None)
+    conn.execute('PRAGMA busy_timeout=30000')
+    try:
+        if args.command == 'archive':
+            results = run_archival(conn, args.audit_days, args.history_days, dry_run=args.dry_run)
+            verb = "Would archive" if args.dry_run else "Archived"
+            if not results:
+                print("Nothing to archive")
+            for table, months in results.items():
+                for month, count in sorted(months.items()):
+                    print(f"{verb} {count:>7} rows  {table:<32} {month}")
+        else:
+            for row in iter_archived_rows(conn, args.table, args.month):
+                sys.stdout.write(json.dumps(row, default=str) + "\n")
+    finally:
+        conn.close()
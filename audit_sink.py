@@ -0,0 +1,200 @@
+"""
+EOS Platform - Audit Sink
+Single writer for audit_log. log_action(), log_to_audit() and the editing
+APIs' log_change() hand their rows to an in-process queue; a background
+thread writes them with one executemany per batch, when the batch reaches
+EOS_AUDIT_FLUSH_SIZE rows or EOS_AUDIT_FLUSH_INTERVAL seconds have passed,
+so a user action no longer costs its own write-lock acquisition and commit.
+changed_at is stamped when the entry is queued, not when it is written.
+
+If the queue backs up past EOS_AUDIT_MAX_BACKLOG rows (the database is slow
+or locked for a long stretch), callers fall back to writing synchronously,
+which throttles them to the speed of the database instead of growing the
+queue. Whatever is still queued is written at interpreter exit.
+
+Configuration (environment variables):
+    EOS_AUDIT_ASYNC           - 0 writes every entry synchronously (default: 1)
+    EOS_AUDIT_FLUSH_SIZE      - Rows per batch that trigger a flush (default: 100)
+    EOS_AUDIT_FLUSH_INTERVAL  - Longest an entry waits in the queue, seconds (default: 0.5)
+    EOS_AUDIT_MAX_BACKLOG     - Queued rows before callers write synchronously (default: 5000)
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+
+from db_utils import get_db, retry_on_lock
+
+logger = logging.getLogger(__name__)
+
+AUDIT_ASYNC = os.environ.get('EOS_AUDIT_ASYNC', '1') != '0'
+AUDIT_FLUSH_SIZE = int(os.environ.get('EOS_AUDIT_FLUSH_SIZE', '100'))
+AUDIT_FLUSH_INTERVAL = float(os.environ.get('EOS_AUDIT_FLUSH_INTERVAL', '0.5'))
+AUDIT_MAX_BACKLOG = int(os.environ.get('EOS_AUDIT_MAX_BACKLOG', '5000'))
+
+AUDIT_COLUMNS = (
+    'table_name', 'record_id', 'action', 'changed_by', 'changes', 'ip_address',
+    'organization_id', 'division_id', 'user_id', 'changed_at'
+)
+
+_INSERT_SQL = f"""
+    INSERT INTO audit_log ({', '.join(AUDIT_COLUMNS)})
+    VALUES ({', '.join('?' for _ in AUDIT_COLUMNS)})
+"""
+
+
+@retry_on_lock(max_retries=3)
+def _insert_batch(rows):
+    """Write rows in one transaction"""
+    conn = get_db()
+    try:
+        conn.executemany(_INSERT_SQL, rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class AuditSink:
+    """Queue of audit rows with a background group-commit writer"""
+
+    def __init__(self, enabled=AUDIT_ASYNC, flush_size=AUDIT_FLUSH_SIZE,
+                 interval=AUDIT_FLUSH_INTERVAL, max_backlog=AUDIT_MAX_BACKLOG):
+        self.enabled = enabled
+        self.flush_size = flush_size
+        self.interval = interval
+        self.max_backlog = max_backlog
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()  # one batch in flight at a time
+        self._pending = []
+        self._thread = None
+        self._stopping = False
+        self.queued = 0
+        self.written = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.sync_writes = 0
+        self.failures = 0
+        self.peak_pending = 0
+
+    def write(self, row):
+        """Queue one row (a tuple in AUDIT_COLUMNS order)"""
+        if not self.enabled or self._stopping:
+            _insert_batch([row])
+            with self._cond:
+                self.sync_writes += 1
+                self.written += 1
+            return
+
+        with self._cond:
+            self._pending.append(row)
+            self.queued += 1
+            backlog = len(self._pending)
+            self.peak_pending = max(self.peak_pending, backlog)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='eos-audit-sink', daemon=True)
+                self._thread.start()
+            if backlog >= self.flush_size:
+                self._cond.notify()
+
+        if backlog >= self.max_backlog:
+            # The writer can't keep up - make the caller wait for the database
+            with self._cond:
+                self.sync_writes += 1
+            self.flush(raise_errors=True)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopping or len(self._pending) >= self.flush_size,
+                    timeout=self.interval
+                )
+                if self._stopping:
+                    return
+                failures = self.failures
+            self.flush()
+            with self._cond:
+                if self.failures != failures and not self._stopping:
+                    # Back off instead of retrying a failing write in a tight loop
+                    self._cond.wait(self.interval)
+
+    def flush(self, raise_errors=False):
+        """Write everything queued in one transaction, return how many rows"""
+        with self._flush_lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+
+            try:
+                _insert_batch(batch)
+            except Exception as e:
+                # Put them back in front of anything queued meanwhile
+                with self._cond:
+                    self._pending[:0] = batch
+                    self.failures += 1
+                logger.warning("Failed to write %d audit row(s): %s", len(batch), e)
+                if raise_errors:
+                    raise
+                return 0
+
+            with self._cond:
+                self.written += len(batch)
+                self.flushed += len(batch)
+                self.flushes += 1
+            return len(batch)
+
+    def shutdown(self):
+        """Stop the writer thread and write whatever is queued"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=self.interval + 5)
+        self.flush()
+
+    def stats(self):
+        """Counters for the health endpoint"""
+        with self._cond:
+            return {
+                'async': self.enabled,
+                'pending': len(self._pending),
+                'peak_pending': self.peak_pending,
+                'queued': self.queued,
+                'written': self.written,
+                'flushes': self.flushes,
+                'avg_batch': round(self.flushed / self.flushes, 1) if self.flushes else 0.0,
+                'sync_writes': self.sync_writes,
+                'failures': self.failures
+            }
+
+
+_sink = AuditSink()
+atexit.register(_sink.shutdown)
+
+
+def write_audit(table_name, record_id, action, changes=None, user_id=None, changed_by=None,
+                organization_id=None, division_id=None, ip_address=None):
+    """
+    Queue an audit_log row
+    changes may be a dict (stored as JSON) or an already-encoded JSON string.
+    """
+    if changes is not None and not isinstance(changes, str):
+        changes = json.dumps(changes)
+    changed_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')  # same format as CURRENT_TIMESTAMP
+    _sink.write((table_name, record_id, action, changed_by, changes, ip_address,
+                 organization_id, division_id, user_id, changed_at))
+
+
+def flush_audit():
+    """Write queued audit rows now, return how many"""
+    return _sink.flush()
+
+
+def get_audit_stats():
+    """Audit sink counters"""
+    return _sink.stats()
@@ -3,25 +3,26 @@ EOS Platform - Multi-Tenant Authentication & Authorization
 Role-Based Access Control (RBAC) with hierarchical permissions
 """
 
-import sqlite3
 import hashlib
 import secrets
+import sqlite3
+import threading
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 from functools import wraps
 from flask import session, redirect, url_for, flash, request
 import bcrypt
 
-DATABASE_PATH = Path(__file__).parent / 'eos_data.db'
+from db_utils import get_db
+from audit_sink import write_audit
+from login_guard import (
+    LoginThrottled, LoginBusy, verify_password_bounded, check_login_allowed, record_login_success
+)
 
 def _get_db():
-    """Get database connection with WAL mode and proper timeout"""
-    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
-    conn.row_factory = sqlite3.Row
-    conn.execute('PRAGMA journal_mode=WAL')
-    conn.execute('PRAGMA synchronous=NORMAL')
-    conn.execute('PRAGMA busy_timeout=30000')
-    return conn
+    """Get a pooled database connection with WAL mode and proper timeout"""
+    return get_db()
 
 # =====================================================
 # PASSWORD HASHING
@@ -49,11 +50,15 @@ def generate_session_token() -> str:
 # USER AUTHENTICATION
 # =====================================================
 
-def authenticate_user(username: str, password: str) -> dict:
+def authenticate_user(username: str, password: str, ip_address: str = None) -> dict:
     """
     Authenticate a user by username and password
     Returns user dict with roles and permissions, or None if auth fails
+    Raises LoginThrottled (too many attempts, checked before any hashing)
+    or LoginBusy (bcrypt pool full)
     """
+    check_login_allowed(username, ip_address)
+
     conn = _get_db()
     cursor = conn.cursor()
 
@@ -70,9 +75,10 @@ def authenticate_user(username: str, password: str) -> dict:
         if not user:
             return None
 
-        # Verify password
-        if not verify_password(password, user['password_hash']):
+        # Verify password on the bounded bcrypt pool, not this request thread
+        if not user['password_hash'] or not verify_password_bounded(password, user['password_hash']):
             return None
+        record_login_success(username, ip_address)
 
         # Get user roles and permissions
         cursor.execute("""
@@ -106,6 +112,9 @@ def authenticate_user(username: str, password: str) -> dict:
 
         conn.commit()
 
+        # Compile authorization once at login
+        get_user_permissions(user['id'], refresh=True)
+
         return {
             'id': user['id'],
             'username': user['username'],
@@ -117,104 +126,243 @@ def authenticate_user(username: str, password: str) -> dict:
     finally:
         conn.close()
 
+# =====================================================
+# COMPILED PERMISSIONS
+# =====================================================
+
+EDIT_ROLES = ('DIVISION_ADMIN', 'USER_RW')
+
+# How often a web process re-reads auth_version: role or division changes made
+# by another process take effect within this many seconds
+AUTH_VERSION_CHECK_INTERVAL = 1.0
+
+# Without the auth_version table, compiled permissions expire after this long
+PERMISSIONS_FALLBACK_TTL = 30.0
+
+def install_auth_version(conn):
+    """Create the auth_version stamp and the triggers that bump it"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS auth_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO auth_version (id, version) VALUES (1, 0)")
+    for table in ('user_roles', 'divisions'):
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_auth_version_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE auth_version
+                    SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = 1;
+                END
+            """)
+
+class _AuthVersion:
+    """auth_version stamp, re-read at most every AUTH_VERSION_CHECK_INTERVAL"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = None
+        self._checked_at = None
+
+    def current(self):
+        """Latest stamp, or None if the auth_version table isn't installed"""
+        now = time.monotonic()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < AUTH_VERSION_CHECK_INTERVAL:
+                return self._value
+
+        conn = _get_db()
+        try:
+            row = conn.execute("SELECT version FROM auth_version WHERE id = 1").fetchone()
+            value = row[0] if row else None
+        except sqlite3.OperationalError:
+            value = None
+        finally:
+            conn.close()
+
+        with self._lock:
+            self._value, self._checked_at = value, now
+        return value
+
+    def expire(self):
+        """Force the next check to hit the database (after an in-process change)"""
+        with self._lock:
+            self._checked_at = None
+
+class UserPermissions:
+    """
+    Everything needed to authorize one user, compiled once from user_roles
+    and divisions: frozensets of division ids plus the division list for the
+    dashboard. Checks are set lookups with no database access.
+    """
+
+    def __init__(self, user_id, version, roles, all_divisions=()):
+        self.user_id = user_id
+        self.version = version
+        self.compiled_at = time.monotonic()
+        self.is_parent_admin = any(r['role_name'] == 'PARENT_ADMIN' for r in roles)
+        self.organizations = frozenset(r['organization_id'] for r in roles if r['organization_id'] is not None)
+        self.readable = frozenset(r['division_id'] for r in roles if r['division_id'])
+        self.editable = frozenset(r['division_id'] for r in roles
+                                  if r['division_id'] and r['role_name'] in EDIT_ROLES)
+        self.administered = frozenset(r['division_id'] for r in roles
+                                      if r['division_id'] and r['role_name'] == 'DIVISION_ADMIN')
+
+        if self.is_parent_admin:
+            # Parent admins see all divisions
+            self.divisions = tuple(dict(d) for d in all_divisions)
+        else:
+            # Regular users see only their assigned divisions
+            divisions = {}
+            for role in roles:
+                div_id = role['division_id']
+                if div_id and div_id not in divisions:
+                    divisions[div_id] = {
+                        'id': div_id,
+                        'organization_id': role['organization_id'],
+                        'name': role['division_name'],
+                        'slug': role['division_slug'],
+                        'full_slug': role['division_full_slug'],
+                        'display_name': role['division_name'],
+                        'role_name': role['role_name'],
+                        'can_edit': role['role_name'] in EDIT_ROLES
+                    }
+            self.divisions = tuple(divisions.values())
+
+    def is_current(self, version):
+        """Still valid for this auth_version stamp"""
+        if version is None:
+            return time.monotonic() - self.compiled_at < PERMISSIONS_FALLBACK_TTL
+        return version == self.version
+
+    def can_access_organization(self, organization_id):
+        return self.is_parent_admin or organization_id in self.organizations
+
+    def can_read(self, division_id):
+        return self.is_parent_admin or division_id in self.readable
+
+    def can_edit(self, division_id):
+        return self.is_parent_admin or division_id in self.editable
+
+    def is_admin(self, division_id):
+        return self.is_parent_admin or division_id in self.administered
+
+def _compile_permissions(user_id, version):
+    """Read a user's active roles (and all divisions for parent admins)"""
+    conn = _get_db()
+    try:
+        roles = [dict(row) for row in conn.execute("""
+            SELECT
+                r.name as role_name,
+                ur.organization_id,
+                ur.division_id,
+                d.name as division_name,
+                d.slug as division_slug,
+                d.full_slug as division_full_slug
+            FROM user_roles ur
+            JOIN roles r ON ur.role_id = r.id
+            LEFT JOIN divisions d ON ur.division_id = d.id
+            WHERE ur.user_id = ? AND ur.is_active = 1
+            ORDER BY ur.id
+        """, (user_id,))]
+
+        all_divisions = ()
+        if any(r['role_name'] == 'PARENT_ADMIN' for r in roles):
+            all_divisions = conn.execute("""
+                SELECT id, organization_id, name, slug, full_slug, display_name
+                FROM divisions
+                WHERE is_active = 1
+                ORDER BY name
+            """).fetchall()
+        return UserPermissions(user_id, version, roles, all_divisions)
+    finally:
+        conn.close()
+
+_auth_version = _AuthVersion()
+_permissions = {}
+_permissions_lock = threading.Lock()
+_permission_stats = {'hits': 0, 'compiles': 0}
+
+def get_user_permissions(user_id: int, refresh: bool = False) -> UserPermissions:
+    """Compiled permissions for a user, rebuilt only when roles or divisions change"""
+    version = _auth_version.current()
+    with _permissions_lock:
+        perms = _permissions.get(user_id)
+        if perms is not None and not refresh and perms.is_current(version):
+            _permission_stats['hits'] += 1
+            return perms
+
+    perms = _compile_permissions(user_id, version)
+    with _permissions_lock:
+        _permissions[user_id] = perms
+        _permission_stats['compiles'] += 1
+    return perms
+
+def invalidate_permissions(user_id: int = None):
+    """Drop compiled permissions after changing roles or divisions in this process"""
+    _auth_version.expire()
+    with _permissions_lock:
+        if user_id is None:
+            _permissions.clear()
+        else:
+            _permissions.pop(user_id, None)
+
+def get_auth_version():
+    """Current auth_version stamp (None if not installed), for other caches of role data"""
+    return _auth_version.current()
+
+def get_permission_cache_stats():
+    """Compiled permission counters for the health endpoint"""
+    with _permissions_lock:
+        return {'users': len(_permissions), **_permission_stats}
+
+def _user_permissions(user):
+    """Compiled permissions for a session user dict, or None"""
+    if not user or user.get('id') is None:
+        return None
+    return get_user_permissions(user['id'])
+
 # =====================================================
 # PERMISSION CHECKING
 # =====================================================
 
+def is_parent_admin(user: dict) -> bool:
+    """Check if user currently holds PARENT_ADMIN (not the flag cached in the session)"""
+    perms = _user_permissions(user)
+    return bool(perms) and perms.is_parent_admin
+
 def can_access_organization(user: dict, organization_id: int) -> bool:
     """Check if user can access an organization"""
-    if user.get('is_parent_admin'):
-        return True
-    
-    for role in user.get('roles', []):
-        if role.get('organization_id') == organization_id:
-            return True
-    
-    return False
+    perms = _user_permissions(user)
+    return bool(perms) and perms.can_access_organization(organization_id)
 
 def is_division_admin(user: dict, division_id: int) -> bool:
     """Check if user is admin of a specific division"""
-    if user.get('is_parent_admin'):
-        return True
-    
-    for role in user.get('roles', []):
-        if role.get('division_id') == division_id and role.get('role_name') == 'DIVISION_ADMIN':
-            return True
-    
-    return False
+    perms = _user_permissions(user)
+    return bool(perms) and perms.is_admin(division_id)
 
 def can_access_division(user: dict, division_id: int) -> bool:
     """Check if user can view a specific division"""
-    if not user:
-        return False
-    
-    # Parent admins can access all divisions
-    if user.get('is_parent_admin'):
-        return True
-    
-    # Check if user has any role in this division
-    for role in user.get('roles', []):
-        if role.get('division_id') == division_id:
-            return True
-    
-    return False
+    perms = _user_permissions(user)
+    return bool(perms) and perms.can_read(division_id)
 
 def can_edit_division(user: dict, division_id: int) -> bool:
     """Check if user can edit a specific division"""
-    if not user:
-        return False
-    
-    # Parent admins can edit all divisions
-    if user.get('is_parent_admin'):
-        return True
-    
-    # Check if user has edit role in this division
-    for role in user.get('roles', []):
-        if role.get('division_id') == division_id:
-            role_name = role.get('role_name')
-            if role_name in ['DIVISION_ADMIN', 'USER_RW']:
-                return True
-    
-    return False
+    perms = _user_permissions(user)
+    return bool(perms) and perms.can_edit(division_id)
 
 def get_user_divisions(user: dict) -> list:
     """Get list of divisions the user has access to"""
-    if user.get('is_parent_admin'):
-        # Parent admins see all divisions
-        conn = _get_db()
-        cursor = conn.cursor()
-        try:
-            cursor.execute("""
-                SELECT id, organization_id, name, slug, full_slug, display_name
-                FROM divisions
-                WHERE is_active = 1
-                ORDER BY name
-            """)
-            divisions = [dict(row) for row in cursor.fetchall()]
-            return divisions
-        finally:
-            conn.close()
-    
-    # Regular users see only their assigned divisions
-    divisions = []
-    seen_ids = set()
-    
-    for role in user.get('roles', []):
-        div_id = role.get('division_id')
-        if div_id and div_id not in seen_ids:
-            divisions.append({
-                'id': div_id,
-                'organization_id': role.get('organization_id'),
-                'name': role.get('division_name'),
-                'slug': role.get('division_slug'),
-                'full_slug': role.get('division_full_slug'),
-                'display_name': role.get('division_name'),
-                'role_name': role.get('role_name'),
-                'can_edit': role.get('role_name') in ['DIVISION_ADMIN', 'USER_RW']
-            })
-            seen_ids.add(div_id)
-    
-    return divisions
+    perms = _user_permissions(user)
+    if not perms:
+        return []
+    # Copies - callers add per-request fields such as counts
+    return [dict(d) for d in perms.divisions]
 
 # =====================================================
 # FLASK DECORATORS FOR ROUTE PROTECTION
@@ -239,7 +387,7 @@ def parent_admin_required(f):
             return redirect(url_for('login'))
         
         user = session.get('user')
-        if not user.get('is_parent_admin'):
+        if not is_parent_admin(user):
             flash('Access denied. Parent administrator privileges required.', 'danger')
             return redirect(url_for('dashboard'))
         
@@ -346,6 +494,7 @@ def assign_role(user_id: int, role_name: str, organization_id: int = None,
 
         assignment_id = cursor.lastrowid
         conn.commit()
+        invalidate_permissions(user_id)
 
         return assignment_id
     finally:
@@ -429,6 +578,7 @@ def create_division(organization_id: int, name: str, slug: str,
 
         division_id = cursor.lastrowid
         conn.commit()
+        invalidate_permissions()
 
         return division_id
     finally:
@@ -485,26 +635,10 @@ def get_all_divisions(organization_id: int = None) -> list:
 def log_action(user_id: int, table_name: str, record_id: int, action: str,
                changes: dict = None, organization_id: int = None,
                division_id: int = None, ip_address: str = None):
-    """Log an action to the audit trail"""
-    conn = _get_db()
-    cursor = conn.cursor()
-
-    try:
-        import json
-        changes_json = json.dumps(changes) if changes else None
-
-        cursor.execute("""
-            INSERT INTO audit_log (
-                organization_id, division_id, user_id, table_name,
-                record_id, action, changes, ip_address
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (organization_id, division_id, user_id, table_name,
-              record_id, action, changes_json, ip_address))
-
-        conn.commit()
-    finally:
-        conn.close()
+    """Log an action to the audit trail (queued on the audit sink)"""
+    write_audit(table_name, record_id, action, changes=changes, user_id=user_id,
+                organization_id=organization_id, division_id=division_id,
+                ip_address=ip_address)
 
 # =====================================================
 # SSO / SAML SUPPORT
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the streaming Site Lead Statement parser in financial_parser.py
+Builds multi-year statement dumps (one statement per division per month, like
+an accounting P&L history export) from the statements in datasheets/ and
+times iter_statements() over them.
+
+Usage: python bench_financial_parser.py [years ...]   (default: 1 5 10)
+"""
+
+import glob
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+import financial_parser
+
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+          'August', 'September', 'October', 'November', 'December']
+
+
+def _templates():
+    """Statement texts to replicate - one per division"""
+    paths = sorted(path for path in glob.glob(str(financial_parser.DATASHEETS_DIR / '*.txt'))
+                   if 'site lead' in os.path.basename(path).lower())
+    by_title = {}
+    for path in paths:
+        with open(path) as f:
+            text = f.read()
+        by_title[text.splitlines()[1].strip().lower()] = text
+    return list(by_title.values())
+
+
+def _restate(text, year, month, rng):
+    """Copy of a statement for another month with jittered amounts"""
+    text = re.sub(r'Ending \w+ \d+, \d{4} and \d{4}',
+                  f'Ending {MONTHS[month - 1]} 28, {year} and {year - 1}', text)
+    label = date(year, month, 1).strftime('%b')
+    text = re.sub(r'^\w{3} \d{4},\w{3} \d{4} \(YTD\),\w{3} \d{4},\w{3} \d{4} \(YTD\)$',
+                  f'{label} {year},{label} {year} (YTD),{label} {year - 1},{label} {year - 1} (YTD)',
+                  text, flags=re.MULTILINE)
+
+    def jitter(match):
+        value = financial_parser.parse_money(match.group(0)) * rng.uniform(0.8, 1.2)
+        formatted = f"{abs(value):,.2f}"
+        return f"({formatted})" if value < 0 else formatted
+
+    return financial_parser.AMOUNT_RE.sub(jitter, text)
+
+
+def write_dump(path, years, seed=42):
+    """Write a dump covering `years` years of monthly statements, return statement count"""
+    rng = random.Random(seed)
+    templates = _templates()
+    count = 0
+    end_year = date.today().year
+    with open(path, 'w') as f:
+        for year in range(end_year - years + 1, end_year + 1):
+            for month in range(1, 13):
+                for text in templates:
+                    f.write(_restate(text, year, month, rng))
+                    if not text.endswith('\n'):
+                        f.write('\n')
+                    count += 1
+    return count
+
+
+def bench(years, repeat=3):
+    """Best-of-N timing for one dump size"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'pl_history.txt')
+        expected = write_dump(path, years)
+        with open(path) as f:
+            line_count = sum(1 for _ in f)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            with open(path) as f:
+                statements = gl_lines = 0
+                for statement in financial_parser.iter_statements(f):
+                    statements += 1
+                    gl_lines += len(statement['lines'])
+            best = min(best, time.perf_counter() - start)
+
+        # Streaming: peak memory stays at roughly one statement, not the dump
+        tracemalloc.start()
+        with open(path) as f:
+            for _ in financial_parser.iter_statements(f):
+                pass
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        status = 'ok' if statements == expected else f'MISMATCH (expected {expected})'
+        print(f"  {years:>3} yr  {size_mb:>6.1f} MB  {line_count:>8,} lines  {statements:>5} statements  "
+              f"{gl_lines:>7,} GL lines  {best * 1000:>8.1f} ms  {line_count / best:>11,.0f} lines/s  "
+              f"peak {peak / 1024:>6.0f} KB  {status}")
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1, 5, 10]
+    print("=" * 70)
+    print("Site Lead Statement parser benchmark")
+    print("=" * 70)
+    for years in sizes:
+        bench(years)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark for password verification throughput in login_guard.py
+Simulates a shift-change login rush: N request threads each verify one
+password through a PasswordVerifier, at several bcrypt work factors and
+pool sizes. Reports logins/s, latency percentiles and rejected logins.
+
+Usage: python bench_login.py [rounds ...]   (default: 10 12)
+       EOS_BENCH_CLIENTS=50 python bench_login.py 12
+"""
+
+import os
+import sys
+import threading
+import time
+
+import bcrypt
+
+from login_guard import PasswordVerifier, LoginBusy
+
+CLIENTS = int(os.environ.get('EOS_BENCH_CLIENTS', '40'))
+PASSWORD = 'correct horse battery staple'
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def rush(verifier, password_hash, clients=CLIENTS):
+    """clients threads log in at once; return (elapsed, latencies, rejected)"""
+    latencies, rejected = [], []
+    start_gate = threading.Event()
+
+    def login():
+        start_gate.wait()
+        started = time.perf_counter()
+        try:
+            verifier.verify(PASSWORD, password_hash)
+            latencies.append(time.perf_counter() - started)
+        except LoginBusy:
+            rejected.append(1)
+
+    threads = [threading.Thread(target=login) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    started = time.perf_counter()
+    start_gate.set()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, latencies, len(rejected)
+
+
+def bench(rounds):
+    """One work factor across pool sizes and a bounded queue"""
+    password_hash = bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+    start = time.perf_counter()
+    bcrypt.checkpw(PASSWORD.encode('utf-8'), password_hash.encode('utf-8'))
+    single = time.perf_counter() - start
+    print(f"rounds={rounds}  single verify {single * 1000:.0f} ms")
+
+    cpus = os.cpu_count() or 1
+    for workers, max_queue in sorted({(1, CLIENTS), (cpus, CLIENTS), (cpus, cpus * 2)}):
+        verifier = PasswordVerifier(workers=workers, max_queue=max_queue, timeout=600)
+        elapsed, latencies, rejected = rush(verifier, password_hash)
+        verifier.shutdown()
+        done = len(latencies)
+        p50 = _percentile(latencies, 50) if latencies else 0
+        p95 = _percentile(latencies, 95) if latencies else 0
+        print(f"  workers={workers:<2} queue={max_queue:<3}  {done:>3}/{CLIENTS} logins  "
+              f"{done / elapsed:>6.1f} logins/s  p50 {p50 * 1000:>6.0f} ms  p95 {p95 * 1000:>6.0f} ms  "
+              f"rejected {rejected:>3}  peak queue {verifier.stats()['peak_queue']}")
+
+
+if __name__ == '__main__':
+    work_factors = [int(arg) for arg in sys.argv[1:]] or [10, 12]
+    print("=" * 70)
+    print(f"Login throughput benchmark ({CLIENTS} simultaneous logins, {os.cpu_count()} CPU)")
+    print("=" * 70)
+    for rounds in work_factors:
+        bench(rounds)
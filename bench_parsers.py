@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the datasheet parsers in app.py
+Generates synthetic Rocks/Scorecard/Issues/To-Dos sheets and times each parser
+with the parse cache bypassed.
+
+Usage: python bench_parsers.py [rows ...]   (default: 10000 50000 100000)
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import app
+
+STATUSES = {
+    'rocks': ['COMPLETE', 'ON TRACK', 'AT RISK', 'BLOCKED', 'NOT STARTED'],
+    'scorecard': ['GREEN', 'YELLOW', 'RED'],
+    'issues': ['OPEN', 'IN PROGRESS', 'SOLVED'],
+    'todos': ['OPEN', 'IN PROGRESS', 'COMPLETE'],
+}
+OWNERS = ['Jeff', 'Don', 'Doug', 'HR', 'Operations']
+
+
+def _due(rng):
+    day = date.today() + timedelta(days=rng.randint(-60, 60))
+    return f"{day.month}/{day.day}/{day.year}"
+
+
+def write_sheets(directory, rows, seed=42):
+    """Write one synthetic sheet per parser, return {name: path}"""
+    rng = random.Random(seed)
+    paths = {name: os.path.join(directory, f'{name}.csv') for name in STATUSES}
+
+    with open(paths['rocks'], 'w') as f:
+        f.write('Description|Owner|Status|DueDate|Progress\n')
+        for i in range(rows):
+            f.write(f"Rock {i}|{rng.choice(OWNERS)}|{rng.choice(STATUSES['rocks'])}|"
+                    f"{_due(rng)}|{rng.randint(0, 100)}\n")
+
+    with open(paths['scorecard'], 'w') as f:
+        weeks = '|'.join(f'Week{w}' for w in range(1, 14))
+        f.write(f'Metric|Owner|Goal|{weeks}|Status\n')
+        for i in range(rows):
+            values = '|'.join('' if rng.random() < 0.1 else str(rng.randint(0, 50000)) for _ in range(13))
+            f.write(f"Metric {i}|{rng.choice(OWNERS)}|$25K|{values}|{rng.choice(STATUSES['scorecard'])}\n")
+
+    with open(paths['issues'], 'w') as f:
+        f.write('Issue|Priority|Owner|DateAdded|Status\n')
+        for i in range(rows):
+            f.write(f"Issue {i}|{rng.choice(['HIGH', 'MEDIUM', 'LOW'])}|{rng.choice(OWNERS)}|"
+                    f"{_due(rng)}|{rng.choice(STATUSES['issues'])}\n")
+
+    with open(paths['todos'], 'w') as f:
+        f.write('Task|Owner|DueDate|Status|Source\n')
+        for i in range(rows):
+            due = '' if rng.random() < 0.05 else _due(rng)
+            f.write(f"Task {i}|{rng.choice(OWNERS)}|{due}|{rng.choice(STATUSES['todos'])}|Meeting\n")
+
+    return paths
+
+
+def bench(rows, repeat=3):
+    """Best-of-N timing for each parser at a given sheet size"""
+    parsers = {
+        'rocks': app.parse_rocks,
+        'scorecard': app.parse_scorecard,
+        'issues': app.parse_issues,
+        'todos': app.parse_todos,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_sheets(tmp, rows)
+        for name, parser in parsers.items():
+            parse = parser.__wrapped__  # skip the parse cache
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = parse(paths[name])
+                best = min(best, time.perf_counter() - start)
+            print(f"  {name:<10} {rows:>7} rows  {best * 1000:>9.1f} ms  "
+                  f"{rows / best:>12,.0f} rows/s  summary={result['summary']}")
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 50000, 100000]
+    print("=" * 70)
+    print("Datasheet parser benchmark")
+    print("=" * 70)
+    for rows in sizes:
+        bench(rows)
@@ -5,21 +5,13 @@ Company-wide Vision/VTO, Accountability Chart, and Financial Rollup
 
 from flask import render_template, request, redirect, url_for, flash, jsonify, session
 from auth import login_required, parent_admin_required, log_action
-import sqlite3
+from db_utils import get_db
 import json
-from pathlib import Path
 
-DATABASE_PATH = Path(__file__).parent / 'eos_data.db'
-
-def get_db():
-    """Get database connection with timeout for concurrent access"""
-    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
-    conn.row_factory = sqlite3.Row
-    return conn
 
 def get_financial_rollup():
     """Sum gross profit data across all divisions"""
-    from financial_parser import parse_site_lead_statement
+    from financial_snapshots import refresh_financial_snapshots, get_latest_snapshots, empty_snapshot
     rollup = {
         'new_equipment': {'month': 0, 'ytd': 0, 'py_month': 0, 'py_ytd': 0},
         'parts': {'month': 0, 'ytd': 0, 'py_month': 0, 'py_ytd': 0},
@@ -27,8 +19,20 @@ def get_financial_rollup():
         'gross_profit': {'month': 0, 'ytd': 0, 'py_month': 0, 'py_ytd': 0},
         'by_division': {}
     }
-    for name in ['Plainwell', 'Kalamazoo', 'Generator']:
-        data = parse_site_lead_statement(division_name=name)
+    names = ['Plainwell', 'Kalamazoo', 'Generator']
+    refresh_financial_snapshots()
+
+    conn = get_db()
+    division_ids = {
+        row['name']: row['id'] for row in conn.execute(
+            f"SELECT id, name FROM divisions WHERE name IN ({','.join('?' * len(names))})", names
+        )
+    }
+    snapshots = get_latest_snapshots(conn, division_ids.values())
+    conn.close()
+
+    for name in names:
+        data = snapshots[division_ids[name]] if name in division_ids else empty_snapshot()
         rollup['by_division'][name] = data
         for cat in ['new_equipment', 'parts', 'labor', 'gross_profit']:
             for period in ['month', 'ytd', 'py_month', 'py_ytd']:
@@ -340,3 +344,29 @@ def register_corporate_routes(app):
 
         flash('Seat removed', 'success')
         return redirect(url_for('corporate_accountability'))
+
+    # ---- Financial Trends ----
+
+    @app.route('/corporate/financials/trend')
+    @parent_admin_required
+    def corporate_financial_trend():
+        """Monthly trend figures per division and combined, from every stored statement"""
+        from financial_snapshots import refresh_financial_snapshots, CATEGORIES
+        from financial_timeseries import load_series, get_trends
+
+        category = request.args.get('category', 'gross_profit')
+        if category not in CATEGORIES:
+            return jsonify({'success': False, 'error': f"category must be one of {', '.join(CATEGORIES)}"}), 400
+        window = request.args.get('window', 3, type=int)
+        months = request.args.get('months', 0, type=int)
+        if window < 1 or months < 0:
+            return jsonify({'success': False, 'error': 'window must be >= 1 and months >= 0'}), 400
+
+        refresh_financial_snapshots()
+        conn = get_db()
+        try:
+            series = load_series(conn)
+        finally:
+            conn.close()
+
+        return jsonify({'success': True, **get_trends(series, category, window, months)})
@@ -8,6 +8,8 @@ import json
 from datetime import datetime
 from pathlib import Path
 
+from history_triggers import install_history_triggers
+
 DATABASE_PATH = Path(__file__).parent / 'eos_data.db'
 
 def init_database():
@@ -137,6 +139,9 @@ def init_database():
         )
     ''')
     
+    # Field-level history rows are written by triggers on update
+    install_history_triggers(conn)
+    
     conn.commit()
     conn.close()
     print("Database initialized successfully")
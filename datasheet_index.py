@@ -0,0 +1,112 @@
+"""
+EOS Platform - Datasheet Index
+In-memory map of the datasheets folder so callers can resolve "newest file
+matching X" without listing and stat-ing the whole directory per request.
+"""
+
+import os
+import threading
+import time
+
+from sync_generation import current_generation
+
+# Safety net for writers that overwrite a file in place, which does not bump
+# the directory mtime. eos_sync.py writes via rename and also bumps the sync
+# generation, which forces a rescan straight away.
+RESCAN_INTERVAL = 30
+
+
+class DatasheetIndex:
+    """Snapshot of one directory, refreshed when its mtime changes"""
+
+    def __init__(self, directory, rescan_interval=RESCAN_INTERVAL):
+        self.directory = os.path.abspath(os.fspath(directory))
+        self.rescan_interval = rescan_interval
+        self._lock = threading.Lock()
+        self._dir_mtime = None
+        self._generation = None
+        self._scanned_at = 0.0
+        self._entries = []   # (name, path, mtime, size), newest first
+        self._lookups = {}   # memoized lookups, cleared on every rescan
+        self.scans = 0
+
+    def _refresh(self):
+        """Rescan the directory if it changed since the last snapshot"""
+        try:
+            dir_mtime = os.stat(self.directory).st_mtime_ns
+        except OSError:
+            dir_mtime = None
+
+        generation = current_generation()
+        now = time.monotonic()
+        if (dir_mtime == self._dir_mtime and generation == self._generation
+                and now - self._scanned_at < self.rescan_interval):
+            return
+
+        entries = []
+        if dir_mtime is not None:
+            try:
+                with os.scandir(self.directory) as it:
+                    for entry in it:
+                        try:
+                            if not entry.is_file():
+                                continue
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        entries.append((entry.name, entry.path, st.st_mtime, st.st_size))
+            except OSError:
+                entries = []
+
+        entries.sort(key=lambda e: e[2], reverse=True)
+        self._entries = entries
+        self._lookups = {}
+        self._dir_mtime = dir_mtime
+        self._generation = generation
+        self._scanned_at = now
+        self.scans += 1
+
+    def files(self):
+        """List of (name, path, mtime, size) tuples, newest first"""
+        with self._lock:
+            self._refresh()
+            return list(self._entries)
+
+    def find(self, key, predicate):
+        """Newest path whose lowercased filename satisfies predicate, memoized under key"""
+        with self._lock:
+            self._refresh()
+            if key not in self._lookups:
+                self._lookups[key] = next(
+                    (path for name, path, _, _ in self._entries if predicate(name.lower())),
+                    None
+                )
+            return self._lookups[key]
+
+    def latest(self, patterns):
+        """Newest path whose name contains any of the patterns (case-insensitive)"""
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        patterns = tuple(p.lower() for p in patterns)
+        return self.find(('latest',) + patterns, lambda name: any(p in name for p in patterns))
+
+    def memoize(self, key, compute):
+        """Cache an arbitrary derived value until the next rescan"""
+        with self._lock:
+            self._refresh()
+            if key not in self._lookups:
+                self._lookups[key] = compute(list(self._entries))
+            return self._lookups[key]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(directory):
+    """Get the shared index for a directory"""
+    directory = os.path.abspath(os.fspath(directory))
+    with _indexes_lock:
+        if directory not in _indexes:
+            _indexes[directory] = DatasheetIndex(directory)
+        return _indexes[directory]
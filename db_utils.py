@@ -3,7 +3,9 @@ Database utilities with retry logic for concurrent access
 Handles SQLite database locks gracefully with exponential backoff
 """
 
+import os
 import sqlite3
+import threading
 import time
 from pathlib import Path
 from contextlib import contextmanager
@@ -11,25 +13,238 @@ from functools import wraps
 
 DATABASE_PATH = Path(__file__).parent / 'eos_data.db'
 
-def get_db():
-    """
-    Get database connection with optimized settings for concurrent access
-    """
+# Pool sizing - SQLite serializes writers anyway, so a handful is plenty
+POOL_MAX_SIZE = int(os.environ.get('EOS_DB_POOL_SIZE', '16'))
+POOL_TIMEOUT = float(os.environ.get('EOS_DB_POOL_TIMEOUT', '30'))
+# Idle connections older than this get a SELECT 1 before being handed out
+POOL_HEALTH_CHECK_INTERVAL = 60
+
+
+def _connect(database):
+    """Open a connection with the PRAGMAs set once for its lifetime"""
     conn = sqlite3.connect(
-        DATABASE_PATH,
+        database,
         timeout=30.0,
         isolation_level='DEFERRED',  # Better for read-heavy workloads
-        check_same_thread=False
+        check_same_thread=False      # Connections move between request threads
     )
     conn.row_factory = sqlite3.Row
-    
-    # Ensure WAL mode and optimizations are set
     conn.execute('PRAGMA journal_mode=WAL')
     conn.execute('PRAGMA synchronous=NORMAL')
     conn.execute('PRAGMA busy_timeout=30000')  # 30 seconds in milliseconds
-    
     return conn
 
+
+class PooledConnection:
+    """
+    Proxy around a pooled sqlite3 connection
+    close() hands the connection back to the pool instead of closing it.
+    """
+
+    def __init__(self, pool, conn):
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, '_conn', conn)
+        object.__setattr__(self, '_depth', 1)
+        object.__setattr__(self, '_released', False)
+
+    def __getattr__(self, name):
+        if self._released:
+            raise sqlite3.ProgrammingError('Cannot operate on a closed database.')
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def __enter__(self):
+        return self._conn.__enter__()
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def close(self):
+        """Return the connection to the pool once the outermost user is done"""
+        if self._released:
+            return
+        object.__setattr__(self, '_depth', self._depth - 1)
+        if self._depth <= 0:
+            self._pool._release(self)
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections
+
+    A thread gets the same connection back for nested get_db() calls until
+    the outermost caller closes it, so helpers like log_to_audit() share the
+    request's connection instead of opening a second one. A nested commit
+    therefore commits the outer caller's pending writes as well.
+    """
+
+    def __init__(self, database, max_size=POOL_MAX_SIZE, timeout=POOL_TIMEOUT,
+                 health_check_interval=POOL_HEALTH_CHECK_INTERVAL):
+        self.database = database
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._idle = []          # (connection, returned_at)
+        self._live = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._metrics = {
+            'checkouts': 0,
+            'reentrant_checkouts': 0,
+            'connections_created': 0,
+            'connections_discarded': 0,
+            'health_checks': 0,
+            'health_check_failures': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'timeouts': 0,
+        }
+
+    def acquire(self):
+        """Check out this thread's connection, opening or waiting for one if needed"""
+        current = getattr(self._local, 'conn', None)
+        if current is not None and not current._released:
+            object.__setattr__(current, '_depth', current._depth + 1)
+            with self._cond:
+                self._metrics['reentrant_checkouts'] += 1
+            return current
+
+        conn = None
+        with self._cond:
+            start = time.monotonic()
+            waited = False
+            while not self._idle and self._live >= self.max_size:
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    self._metrics['timeouts'] += 1
+                    raise sqlite3.OperationalError('database connection pool exhausted')
+                waited = True
+                self._cond.wait(remaining)
+
+            if waited:
+                elapsed = time.monotonic() - start
+                self._metrics['waits'] += 1
+                self._metrics['wait_time_total'] += elapsed
+                self._metrics['wait_time_max'] = max(self._metrics['wait_time_max'], elapsed)
+
+            if self._idle:
+                conn, returned_at = self._idle.pop()
+                needs_check = time.monotonic() - returned_at > self.health_check_interval
+            else:
+                self._live += 1
+                needs_check = False
+            self._metrics['checkouts'] += 1
+
+        # Connect and health check outside the lock
+        try:
+            if conn is None:
+                conn = self._open()
+            elif needs_check and not self._healthy(conn):
+                conn = self._open()
+        except Exception:
+            with self._cond:
+                self._live -= 1
+                self._cond.notify()
+            raise
+
+        pooled = PooledConnection(self, conn)
+        self._local.conn = pooled
+        return pooled
+
+    def _open(self):
+        conn = _connect(self.database)
+        with self._cond:
+            self._metrics['connections_created'] += 1
+        return conn
+
+    def _healthy(self, conn):
+        """SELECT 1 on a connection that sat idle; close it if it fails"""
+        with self._cond:
+            self._metrics['health_checks'] += 1
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            with self._cond:
+                self._metrics['health_check_failures'] += 1
+                self._metrics['connections_discarded'] += 1
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+            return False
+
+    def _release(self, pooled):
+        conn = pooled._conn
+        object.__setattr__(pooled, '_released', True)
+        if getattr(self._local, 'conn', None) is pooled:
+            self._local.conn = None
+
+        # Never hand the next request an open transaction or altered settings
+        reusable = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = sqlite3.Row
+            conn.isolation_level = 'DEFERRED'
+        except sqlite3.Error:
+            reusable = False
+
+        with self._cond:
+            if reusable:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._live -= 1
+                self._metrics['connections_discarded'] += 1
+            self._cond.notify()
+
+        if not reusable:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def release_thread_connection(self):
+        """Return this thread's connection even if a caller forgot to close it"""
+        current = getattr(self._local, 'conn', None)
+        if current is not None and not current._released:
+            object.__setattr__(current, '_depth', 0)
+            self._release(current)
+
+    def stats(self):
+        """Pool metrics for the health endpoint"""
+        with self._cond:
+            stats = dict(self._metrics)
+            stats['max_size'] = self.max_size
+            stats['live_connections'] = self._live
+            stats['idle_connections'] = len(self._idle)
+            stats['in_use_connections'] = self._live - len(self._idle)
+            stats['wait_time_avg'] = (
+                stats['wait_time_total'] / stats['waits'] if stats['waits'] else 0.0
+            )
+            return stats
+
+
+_pool = ConnectionPool(DATABASE_PATH)
+
+def get_db():
+    """
+    Get a pooled database connection with optimized settings for concurrent access
+    Call close() when done - it returns the connection to the pool.
+    """
+    return _pool.acquire()
+
+def release_thread_connection():
+    """Return any connection the current thread still holds (request teardown)"""
+    _pool.release_thread_connection()
+
+def get_pool_stats():
+    """Get connection pool metrics"""
+    return _pool.stats()
+
 @contextmanager
 def get_db_connection():
     """
@@ -168,26 +383,15 @@ def transaction(func):
     
     return wrapper
 
-# Convenience function for logging with retry
-@retry_on_lock(max_retries=3)
+# Convenience function for audit logging
 def log_to_audit(user_id, table_name, record_id, action, changes=None, 
                  organization_id=None, division_id=None, ip_address=None):
     """
-    Log an action to the audit trail with retry logic
-    Separate connection to avoid blocking main operations
+    Log an action to the audit trail
+    Queued on the audit sink and written in batches (see audit_sink.py)
     """
-    import json
-    
-    changes_json = json.dumps(changes) if changes else None
+    from audit_sink import write_audit
     
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO audit_log (
-                organization_id, division_id, user_id, table_name, 
-                record_id, action, changes, ip_address
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (organization_id, division_id, user_id, table_name, 
-              record_id, action, changes_json, ip_address))
-        conn.commit()
+    write_audit(table_name, record_id, action, changes=changes, user_id=user_id,
+                organization_id=organization_id, division_id=division_id,
+                ip_address=ip_address)
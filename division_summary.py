@@ -0,0 +1,165 @@
+"""
+EOS Platform - Division Summary
+Per-division dashboard counts kept in a division_summary table by triggers,
+with a single grouped CTE query as the fallback when the table isn't installed.
+"""
+
+import sqlite3
+
+# source table -> (row filter, columns watched by the UPDATE trigger,
+#                  [(summary column, aggregate expression)])
+SUMMARY_SOURCES = {
+    'rocks': ('is_active = 1', ['division_id', 'is_active', 'status'], [
+        ('rocks_total', "COUNT(*)"),
+        ('rocks_complete', "COUNT(CASE WHEN status = 'COMPLETE' THEN 1 END)"),
+        ('rocks_on_track', "COUNT(CASE WHEN status IN ('ON TRACK', 'COMPLETE') THEN 1 END)"),
+    ]),
+    'scorecard_metrics': ('is_active = 1', ['division_id', 'is_active', 'status'], [
+        ('scorecard_total', "COUNT(*)"),
+        ('scorecard_green', "COUNT(CASE WHEN status = 'GREEN' THEN 1 END)"),
+        ('scorecard_yellow', "COUNT(CASE WHEN status = 'YELLOW' THEN 1 END)"),
+        ('scorecard_red', "COUNT(CASE WHEN status = 'RED' THEN 1 END)"),
+    ]),
+    'issues': ('is_active = 1', ['division_id', 'is_active', 'status', 'priority'], [
+        ('issues_total', "COUNT(*)"),
+        ('issues_high', "COUNT(CASE WHEN priority = 'HIGH' THEN 1 END)"),
+        ('issues_open', "COUNT(CASE WHEN status = 'OPEN' THEN 1 END)"),
+    ]),
+    'todos': ('is_active = 1', ['division_id', 'is_active', 'status'], [
+        ('todos_total', "COUNT(*)"),
+        ('todos_open', "COUNT(CASE WHEN status = 'OPEN' THEN 1 END)"),
+        ('todos_pending', "COUNT(CASE WHEN status IN ('OPEN', 'IN PROGRESS') THEN 1 END)"),
+        ('todos_complete', "COUNT(CASE WHEN status = 'COMPLETE' THEN 1 END)"),
+    ]),
+    'l10_meetings': ('1 = 1', ['division_id', 'status', 'actual_duration_minutes'], [
+        ('l10_total', "COUNT(*)"),
+        ('l10_upcoming', "COUNT(CASE WHEN status IN ('SCHEDULED', 'IN_PROGRESS') THEN 1 END)"),
+        ('l10_duration_sum', "TOTAL(CAST(actual_duration_minutes AS FLOAT))"),
+        ('l10_duration_count', "COUNT(actual_duration_minutes)"),
+    ]),
+}
+
+SUMMARY_COLUMNS = [col for _, _, cols in SUMMARY_SOURCES.values() for col, _ in cols]
+
+
+def _recompute_sql(table, division_ref, condition=''):
+    """UPDATE statement that recomputes one source table's columns for a division"""
+    where, _, cols = SUMMARY_SOURCES[table]
+    names = ', '.join(col for col, _ in cols)
+    exprs = ', '.join(expr for _, expr in cols)
+    return f"""
+        UPDATE division_summary
+        SET ({names}) = (
+                SELECT {exprs} FROM {table}
+                WHERE division_id = {division_ref} AND {where}
+            ),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE division_id = {division_ref}{condition};"""
+
+
+def _trigger_statements():
+    """CREATE TRIGGER statements keeping division_summary in step with its sources"""
+    statements = []
+    for table, (_, watched, _) in SUMMARY_SOURCES.items():
+        statements.append(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_insert
+            AFTER INSERT ON {table} WHEN NEW.division_id IS NOT NULL
+            BEGIN
+                INSERT OR IGNORE INTO division_summary (division_id) VALUES (NEW.division_id);
+                {_recompute_sql(table, 'NEW.division_id')}
+            END""")
+        statements.append(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_update
+            AFTER UPDATE OF {', '.join(watched)} ON {table}
+            BEGIN
+                INSERT OR IGNORE INTO division_summary (division_id)
+                SELECT NEW.division_id WHERE NEW.division_id IS NOT NULL;
+                {_recompute_sql(table, 'NEW.division_id')}
+                {_recompute_sql(table, 'OLD.division_id', ' AND OLD.division_id IS NOT NEW.division_id')}
+            END""")
+        statements.append(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_delete
+            AFTER DELETE ON {table} WHEN OLD.division_id IS NOT NULL
+            BEGIN
+                {_recompute_sql(table, 'OLD.division_id')}
+            END""")
+    return statements
+
+
+def _summary_cte_sql(division_filter=''):
+    """Single grouped query computing every summary column from the source tables"""
+    ctes = []
+    selects = []
+    joins = []
+    for i, (table, (where, _, cols)) in enumerate(SUMMARY_SOURCES.items()):
+        alias = f's{i}'
+        aggregates = ', '.join(f'{expr} AS {col}' for col, expr in cols)
+        ctes.append(f"{alias} AS (SELECT division_id, {aggregates} FROM {table} "
+                    f"WHERE {where} GROUP BY division_id)")
+        selects.extend(f'COALESCE({alias}.{col}, 0) AS {col}' for col, _ in cols)
+        joins.append(f'LEFT JOIN {alias} ON {alias}.division_id = d.id')
+    return f"""
+        WITH {', '.join(ctes)}
+        SELECT d.id AS division_id, {', '.join(selects)}
+        FROM divisions d
+        {' '.join(joins)}
+        {division_filter}
+    """
+
+
+def install_division_summary(conn):
+    """Create the division_summary table and triggers, then backfill every division"""
+    columns = ',\n'.join(
+        f'    {col} {"REAL" if col == "l10_duration_sum" else "INTEGER"} NOT NULL DEFAULT 0'
+        for col in SUMMARY_COLUMNS
+    )
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS division_summary (
+            division_id INTEGER PRIMARY KEY,
+        {columns},
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (division_id) REFERENCES divisions(id)
+        )
+    """)
+    for statement in _trigger_statements():
+        conn.execute(statement)
+
+    # Backfill from the same query the fallback path uses
+    names = ', '.join(SUMMARY_COLUMNS)
+    conn.execute(f"""
+        INSERT OR REPLACE INTO division_summary (division_id, {names}, updated_at)
+        SELECT division_id, {names}, CURRENT_TIMESTAMP FROM ({_summary_cte_sql()})
+    """)
+
+
+def get_division_summaries(conn, division_ids):
+    """
+    Get summary counts for several divisions in one query
+    Returns {division_id: {column: value}}; divisions with no rows get zeros.
+    """
+    division_ids = list(division_ids)
+    if not division_ids:
+        return {}
+    placeholders = ','.join('?' * len(division_ids))
+
+    try:
+        rows = conn.execute(f"""
+            SELECT division_id, {', '.join(SUMMARY_COLUMNS)}
+            FROM division_summary
+            WHERE division_id IN ({placeholders})
+        """, division_ids).fetchall()
+    except sqlite3.OperationalError:
+        # Table not installed yet - compute on the fly
+        rows = conn.execute(
+            _summary_cte_sql(f'WHERE d.id IN ({placeholders})'), division_ids
+        ).fetchall()
+
+    summaries = {division_id: dict.fromkeys(SUMMARY_COLUMNS, 0) for division_id in division_ids}
+    for row in rows:
+        summaries[row['division_id']] = {col: row[col] for col in SUMMARY_COLUMNS}
+    return summaries
+
+
+def get_division_summary(conn, division_id):
+    """Get summary counts for one division"""
+    return get_division_summaries(conn, [division_id])[division_id]
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Test harness for the background email queue in email_service.py
+Starts a local debugging SMTP server on 127.0.0.1 (records connections,
+logins and messages; can answer MAIL with 451 or RCPT with 550 on demand),
+points SMTP_CONFIG at it and checks: one SMTP session per worker reused
+across messages, exponential backoff on 4xx replies, no retry on 5xx, and
+that /division/<id>/todos/notify/<job_id> reports the right sent/failed
+counts for a real notify request.
+
+Works on a temporary copy of eos_data.db. Usage: python email_queue_harness.py
+"""
+
+import os
+import shutil
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+
+results = []
+
+
+def check(name, condition, detail=''):
+    results.append(bool(condition))
+    print(f"  {'✓' if condition else '✗'} {name}{f' ({detail})' if detail and not condition else ''}")
+
+
+# =====================================================
+# DEBUGGING SMTP SERVER
+# =====================================================
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: EHLO, AUTH, MAIL, RCPT, DATA, RSET, QUIT"""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+            conn_id = server.connections
+        self.reply("220 localhost EOS harness SMTP")
+        rcpts = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb == 'EHLO':
+                self.reply("250-localhost")
+                self.reply("250 AUTH PLAIN LOGIN")
+            elif verb == 'HELO':
+                self.reply("250 localhost")
+            elif verb == 'AUTH':
+                with server.lock:
+                    server.logins += 1
+                self.reply("235 2.7.0 Authentication successful")
+            elif verb == 'MAIL':
+                rcpts = []
+                with server.lock:
+                    server.mail_attempts.append(time.monotonic())
+                    refuse = server.refuse_mail > 0
+                    server.refuse_mail -= refuse
+                self.reply("451 4.3.0 Try again later" if refuse else "250 OK")
+            elif verb == 'RCPT':
+                address = command.split(':', 1)[1].strip().strip('<>')
+                if address in server.reject_rcpt:
+                    self.reply("550 5.1.1 No such user")
+                else:
+                    rcpts.append(address)
+                    self.reply("250 OK")
+            elif verb == 'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                with server.lock:
+                    server.messages.extend((conn_id, address) for address in rcpts)
+                self.reply("250 OK queued")
+            elif verb in ('RSET', 'NOOP'):
+                rcpts = []
+                self.reply("250 OK")
+            elif verb == 'QUIT':
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class DebugSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self, refuse_mail=0, reject_rcpt=()):
+        with self.lock:
+            self.connections = 0
+            self.logins = 0
+            self.messages = []
+            self.mail_attempts = []
+            self.refuse_mail = refuse_mail
+            self.reject_rcpt = set(reject_rcpt)
+
+
+def wait_for(job_id, get_job, timeout=15):
+    """Poll a job until it is done"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = get_job(job_id)
+        if job and job['status'] == 'done':
+            return job
+        time.sleep(0.05)
+    return get_job(job_id)
+
+
+def message(n, to=None):
+    return {'to': to or f"user{n}@example.test", 'label': f"User {n}", 'subject': f"Harness {n}",
+            'html': f"<p>message {n}</p>", 'text': f"message {n}"}
+
+
+# =====================================================
+# CHECKS
+# =====================================================
+
+def run_queue(server, email_service):
+    print("Session reuse")
+    server.reset()
+    queue = email_service.EmailQueue(workers=1, retries=3, base_delay=0.2)
+    job = wait_for(queue.enqueue([message(n) for n in range(6)]), queue.get_job)
+    check("all six messages delivered", job['sent'] == 6 and len(server.messages) == 6)
+    check("one connection for six messages", server.connections == 1, f"{server.connections} connections")
+    check("one login for six messages", server.logins == 1, f"{server.logins} logins")
+    queue.shutdown()
+
+    server.reset()
+    queue = email_service.EmailQueue(workers=3, retries=3, base_delay=0.2)
+    job = wait_for(queue.enqueue([message(n) for n in range(12)]), queue.get_job)
+    check("twelve messages over three workers", job['sent'] == 12 and len(server.messages) == 12)
+    check("at most one session per worker", server.connections <= 3, f"{server.connections} connections")
+    queue.shutdown()
+
+    print("Transient 4xx")
+    server.reset(refuse_mail=2)
+    queue = email_service.EmailQueue(workers=1, retries=3, base_delay=0.2)
+    job = wait_for(queue.enqueue([message(1)]), queue.get_job)
+    attempts = server.mail_attempts
+    gaps = [b - a for a, b in zip(attempts, attempts[1:])]
+    check("delivered after two 451 replies", job['sent'] == 1 and job['failed'] == 0 and len(attempts) == 3)
+    check("first retry waits the base delay", len(gaps) == 2 and gaps[0] >= 0.2,
+          ', '.join(f"{g:.2f}s" for g in gaps))
+    check("second retry waits twice as long", len(gaps) == 2 and gaps[1] >= 0.4 and gaps[1] >= 1.5 * gaps[0],
+          ', '.join(f"{g:.2f}s" for g in gaps))
+    check("reconnects after a failed attempt", server.connections == 3, f"{server.connections} connections")
+    queue.shutdown()
+
+    server.reset(refuse_mail=10)
+    queue = email_service.EmailQueue(workers=1, retries=2, base_delay=0.05)
+    job = wait_for(queue.enqueue([message(1)]), queue.get_job)
+    check("gives up after the configured retries", job['failed'] == 1 and len(server.mail_attempts) == 3,
+          f"{len(server.mail_attempts)} attempts")
+    queue.shutdown()
+
+    print("Permanent 5xx")
+    server.reset(reject_rcpt={'user1@example.test'})
+    queue = email_service.EmailQueue(workers=1, retries=3, base_delay=0.2)
+    job = wait_for(queue.enqueue([message(1), message(2)]), queue.get_job)
+    check("550 fails without retrying", job['failed'] == 1 and len(server.mail_attempts) == 2,
+          f"{len(server.mail_attempts)} attempts")
+    check("other messages still sent", job['sent'] == 1 and server.messages[-1][1] == 'user2@example.test')
+    check("error names the recipient", len(job['errors']) == 1 and job['errors'][0].startswith('User 1'))
+    queue.shutdown()
+
+
+def run_route(server, email_service, tmp):
+    import db_utils
+    db_path = os.path.join(tmp, 'eos_data.db')
+    shutil.copy(db_utils.DATABASE_PATH, db_path)
+    db_utils.DATABASE_PATH = db_path
+    db_utils._pool = db_utils.ConnectionPool(db_path)
+
+    conn = db_utils.get_db()
+    owners = [dict(row) for row in conn.execute(
+        "SELECT id, email, full_name FROM users WHERE is_active = 1 ORDER BY id LIMIT 3")]
+    conn.execute("UPDATE todos SET is_active = 0 WHERE division_id = 1")
+    for owner in owners:
+        for n in range(2):
+            conn.execute("""
+                INSERT INTO todos (task, owner, owner_user_id, division_id, priority, is_active, is_completed)
+                VALUES (?, ?, ?, 1, 'HIGH', 1, 0)
+            """, (f"Harness task {n}", owner['full_name'], owner['id']))
+    admin_email = conn.execute("""
+        SELECT u.email FROM users u
+        JOIN user_roles ur ON ur.user_id = u.id JOIN roles r ON r.id = ur.role_id
+        WHERE r.name = 'PARENT_ADMIN' AND ur.is_active = 1 AND u.is_active = 1
+    """).fetchone()['email']
+    conn.commit()
+    conn.close()
+
+    import app_multitenant
+    app = app_multitenant.app
+    app.config['TESTING'] = True
+    app.config['SESSION_COOKIE_SECURE'] = False
+    client = app.test_client()
+    headers = {'X-Auth-Email': admin_email, 'Accept': 'application/json'}
+
+    print("Notify route")
+    server.reset(refuse_mail=1, reject_rcpt={owners[0]['email']})
+    email_service._queue = email_service.EmailQueue(workers=2, retries=3, base_delay=0.05)
+    response = client.post('/division/1/todos/notify', headers=headers)
+    body = response.get_json() or {}
+    check("notify answers 202 with a job id", response.status_code == 202 and body.get('job_id'),
+          f"{response.status_code}")
+    job_id = body.get('job_id')
+
+    status = {}
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        status = client.get(f'/division/1/todos/notify/{job_id}', headers=headers).get_json() or {}
+        if status.get('status') == 'done':
+            break
+        time.sleep(0.05)
+    delivered = {address for _, address in server.messages}
+    check("job finishes", status.get('status') == 'done', status.get('status'))
+    check("total covers every owner", status.get('total') == body.get('total') and status.get('total', 0) >= 3)
+    check("sent matches what the server accepted", status.get('sent') == len(server.messages),
+          f"{status.get('sent')} vs {len(server.messages)}")
+    check("failed counts the rejected owner", status.get('failed') == 1 and owners[0]['email'] not in delivered,
+          f"{status.get('failed')} failed")
+    check("sent + failed == total", status.get('sent', 0) + status.get('failed', 0) == status.get('total'))
+    check("transient 451 was retried, not failed",
+          {o['email'] for o in owners[1:]} <= delivered)
+    check("unknown job id is a 404",
+          client.get('/division/1/todos/notify/nope', headers=headers).status_code == 404)
+    email_service._queue.shutdown()
+
+
+if __name__ == '__main__':
+    import email_service
+
+    server = DebugSMTPServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    email_service.SMTP_CONFIG.update({
+        'host': '127.0.0.1', 'port': server.server_address[1],
+        'user': 'harness', 'password': 'harness', 'use_tls': False,
+    })
+
+    print("=" * 70)
+    print(f"email queue harness (debugging SMTP server on 127.0.0.1:{server.server_address[1]})")
+    print("=" * 70)
+    try:
+        run_queue(server, email_service)
+        with tempfile.TemporaryDirectory() as tmp:
+            run_route(server, email_service, tmp)
+    finally:
+        server.shutdown()
+    print("=" * 70)
+    print(f"{sum(results)}/{len(results)} checks passed")
+    sys.exit(0 if all(results) else 1)
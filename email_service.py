@@ -8,11 +8,17 @@ Configure via environment variables:
   EOS_SMTP_PASS - SMTP password
   EOS_SMTP_FROM - From email address
   EOS_SMTP_TLS  - Use TLS (default: true)
+  EOS_SMTP_WORKERS - Concurrent SMTP sessions for queued sends (default: 3)
+  EOS_SMTP_RETRIES - Retries per message on transient failures (default: 3)
 """
 
 import os
+import time
+import uuid
 import smtplib
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
@@ -29,12 +35,44 @@ SMTP_CONFIG = {
     'use_tls': os.environ.get('EOS_SMTP_TLS', 'true').lower() == 'true',
 }
 
+# Background queue settings
+QUEUE_WORKERS = int(os.environ.get('EOS_SMTP_WORKERS', '3'))
+QUEUE_RETRIES = int(os.environ.get('EOS_SMTP_RETRIES', '3'))
+RETRY_BASE_DELAY = 1.0      # seconds, doubled on each retry
+JOB_RETENTION = 3600        # seconds a finished job stays pollable
+
 
 def is_email_configured():
     """Check if SMTP is configured"""
     return bool(SMTP_CONFIG['host'] and SMTP_CONFIG['user'])
 
 
+def build_message(to_email, subject, html_body, text_body=None):
+    """Build a multipart/alternative message"""
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = SMTP_CONFIG['from_email']
+    msg['To'] = to_email
+
+    if text_body:
+        msg.attach(MIMEText(text_body, 'plain'))
+    msg.attach(MIMEText(html_body, 'html'))
+    return msg
+
+
+def _open_smtp():
+    """Open an SMTP connection, upgrade to TLS and log in"""
+    server = smtplib.SMTP(SMTP_CONFIG['host'], SMTP_CONFIG['port'], timeout=10)
+    try:
+        if SMTP_CONFIG['use_tls']:
+            server.starttls()
+        server.login(SMTP_CONFIG['user'], SMTP_CONFIG['password'])
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
 def send_email(to_email, subject, html_body, text_body=None):
     """Send an email via SMTP. Returns (success, error_message)."""
     if not is_email_configured():
@@ -42,19 +80,9 @@ def send_email(to_email, subject, html_body, text_body=None):
         return False, "Email not configured. Set EOS_SMTP_HOST and EOS_SMTP_USER environment variables."
 
     try:
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = subject
-        msg['From'] = SMTP_CONFIG['from_email']
-        msg['To'] = to_email
-
-        if text_body:
-            msg.attach(MIMEText(text_body, 'plain'))
-        msg.attach(MIMEText(html_body, 'html'))
-
-        with smtplib.SMTP(SMTP_CONFIG['host'], SMTP_CONFIG['port'], timeout=10) as server:
-            if SMTP_CONFIG['use_tls']:
-                server.starttls()
-            server.login(SMTP_CONFIG['user'], SMTP_CONFIG['password'])
+        msg = build_message(to_email, subject, html_body, text_body)
+
+        with _open_smtp() as server:
             server.send_message(msg)
 
         logger.info("Email sent to %s: %s", to_email, subject)
@@ -190,3 +218,178 @@ def send_task_notification(to_email, recipient_name, tasks, division_name):
     html = build_task_email_html(tasks, recipient_name, division_name)
     text = build_task_text(tasks, recipient_name, division_name)
     return send_email(to_email, subject, html, text)
+
+
+def build_task_notification(to_email, recipient_name, tasks, division_name):
+    """Build a queued message dict for a task notification"""
+    return {
+        'to': to_email,
+        'label': recipient_name,
+        'subject': f"EOS: {len(tasks)} Task{'s' if len(tasks) != 1 else ''} Assigned - {division_name}",
+        'html': build_task_email_html(tasks, recipient_name, division_name),
+        'text': build_task_text(tasks, recipient_name, division_name),
+    }
+
+
+# =====================================================
+# BACKGROUND EMAIL QUEUE
+# =====================================================
+
+def _is_transient(error):
+    """Connection drops, timeouts and 4xx replies are worth retrying; 5xx are not"""
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    return isinstance(error, (smtplib.SMTPException, OSError))
+
+
+class EmailQueue:
+    """
+    Bounded worker pool that sends queued messages in the background.
+    Each worker keeps one authenticated SMTP session open and reuses it for
+    every message it sends, reconnecting only when the server drops it.
+    """
+
+    def __init__(self, workers=QUEUE_WORKERS, retries=QUEUE_RETRIES, base_delay=RETRY_BASE_DELAY):
+        self.workers = workers
+        self.retries = retries
+        self.base_delay = base_delay
+        self._executor = None
+        self._local = threading.local()
+        self._sessions = []
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='eos-email')
+            return self._executor
+
+    def _session(self):
+        """This worker's SMTP session, opened on first use"""
+        server = getattr(self._local, 'server', None)
+        if server is None:
+            server = _open_smtp()
+            self._local.server = server
+            with self._lock:
+                self._sessions.append(server)
+        return server
+
+    def _drop_session(self):
+        server = getattr(self._local, 'server', None)
+        self._local.server = None
+        if server is not None:
+            with self._lock:
+                if server in self._sessions:
+                    self._sessions.remove(server)
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _deliver(self, message):
+        """Send one message on this worker's session, retrying transient failures"""
+        delay = self.base_delay
+        for attempt in range(self.retries + 1):
+            try:
+                msg = build_message(message['to'], message['subject'], message['html'], message.get('text'))
+                self._session().send_message(msg)
+                logger.info("Email sent to %s: %s", message['to'], message['subject'])
+                return None
+            except Exception as e:
+                # The session state is unknown after any failure - start fresh
+                self._drop_session()
+                if attempt >= self.retries or not _is_transient(e):
+                    logger.error("Failed to send email to %s: %s", message['to'], str(e))
+                    return str(e)
+                logger.warning("Retrying email to %s in %.1fs (attempt %d): %s",
+                               message['to'], delay, attempt + 1, str(e))
+                time.sleep(delay)
+                delay *= 2
+
+    def _run(self, job_id, message):
+        with self._lock:
+            job = self._jobs[job_id]
+            job['status'] = 'running'
+
+        error = self._deliver(message)
+
+        with self._lock:
+            if error:
+                job['failed'] += 1
+                job['errors'].append(f"{message.get('label') or message['to']}: {error}")
+            else:
+                job['sent'] += 1
+            if job['sent'] + job['failed'] >= job['total']:
+                job['status'] = 'done'
+                job['finished_at'] = time.time()
+
+    def enqueue(self, messages, **meta):
+        """Queue messages for background delivery. Returns a job id to poll."""
+        job_id = uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'status': 'queued' if messages else 'done',
+            'total': len(messages),
+            'sent': 0,
+            'failed': 0,
+            'errors': [],
+            'created_at': time.time(),
+            'finished_at': None if messages else time.time(),
+        }
+        job.update(meta)
+
+        with self._lock:
+            self._prune()
+            self._jobs[job_id] = job
+
+        executor = self._get_executor()
+        for message in messages:
+            executor.submit(self._run, job_id, message)
+        return job_id
+
+    def get_job(self, job_id):
+        """Snapshot of a job's progress, or None if unknown/expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            snapshot = dict(job)
+            snapshot['errors'] = list(job['errors'])
+            return snapshot
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION
+        for job_id in [j for j, job in self._jobs.items()
+                       if job['finished_at'] and job['finished_at'] < cutoff]:
+            del self._jobs[job_id]
+
+    def shutdown(self, wait=True):
+        """Stop the workers and close their SMTP sessions"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for server in sessions:
+            try:
+                server.quit()
+            except Exception:
+                pass
+
+
+_queue = EmailQueue()
+
+
+def enqueue_emails(messages, **meta):
+    """Queue messages on the shared email queue. Returns a job id."""
+    return _queue.enqueue(messages, **meta)
+
+
+def get_email_job(job_id):
+    """Get progress for a queued email job"""
+    return _queue.get_job(job_id)
@@ -18,9 +18,14 @@ import os
 import subprocess
 import time
 import json
+import hashlib
+import shutil
+import tempfile
 from datetime import datetime
 from pathlib import Path
 
+from sync_generation import bump_generation
+
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
@@ -30,6 +35,7 @@ LOCAL_DIR = "/home/ubuntu/eosplatform/datasheets"
 STATE_FILE = "/home/ubuntu/eosplatform/.eos_sync_state.json"
 CHECK_INTERVAL = 60  # Check every 60 seconds
 LOG_FILE = "/home/ubuntu/eosplatform/eos_sync.log"
+HASH_TYPE = "md5"  # Google Drive stores MD5 for uploaded files; rclone computes it for local remotes
 
 # Expected files
 EXPECTED_FILES = [
@@ -72,10 +78,12 @@ def load_state():
     return {}
 
 def save_state(state):
-    """Save the sync state to file"""
+    """Save the sync state to file (temp file + rename, so a crash never leaves it truncated)"""
     try:
-        with open(STATE_FILE, 'w') as f:
+        tmp_path = f"{STATE_FILE}.tmp"
+        with open(tmp_path, 'w') as f:
             json.dump(state, f, indent=2)
+        os.replace(tmp_path, STATE_FILE)
     except Exception as e:
         log(f"Error saving state: {e}")
 
@@ -103,9 +111,10 @@ def verify_rclone():
         return False
 
 def get_gdrive_files():
-    """Get list of files in Google Drive folder with their modified times"""
+    """Get list of files in Google Drive folder with their sizes, modified times and content hashes"""
     try:
-        cmd = ['rclone', 'lsjson', f'{GDRIVE_REMOTE}{GDRIVE_FOLDER}']
+        cmd = ['rclone', 'lsjson', '--files-only', '--hash', '--hash-type', HASH_TYPE,
+               f'{GDRIVE_REMOTE}{GDRIVE_FOLDER}']
         result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
         
         if result.returncode != 0:
@@ -121,7 +130,8 @@ def get_gdrive_files():
             if name.endswith('.csv'):
                 file_info[name] = {
                     'size': file['Size'],
-                    'modified': file['ModTime']
+                    'modified': file['ModTime'],
+                    'hash': (file.get('Hashes') or {}).get(HASH_TYPE)
                 }
         
         return file_info
@@ -132,27 +142,112 @@ def get_gdrive_files():
         log(f"✗ Error getting Google Drive files: {e}")
         return {}
 
-def sync_file(filename):
-    """Sync a single file from Google Drive to local directory"""
+def _file_hash(path):
+    """Local content hash in the same format rclone reports"""
+    digest = hashlib.new(HASH_TYPE)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def needs_sync(filename, info, state):
+    """True if the remote file differs from what was last synced"""
+    previous = state.get(filename)
+    if previous is None:
+        return True
+    if not os.path.exists(os.path.join(LOCAL_DIR, filename)):
+        return True
+    if info.get('hash') and previous.get('hash'):
+        return info['hash'] != previous['hash']
+    # No hash from the remote (or a pre-hash state file): fall back to ModTime/Size
+    return (info['modified'], info['size']) != (previous.get('modified'), previous.get('size'))
+
+def sync_files(files):
+    """
+    Copy changed files from Google Drive with a single rclone invocation
+    files: {filename: info from get_gdrive_files()}
+    Files land in a staging directory next to LOCAL_DIR and are moved into
+    place with os.replace(), so the web app never reads a half-written CSV.
+    Returns the filenames that were synced.
+    """
+    if not files:
+        return []
+
+    # Same filesystem as LOCAL_DIR, so the final rename is atomic
+    staging = tempfile.mkdtemp(prefix='.eos_sync-', dir=os.path.dirname(os.path.abspath(LOCAL_DIR)))
+    synced = []
     try:
-        source = f'{GDRIVE_REMOTE}{GDRIVE_FOLDER}/{filename}'
-        dest = LOCAL_DIR
-        
-        cmd = ['rclone', 'copy', source, dest, '-v']
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-        
-        if result.returncode == 0:
+        list_path = os.path.join(staging, 'files-from.txt')
+        dest = os.path.join(staging, 'files')
+        with open(list_path, 'w') as f:
+            f.write('\n'.join(files) + '\n')
+
+        source = f'{GDRIVE_REMOTE}{GDRIVE_FOLDER}'
+        cmd = ['rclone', 'copy', '--files-from', list_path, '--no-traverse', source, dest, '-v']
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60 + 10 * len(files))
+            if result.returncode != 0:
+                log(f"✗ rclone copy reported errors: {result.stderr}")
+        except subprocess.TimeoutExpired:
+            log(f"✗ Timeout syncing {len(files)} file(s)")
+
+        # Move whatever arrived intact, even if rclone failed part-way
+        os.makedirs(LOCAL_DIR, exist_ok=True)
+        for filename, info in files.items():
+            staged = os.path.join(dest, filename)
+            if not os.path.isfile(staged):
+                log(f"✗ Failed to sync {filename}")
+                continue
+            if info.get('hash') and _file_hash(staged) != info['hash']:
+                log(f"✗ Failed to sync {filename}: content hash mismatch")
+                continue
+            os.replace(staged, os.path.join(LOCAL_DIR, filename))
             log(f"✓ Synced: {filename}")
-            return True
-        else:
-            log(f"✗ Failed to sync {filename}: {result.stderr}")
-            return False
-    except subprocess.TimeoutExpired:
-        log(f"✗ Timeout syncing {filename}")
-        return False
+            synced.append(filename)
     except Exception as e:
-        log(f"✗ Error syncing {filename}: {e}")
-        return False
+        log(f"✗ Error syncing files: {e}")
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return synced
+
+def ingest_financials():
+    """Store any new Site Lead Statements in the financial_snapshots table"""
+    try:
+        from db_utils import get_db
+        from financial_snapshots import ingest_statements
+        conn = get_db()
+        try:
+            count = ingest_statements(conn, LOCAL_DIR)
+        finally:
+            conn.close()
+        if count:
+            log(f"✓ Ingested {count} Site Lead statement(s)")
+    except Exception as e:
+        log(f"✗ Error ingesting Site Lead statements: {e}")
+
+def ingest_datasheets(filenames):
+    """Apply synced rocks/issues/todos/scorecard sheets to the database"""
+    try:
+        from db_utils import get_db
+        from sheet_ingest import ingest_sheets
+        conn = get_db()
+        try:
+            results = ingest_sheets(conn, [os.path.join(LOCAL_DIR, f) for f in filenames])
+        finally:
+            conn.close()
+        for table, counts in results.items():
+            log(f"✓ {table}: {counts['inserted']} added, {counts['updated']} updated, "
+                f"{counts['deleted']} removed, {counts['unchanged']} unchanged")
+    except Exception as e:
+        log(f"✗ Error ingesting sheets: {e}")
+
+def publish_generation(filenames):
+    """Tell the web app new data has landed (it watches the generation file)"""
+    try:
+        generation = bump_generation(filenames)
+        log(f"✓ Published sync generation {generation}")
+    except Exception as e:
+        log(f"✗ Error publishing sync generation: {e}")
 
 def check_for_updates():
     """Check for new or updated files and sync them"""
@@ -163,23 +258,30 @@ def check_for_updates():
         log("No files found in Google Drive (or error occurred)")
         return
     
-    updates_found = False
-    
+    changed = {}
+    state_dirty = False
     for filename, info in gdrive_files.items():
-        # Check if file is new or modified
-        if filename not in current_state:
-            log(f"New file detected: {filename}")
-            if sync_file(filename):
-                current_state[filename] = info
-                updates_found = True
-        elif info['modified'] != current_state[filename]['modified']:
-            log(f"File updated: {filename}")
-            if sync_file(filename):
-                current_state[filename] = info
-                updates_found = True
+        if needs_sync(filename, info, current_state):
+            if filename not in current_state:
+                log(f"New file detected: {filename}")
+            else:
+                log(f"File updated: {filename}")
+            changed[filename] = info
+        elif info != current_state[filename]:
+            # Same content, new ModTime (re-upload) - just remember it
+            current_state[filename] = info
+            state_dirty = True
+    
+    synced = sync_files(changed)
+    for filename in synced:
+        current_state[filename] = changed[filename]
     
-    if updates_found:
+    if synced or state_dirty:
         save_state(current_state)
+    if synced:
+        ingest_datasheets(synced)
+        ingest_financials()
+        publish_generation(synced)
         log("✓ Sync complete")
     
     # Check for missing expected files
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Test harness for eos_sync.py against a local filesystem "remote"
+Points eos_sync at temporary directories (rclone treats a plain path as a
+local remote, which reports MD5 hashes like Google Drive does) and checks:
+one rclone copy per cycle, hash-based change detection, resync of deleted
+local files, and that readers never see a partially written CSV.
+
+Requires rclone on PATH. Usage: python eos_sync_harness.py
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import eos_sync
+import sync_generation
+
+results = []
+copy_calls = []
+_real_run = subprocess.run
+
+
+def _counting_run(cmd, *args, **kwargs):
+    """subprocess.run that records each rclone copy invocation"""
+    if cmd[:2] == ['rclone', 'copy']:
+        copy_calls.append(cmd)
+    return _real_run(cmd, *args, **kwargs)
+
+
+def check(name, condition, detail=''):
+    results.append(condition)
+    print(f"  {'✓' if condition else '✗'} {name}{f' ({detail})' if detail and not condition else ''}")
+
+
+def write(path, content, mtime=None):
+    with open(path, 'w') as f:
+        f.write(content)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def cycle():
+    """Run one sync cycle, return the number of rclone copy calls it made"""
+    before = len(copy_calls)
+    eos_sync.check_for_updates()
+    return len(copy_calls) - before
+
+
+def run(tmp):
+    remote = os.path.join(tmp, 'remote')
+    local = os.path.join(tmp, 'eosplatform', 'datasheets')
+    os.makedirs(remote)
+    os.makedirs(local)
+
+    eos_sync.GDRIVE_REMOTE = ''
+    eos_sync.GDRIVE_FOLDER = remote
+    eos_sync.LOCAL_DIR = local
+    eos_sync.STATE_FILE = os.path.join(tmp, 'eosplatform', '.eos_sync_state.json')
+    eos_sync.LOG_FILE = os.path.join(tmp, 'eosplatform', 'eos_sync.log')
+    ingested = []
+    eos_sync.ingest_financials = lambda: ingested.append(time.time())
+    eos_sync.ingest_datasheets = lambda filenames: None
+    eos_sync.subprocess.run = _counting_run
+    sync_generation.GENERATION_FILE = os.path.join(tmp, 'eosplatform', '.eos_sync_generation')
+
+    print("Initial sync")
+    for name in ('rocks.csv', 'issues.csv', 'todos.csv'):
+        write(os.path.join(remote, name), f"id,title\n1,{name} v1\n")
+    write(os.path.join(remote, 'notes.txt'), "not a csv\n")
+    check("one rclone copy for three new files", cycle() == 1)
+    check("all CSVs copied", all(read(os.path.join(local, n)) == read(os.path.join(remote, n))
+                                 for n in ('rocks.csv', 'issues.csv', 'todos.csv')))
+    check("non-CSV files ignored", not os.path.exists(os.path.join(local, 'notes.txt')))
+    check("state records MD5 hashes", all(info.get('hash') for info in eos_sync.load_state().values()))
+    check("financials ingested after sync", len(ingested) == 1)
+    check("sync generation published", sync_generation.read_generation()['generation'] == 1)
+    check("staging directory cleaned up",
+          not [d for d in os.listdir(os.path.dirname(local)) if d.startswith('.eos_sync-')])
+
+    print("No changes")
+    check("no rclone copy when nothing changed", cycle() == 0)
+    check("no ingest when nothing changed", len(ingested) == 1)
+    check("generation unchanged when nothing changed", sync_generation.read_generation()['generation'] == 1)
+
+    print("Touched but identical")
+    os.utime(os.path.join(remote, 'rocks.csv'), (time.time() + 120, time.time() + 120))
+    check("new ModTime with same content is not copied", cycle() == 0)
+    check("second cycle still quiet", cycle() == 0)
+    check("generation unchanged for identical content", sync_generation.read_generation()['generation'] == 1)
+
+    print("Content change with same size and ModTime")
+    path = os.path.join(remote, 'issues.csv')
+    mtime = os.path.getmtime(path)
+    write(path, read(path).replace('v1', 'v2'), mtime=mtime)
+    check("hash change detected, one copy", cycle() == 1)
+    check("updated content in place", 'v2' in read(os.path.join(local, 'issues.csv')))
+
+    print("Deleted locally")
+    os.remove(os.path.join(local, 'todos.csv'))
+    check("missing local file is resynced", cycle() == 1 and os.path.exists(os.path.join(local, 'todos.csv')))
+
+    print("Several changes in one cycle")
+    for name in ('rocks.csv', 'issues.csv', 'todos.csv', 'vto.csv'):
+        write(os.path.join(remote, name), f"id,title\n1,{name} v3\n")
+    check("four changed files, one rclone copy", cycle() == 1)
+    check("all four updated", all('v3' in read(os.path.join(local, n))
+                                  for n in ('rocks.csv', 'issues.csv', 'todos.csv', 'vto.csv')))
+
+    print("Readers during sync")
+    versions = [("old," * 250_000) + "\n", ("new," * 250_000) + "\n"]
+    write(os.path.join(remote, 'scorecard.csv'), versions[0])
+    cycle()
+    torn = []
+    stop = threading.Event()
+
+    def reader():
+        target = os.path.join(local, 'scorecard.csv')
+        while not stop.is_set():
+            content = read(target)
+            if content not in versions:
+                torn.append(len(content))
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    try:
+        for i in range(6):
+            write(os.path.join(remote, 'scorecard.csv'), versions[(i + 1) % 2])
+            cycle()
+    finally:
+        stop.set()
+        thread.join()
+    check("readers only ever see a complete file", not torn, f"{len(torn)} partial reads")
+
+
+if __name__ == '__main__':
+    if shutil.which('rclone') is None:
+        print("rclone not found on PATH - install it to run this harness")
+        sys.exit(2)
+
+    print("=" * 70)
+    print("eos_sync harness (local filesystem remote)")
+    print("=" * 70)
+    with tempfile.TemporaryDirectory() as tmp:
+        run(tmp)
+    print("=" * 70)
+    print(f"{sum(results)}/{len(results)} checks passed")
+    sys.exit(0 if all(results) else 1)
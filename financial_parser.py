@@ -1,12 +1,16 @@
 """
 Financial Data Parser for EOS Platform
-Parses Site Lead Statement files to extract gross profit metrics
+Parses Site Lead Statement files (single statements or multi-statement P&L
+history dumps) into GL line records, and summarizes gross profit metrics
 """
 
 import os
 import re
+from datetime import datetime
 from pathlib import Path
 
+from datasheet_index import get_index
+
 DATASHEETS_DIR = Path(__file__).parent / 'datasheets'
 
 def parse_money(value):
@@ -26,86 +30,307 @@ def parse_money(value):
     except:
         return 0.0
 
-def _extract_numbers(line):
-    """Extract dollar amounts from a line using regex (handles thousands commas)"""
-    # Match patterns like: 76,134.30 or (2,198.50) or 0.00 or -1,234.56
-    matches = re.findall(r'[\(\-]?\d[\d,]*\.\d{2}\)?', line)
-    return [parse_money(m) for m in matches]
-
-def _is_data_line(line):
-    """Check if a line looks like numeric financial data"""
-    numbers = _extract_numbers(line)
-    return len(numbers) >= 4
-
-def _extract_values(lines, i, key, data):
-    """Extract 4 numeric values from the line after (or before) a label line"""
-    # Try next line first
-    if i + 1 < len(lines):
-        numbers = _extract_numbers(lines[i + 1])
-        if len(numbers) >= 4:
-            data[key]['month'] = numbers[0]
-            data[key]['ytd'] = numbers[1]
-            data[key]['py_month'] = numbers[2]
-            data[key]['py_ytd'] = numbers[3]
-            return True
-    # Try previous line (some statements have data before label)
-    if i - 1 >= 0:
-        numbers = _extract_numbers(lines[i - 1])
-        if len(numbers) >= 4:
-            data[key]['month'] = numbers[0]
-            data[key]['ytd'] = numbers[1]
-            data[key]['py_month'] = numbers[2]
-            data[key]['py_ytd'] = numbers[3]
-            return True
-    return False
+# ============================================================================
+# STREAMING STATEMENT PARSER
+# ============================================================================
+# Statement layout, as exported by accounting:
+#   Steensma Lawn & Power Equip.                      <- company
+#   KAZOO SITE LEAD STATEMENT                         <- title
+#   For the Month and ... Ending February 28, 2026    <- period
+#   Feb 2026,Feb 2026 (YTD),Feb 2025,Feb 2025 (YTD)   <- columns
+#   GROSS PROFIT / SALES                              <- section headings (label, no values)
+#   NEW EQUIPMENT SALES / 160,147.43,379,573.64,...   <- values usually on the next line,
+#   0.00,31,895.99,... / PAYROLL SERVICE TECHS        <- but sometimes on the line before
+#   Total GROSS PROFIT,124,455.80,...                 <- or inline
+#   1 / of / 2/14/2026 4:31 AM, Page,1,1              <- page footer
+# Multi-statement dumps repeat that block; a page whose header matches the
+# open statement continues it.
 
-def find_site_lead_file(division_name=None):
-    """Find the Site Lead Statement text file for a specific division"""
-    if not DATASHEETS_DIR.exists():
-        return None
+AMOUNT_RE = re.compile(r'(\()?(-)?\$?(\d[\d,]*\.\d{2})\)?')
+LETTER_RE = re.compile(r'[A-Za-z]')
+PERIOD_RE = re.compile(r'Ending\s+([A-Za-z]+)\s+\d{1,2},\s*(\d{4})')
+COLUMNS_RE = re.compile(r'\(YTD\)', re.IGNORECASE)
+PAGE_END_RE = re.compile(r',\s*Page,', re.IGNORECASE)
+PAGE_NUMBER_RE = re.compile(r'^(?:\d+|of)$', re.IGNORECASE)
 
-    txt_files = [
-        DATASHEETS_DIR / f
-        for f in os.listdir(DATASHEETS_DIR)
-        if f.lower().endswith('.txt')
-    ]
+VALUE_COLUMNS = ['month', 'ytd', 'py_month', 'py_ytd']
+MONTH_NUMBERS = {datetime(2000, m, 1).strftime('%b').lower(): m for m in range(1, 13)}
 
-    if not txt_files:
+def _statement_period(line):
+    """Statement month as 'YYYY-MM' from an 'Ending February 28, 2026' header line"""
+    match = PERIOD_RE.search(line)
+    if not match:
+        return None
+    month = MONTH_NUMBERS.get(match.group(1)[:3].lower())
+    if month is None:
         return None
+    return f"{match.group(2)}-{month:02d}"
 
-    # Division-specific file matching - collect all matches, return newest
-    if division_name:
-        name_lower = division_name.lower()
-        matches = []
-        for path in txt_files:
-            fname = path.name.lower()
-            if name_lower == 'kalamazoo' and ('kz ' in fname or 'kazoo' in fname) and 'site lead' in fname:
-                matches.append(path)
-            elif name_lower == 'generator' and 'gen ' in fname and 'site lead' in fname:
-                matches.append(path)
-            elif name_lower == 'plainwell':
-                if 'site lead' in fname and 'kz' not in fname and 'gen' not in fname:
-                    matches.append(path)
-        if matches:
-            # Return the most recently modified matching file
-            matches.sort(key=os.path.getmtime, reverse=True)
-            return str(matches[0])
-
-    # Fallback: sort by modification time (most recent first)
-    txt_files_sorted = sorted(txt_files, key=os.path.getmtime, reverse=True)
-
-    # Check first few files for Site Lead content
-    for path in txt_files_sorted[:5]:
+class StatementParser:
+    """
+    Line-at-a-time state machine over Site Lead Statement text
+    feed() each line; it returns a statement record whenever one is complete,
+    and close() returns the last one. Each record holds the header fields and
+    every GL line as {account, sections, is_total, month, ytd, py_month, py_ytd}.
+    """
+
+    def __init__(self):
+        self._statement = None
+        self._in_header = True
+        self._header = self._empty_header()
+        self._sections = []   # open section headings, outermost first
+        self._path = ()       # tuple(self._sections), shared by the lines emitted under it
+        self._pending = None  # (label, unclaimed values from the line before it)
+        self._prev = None     # unclaimed values from the previous line
+
+    @staticmethod
+    def _empty_header():
+        return {'company': None, 'title': None, 'period': None, 'columns': None}
+
+    def feed(self, line):
+        """Consume one line, return a finished statement record or None"""
+        line = line.strip()
+        if not line or (len(line) <= 3 and PAGE_NUMBER_RE.match(line)):
+            return None
+        if 'Page' in line and PAGE_END_RE.search(line):
+            self._end_page()
+            return None
+
+        finished = None
+        if self._in_header:
+            if self._header_line(line):
+                if self._header['columns'] is not None:
+                    finished = self._start_body()
+                return finished
+            finished = self._start_body()
+
+        # Every amount has cents, so a line without '.' is a label
+        found = AMOUNT_RE.findall(line) if '.' in line else None
+        if not found:
+            # Label: wait for the next line to see whether the values follow it
+            self._resolve_pending()
+            self._pending = (line.rstrip(' ,'), self._prev)
+            self._prev = None
+        elif LETTER_RE.search(line) is None:
+            if self._pending is not None:
+                label, before = self._pending
+                self._pending = None
+                if before is not None:
+                    self._statement['unlabeled'] += 1
+                self._emit(label, found)
+            else:
+                if self._prev is not None:
+                    self._statement['unlabeled'] += 1
+                self._prev = found
+        else:
+            # Label and values on one line
+            self._resolve_pending()
+            self._drop_prev()
+            self._emit(line[:AMOUNT_RE.search(line).start()].rstrip(' ,'), found)
+        return finished
+
+    def close(self):
+        """Finish input, return the last statement record or None"""
+        self._end_page()
+        statement, self._statement = self._statement, None
+        return statement
+
+    def _header_line(self, line):
+        """Record a header field, False once the line isn't one"""
+        header = self._header
+        if AMOUNT_RE.search(line):
+            return False
+        if COLUMNS_RE.search(line):
+            header['columns'] = [col.strip() for col in line.split(',')]
+        elif PERIOD_RE.search(line) or line.lower().startswith('for the'):
+            header['period'] = _statement_period(line)
+        elif 'statement' in line.lower():
+            header['title'] = line
+        elif header['company'] is None and header['title'] is None:
+            header['company'] = line
+        else:
+            return False
+        return True
+
+    def _start_body(self):
+        """Open a statement for the body that follows, returning any it replaces"""
+        header = self._header
+        self._in_header = False
+        self._header = self._empty_header()
+
+        current = self._statement
+        if current is not None and (header['title'] is None or
+                                    (header['title'], header['period']) == (current['title'], current['period'])):
+            return None  # next page of the same statement
+
+        self._statement = {**header, 'lines': [], 'unlabeled': 0}
+        self._sections = []
+        self._path = ()
+        return current
+
+    def _end_page(self):
+        """Resolve anything pending at a page footer or end of input"""
+        if self._statement is not None:
+            self._resolve_pending()
+            self._drop_prev()
+        self._in_header = True
+
+    def _resolve_pending(self):
+        """Settle the pending label: values from the line before it, else a section heading"""
+        if self._pending is None:
+            return
+        label, before = self._pending
+        self._pending = None
+        if before is not None:
+            self._emit(label, before)
+        elif label.upper().startswith('TOTAL '):
+            self._close_section(label)
+        else:
+            self._sections.append(label)
+            self._path = tuple(self._sections)
+
+    def _drop_prev(self):
+        if self._prev is not None:
+            self._statement['unlabeled'] += 1
+            self._prev = None
+
+    def _close_section(self, total_label):
+        """'Total SALES' closes the SALES heading and anything opened inside it"""
+        name = total_label[6:].strip().upper()
+        for i in range(len(self._sections) - 1, -1, -1):
+            if self._sections[i].upper() == name:
+                del self._sections[i:]
+                self._path = tuple(self._sections)
+                return
+
+    def _emit(self, label, found):
+        """Record a GL line from AMOUNT_RE.findall() matches"""
+        values = [0.0, 0.0, 0.0, 0.0]
+        for i, (paren, minus, digits) in enumerate(found[:4]):
+            value = float(digits.replace(',', ''))
+            values[i] = -value if paren or minus else value
+        is_total = label[:6].upper() == 'TOTAL '
+        self._statement['lines'].append({
+            'account': label,
+            'sections': self._path,
+            'is_total': is_total,
+            'month': values[0],
+            'ytd': values[1],
+            'py_month': values[2],
+            'py_ytd': values[3]
+        })
+        if is_total:
+            self._close_section(label)
+
+def iter_statements(lines):
+    """Yield statement records from an iterable of lines (e.g. an open file)"""
+    parser = StatementParser()
+    for line in lines:
+        statement = parser.feed(line)
+        if statement is not None:
+            yield statement
+    statement = parser.close()
+    if statement is not None:
+        yield statement
+
+def parse_statement_file(filepath):
+    """Every statement in a statement text file or multi-statement dump"""
+    with open(filepath, 'r') as f:
+        return list(iter_statements(f))
+
+# Dashboard categories: (key, predicate on the uppercased account), matched
+# within GROSS PROFIT but outside COST OF GOODS SOLD; later lines win
+SUMMARY_ACCOUNTS = [
+    ('new_equipment', lambda account: 'NEW EQUIPMENT SALES' in account),
+    ('parts', lambda account: account.startswith('PARTS SALES')),
+    ('labor', lambda account: 'SERVICE LABOR SALES' in account),
+]
+
+def _summarize(statement, data):
+    """Fill the four dashboard categories from a statement's GL lines"""
+    in_scope = {}  # section path -> within GROSS PROFIT and outside COST OF GOODS SOLD
+    for item in statement['lines']:
+        if 'Total GROSS PROFIT' in item['account']:
+            data['gross_profit'] = {col: item[col] for col in VALUE_COLUMNS}
+            continue
+        path = item['sections']
+        if path not in in_scope:
+            sections = [s.upper() for s in path]
+            in_scope[path] = 'GROSS PROFIT' in sections and 'COST OF GOODS SOLD' not in sections
+        if not in_scope[path]:
+            continue
+        account = item['account'].upper()
+        for key, matches in SUMMARY_ACCOUNTS:
+            if matches(account):
+                data[key] = {col: item[col] for col in VALUE_COLUMNS}
+                break
+
+def _matches_division(fname, name_lower):
+    """Division-specific Site Lead filename rules"""
+    if not fname.endswith('.txt'):
+        return False
+    if name_lower == 'kalamazoo':
+        return ('kz ' in fname or 'kazoo' in fname) and 'site lead' in fname
+    if name_lower == 'generator':
+        return 'gen ' in fname and 'site lead' in fname
+    if name_lower == 'plainwell':
+        return 'site lead' in fname and 'kz' not in fname and 'gen' not in fname
+    return False
+
+def _find_site_lead_by_content(entries):
+    """Check the newest few .txt files for Site Lead content"""
+    txt_files = [path for name, path, _, _ in entries if name.lower().endswith('.txt')]
+    for path in txt_files[:5]:
         try:
             with open(path, 'r') as f:
                 head = ''.join([next(f) for _ in range(3)])
             if 'Site lead Statement' in head or 'Site Lead' in head:
-                return str(path)
+                return path
         except Exception:
             continue
-
     return None
 
+def find_site_lead_file(division_name=None):
+    """Find the Site Lead Statement text file for a specific division"""
+    index = get_index(DATASHEETS_DIR)
+
+    # Division-specific file matching - newest match wins
+    if division_name:
+        name_lower = division_name.lower()
+        match = index.find(('site_lead', name_lower), lambda fname: _matches_division(fname, name_lower))
+        if match:
+            return match
+
+    # Fallback: first recent .txt file that looks like a Site Lead Statement
+    return index.memoize(('site_lead_content',), _find_site_lead_by_content)
+
+def _empty_summary():
+    return {
+        'new_equipment': {'month': 0.0, 'ytd': 0.0, 'py_month': 0.0, 'py_ytd': 0.0},
+        'parts': {'month': 0.0, 'ytd': 0.0, 'py_month': 0.0, 'py_ytd': 0.0},
+        'labor': {'month': 0.0, 'ytd': 0.0, 'py_month': 0.0, 'py_ytd': 0.0},
+        'gross_profit': {'month': 0.0, 'ytd': 0.0, 'py_month': 0.0, 'py_ytd': 0.0},
+    }
+
+def parse_site_lead_history(filepath):
+    """
+    Summarize every statement in a file, one dict per statement period
+    Same shape as parse_site_lead_statement(); returns None if the file can't be read.
+    """
+    try:
+        statements = parse_statement_file(filepath)
+    except Exception as e:
+        print(f"Error parsing site lead statement {filepath}: {e}")
+        return None
+
+    history = []
+    for statement in statements:
+        data = _empty_summary()
+        data['period'] = statement['period']
+        _summarize(statement, data)
+        history.append(data)
+    return history
+
 def parse_site_lead_statement(filepath=None, division_name=None):
     """
     Parse Site Lead Statement file to extract gross profit data
@@ -124,8 +349,7 @@ def parse_site_lead_statement(filepath=None, division_name=None):
         }
 
     try:
-        with open(filepath, 'r') as f:
-            lines = [line.strip() for line in f.readlines()]
+        statements = parse_statement_file(filepath)
 
         data = {
             'new_equipment': {'month': 0.0, 'ytd': 0.0, 'py_month': 0.0, 'py_ytd': 0.0},
@@ -133,45 +357,11 @@ def parse_site_lead_statement(filepath=None, division_name=None):
             'labor': {'month': 0.0, 'ytd': 0.0, 'py_month': 0.0, 'py_ytd': 0.0},
             'gross_profit': {'month': 0.0, 'ytd': 0.0, 'py_month': 0.0, 'py_ytd': 0.0},
             'file_date': os.path.getmtime(filepath),
-            'file_name': os.path.basename(filepath)
+            'file_name': os.path.basename(filepath),
+            'period': statements[0]['period'] if statements else None
         }
-
-        # State tracking
-        in_gross_profit = False
-
-        for i, line in enumerate(lines):
-            # Start of GROSS PROFIT section
-            if line.upper() == 'GROSS PROFIT':
-                in_gross_profit = True
-                continue
-
-            # End of GROSS PROFIT section (when we hit COST OF GOODS SOLD)
-            if 'COST OF GOODS SOLD' in line.upper():
-                in_gross_profit = False
-                continue
-
-            if in_gross_profit:
-                upper = line.upper()
-                # NEW EQUIPMENT SALES line
-                if 'NEW EQUIPMENT SALES' in upper:
-                    _extract_values(lines, i, 'new_equipment', data)
-
-                # PARTS SALES line (but not SERVICE PARTS SALES)
-                elif upper.strip() == 'PARTS SALES' or upper.startswith('PARTS SALES'):
-                    _extract_values(lines, i, 'parts', data)
-
-                # SERVICE LABOR SALES line
-                elif 'SERVICE LABOR SALES' in upper:
-                    _extract_values(lines, i, 'labor', data)
-
-            # Look for Total GROSS PROFIT line (after COST OF GOODS SOLD section)
-            if 'Total GROSS PROFIT' in line:
-                numbers = _extract_numbers(line)
-                if len(numbers) >= 4:
-                    data['gross_profit']['month'] = numbers[0]
-                    data['gross_profit']['ytd'] = numbers[1]
-                    data['gross_profit']['py_month'] = numbers[2]
-                    data['gross_profit']['py_ytd'] = numbers[3]
+        if statements:
+            _summarize(statements[0], data)
 
         return data
 
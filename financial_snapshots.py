@@ -0,0 +1,232 @@
+"""
+EOS Platform - Financial Snapshots
+Site Lead Statement values parsed once per file and stored in the
+financial_snapshots table, so the corporate rollup and division scorecards
+read a row per division instead of scanning and parsing datasheets/ per view.
+
+Usage: python financial_snapshots.py [workers]   (backfill every statement, in parallel)
+"""
+
+import os
+import sqlite3
+import threading
+
+from datasheet_index import get_index
+from financial_parser import (
+    DATASHEETS_DIR, parse_site_lead_history, _matches_division
+)
+
+CATEGORIES = ['new_equipment', 'parts', 'labor', 'gross_profit']
+PERIODS = ['month', 'ytd', 'py_month', 'py_ytd']
+VALUE_COLUMNS = [f'{cat}_{period}' for cat in CATEGORIES for period in PERIODS]
+
+
+def install_financial_snapshots(conn):
+    """Create the financial_snapshots table and its lookup index"""
+    columns = ',\n'.join(f'            {col} REAL NOT NULL DEFAULT 0' for col in VALUE_COLUMNS)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS financial_snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            division_id INTEGER NOT NULL,
+            file_name TEXT NOT NULL,
+            period TEXT,
+            file_mtime REAL NOT NULL,
+            file_size INTEGER NOT NULL,
+{columns},
+            ingested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (division_id, file_name, period),
+            FOREIGN KEY (division_id) REFERENCES divisions(id)
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_financial_snapshots_latest
+        ON financial_snapshots(division_id, file_mtime)
+    """)
+
+
+def empty_snapshot():
+    """Zeroed snapshot, same shape as parse_site_lead_statement() output"""
+    data = {cat: dict.fromkeys(PERIODS, 0.0) for cat in CATEGORIES}
+    data['file_date'] = None
+    return data
+
+
+def _row_to_snapshot(row):
+    """financial_snapshots row -> parse_site_lead_statement()-shaped dict"""
+    data = {cat: {period: row[f'{cat}_{period}'] for period in PERIODS} for cat in CATEGORIES}
+    data['file_date'] = row['file_mtime']
+    data['file_name'] = row['file_name']
+    data['period'] = row['period']
+    return data
+
+
+def _statement_files(entries, division_name):
+    """
+    Every Site Lead file named for a division, newest first
+    Unlike find_site_lead_file() there is no content-based fallback: that
+    returns another division's statement, and storing it under this division
+    would count its figures twice in the corporate totals. A division with
+    no file of its own has no snapshots and reads as zeros.
+    """
+    name_lower = division_name.lower()
+    return [(path, mtime, size) for name, path, mtime, size in entries
+            if _matches_division(name.lower(), name_lower)]
+
+
+def ingest_statements(conn, directory=DATASHEETS_DIR, parse_map=map):
+    """
+    Parse statements that are new or changed since they were last stored
+    Every statement period in a file gets its own row. parse_map lets a
+    backfill spread the parsing over worker processes; the writes happen
+    afterwards in one transaction. Returns the number of files parsed.
+    """
+    entries = get_index(directory).files()
+    install_financial_snapshots(conn)
+    conn.commit()
+    known = {
+        (row[0], row[1]): (row[2], row[3])
+        for row in conn.execute(
+            "SELECT division_id, file_name, file_mtime, file_size FROM financial_snapshots"
+        )
+    }
+    divisions = conn.execute("SELECT id, name FROM divisions WHERE is_active = 1").fetchall()
+
+    # Rows stored from the old content fallback: a file that doesn't name its division
+    names = dict(divisions)
+    misattached = [(division_id, file_name) for division_id, file_name in known
+                   if division_id in names and not _matches_division(file_name.lower(), names[division_id].lower())]
+    if misattached:
+        conn.executemany(
+            "DELETE FROM financial_snapshots WHERE division_id = ? AND file_name = ?", misattached
+        )
+        conn.commit()
+
+    # Collect the work first so all files can be parsed in one batch
+    pending = []
+    for division_id, division_name in divisions:
+        # Oldest first, so on an mtime tie the newest-listed file gets the
+        # higher id and wins in get_latest_snapshots(), as in find_site_lead_file()
+        for path, mtime, size in reversed(_statement_files(entries, division_name)):
+            file_name = os.path.basename(path)
+            if known.get((division_id, file_name)) != (mtime, size):
+                pending.append((division_id, path, file_name, mtime, size))
+    if not pending:
+        return 0
+
+    paths = list(dict.fromkeys(path for _, path, _, _, _ in pending))
+    parsed = dict(zip(paths, parse_map(parse_site_lead_history, paths)))
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rows = []
+        for division_id, path, file_name, mtime, size in pending:
+            history = parsed[path]
+            if history is None:
+                continue
+            conn.execute(
+                "DELETE FROM financial_snapshots WHERE division_id = ? AND file_name = ?",
+                (division_id, file_name)
+            )
+            # A repeated period within one file: the later statement wins
+            by_period = {data['period']: data for data in history}
+            for period, data in by_period.items():
+                rows.append((division_id, file_name, period, mtime, size,
+                             *(data[cat][p] for cat in CATEGORIES for p in PERIODS)))
+
+        conn.executemany(f"""
+            INSERT INTO financial_snapshots
+                (division_id, file_name, period, file_mtime, file_size, {', '.join(VALUE_COLUMNS)})
+            VALUES (?, ?, ?, ?, ?, {', '.join('?' * len(VALUE_COLUMNS))})
+        """, rows)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(paths)
+
+
+def backfill_statements(conn, directory=DATASHEETS_DIR, workers=None):
+    """Ingest every statement in the folder, parsing files in parallel across cores"""
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return ingest_statements(
+            conn, directory,
+            parse_map=lambda func, paths: executor.map(func, paths, chunksize=8)
+        )
+
+
+_ingested_signature = None
+_ingest_lock = threading.Lock()
+
+
+def refresh_financial_snapshots(directory=DATASHEETS_DIR):
+    """
+    Ingest statements if the datasheets folder changed since the last check
+    Costs one directory stat per call while nothing changes.
+    """
+    global _ingested_signature
+    signature = tuple(
+        (name, mtime, size) for name, _, mtime, size in get_index(directory).files()
+        if name.lower().endswith('.txt')
+    )
+    if signature == _ingested_signature:
+        return 0
+
+    from db_utils import get_db
+    with _ingest_lock:
+        if signature == _ingested_signature:
+            return 0
+        conn = get_db()
+        try:
+            count = ingest_statements(conn, directory)
+        finally:
+            conn.close()
+        _ingested_signature = signature
+        return count
+
+
+def get_latest_snapshots(conn, division_ids):
+    """
+    Newest stored statement per division in one query
+    Returns {division_id: snapshot}; divisions without a statement get zeros.
+    """
+    division_ids = list(division_ids)
+    snapshots = {division_id: empty_snapshot() for division_id in division_ids}
+    if not division_ids:
+        return snapshots
+
+    placeholders = ','.join('?' * len(division_ids))
+    try:
+        rows = conn.execute(f"""
+            SELECT * FROM (
+                SELECT fs.*, ROW_NUMBER() OVER (
+                    PARTITION BY division_id ORDER BY file_mtime DESC, period DESC, id DESC
+                ) AS rn
+                FROM financial_snapshots fs
+                WHERE division_id IN ({placeholders})
+            )
+            WHERE rn = 1
+        """, division_ids).fetchall()
+    except sqlite3.OperationalError:
+        # Nothing ingested yet
+        return snapshots
+
+    for row in rows:
+        snapshots[row['division_id']] = _row_to_snapshot(row)
+    return snapshots
+
+
+def get_latest_snapshot(conn, division_id):
+    """Newest stored statement for one division"""
+    return get_latest_snapshots(conn, [division_id])[division_id]
+
+
+if __name__ == '__main__':
+    import sys
+    from db_utils import get_db
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    conn = get_db()
+    try:
+        print(f"Ingested {backfill_statements(conn, workers=workers)} statement file(s)")
+    finally:
+        conn.close()
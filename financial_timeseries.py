@@ -0,0 +1,168 @@
+"""
+EOS Platform - Financial Time Series
+Monthly series per division and category built from every stored Site Lead
+statement (financial_snapshots), held as NumPy columns so trend figures -
+month-over-month, YTD vs prior year, rolling averages - are computed as
+array operations instead of per-request Python loops.
+"""
+
+import threading
+
+import numpy as np
+
+from financial_snapshots import CATEGORIES, PERIODS, VALUE_COLUMNS
+
+
+class FinancialSeries:
+    """
+    Aligned monthly columns for a set of divisions
+    periods: datetime64[M] array covering first..last month with no gaps
+    values:  float64 array shaped (division, category, measure, period);
+             NaN where a division has no statement for that month
+    """
+
+    def __init__(self, division_names, periods, values):
+        self.division_names = division_names
+        self.periods = periods
+        self.values = values
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from (division_name, period 'YYYY-MM', *VALUE_COLUMNS) rows"""
+        division_names = sorted({row[0] for row in rows})
+        if not rows:
+            return cls([], np.array([], dtype='datetime64[M]'),
+                       np.empty((0, len(CATEGORIES), len(PERIODS), 0)))
+
+        months = np.array([row[1] for row in rows], dtype='datetime64[M]')
+        start, end = months.min(), months.max()
+        periods = np.arange(start, end + 1, dtype='datetime64[M]')
+
+        division_index = {name: i for i, name in enumerate(division_names)}
+        div = np.array([division_index[row[0]] for row in rows])
+        col = (months - start).astype(int)
+        data = np.array([row[2:] for row in rows], dtype=float).reshape(
+            len(rows), len(CATEGORIES), len(PERIODS)
+        )
+
+        values = np.full((len(division_names), len(CATEGORIES), len(PERIODS), len(periods)), np.nan)
+        values[div, :, :, col] = data
+        return cls(division_names, periods, values)
+
+    def window(self, months):
+        """Series trimmed to the last `months` months"""
+        if not months or months >= len(self.periods):
+            return self
+        return FinancialSeries(self.division_names, self.periods[-months:], self.values[..., -months:])
+
+    def total(self):
+        """Measures summed across divisions; NaN only where no division reported"""
+        reported = ~np.isnan(self.values).all(axis=0)
+        return np.where(reported, np.nansum(self.values, axis=0), np.nan)
+
+
+def _pct_change(current, base):
+    """(current - base) / |base|, NaN where base is zero or missing"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(base != 0, (current - base) / np.abs(base), np.nan)
+
+
+def _rolling_mean(values, window):
+    """Trailing mean over `window` months along the last axis, NaN until the window fills"""
+    result = np.full(values.shape, np.nan)
+    if window <= values.shape[-1]:
+        windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=-1)
+        result[..., window - 1:] = windows.mean(axis=-1)
+    return result
+
+
+def trend_measures(category_values, window=3):
+    """
+    Trend figures for (..., measure, period) arrays of one category
+    Returns {name: array shaped (..., period)}.
+    """
+    month = category_values[..., PERIODS.index('month'), :]
+    ytd = category_values[..., PERIODS.index('ytd'), :]
+    py_month = category_values[..., PERIODS.index('py_month'), :]
+    py_ytd = category_values[..., PERIODS.index('py_ytd'), :]
+
+    previous = np.full(month.shape, np.nan)
+    previous[..., 1:] = month[..., :-1]
+
+    return {
+        'month': month,
+        'mom_change': month - previous,
+        'mom_pct': _pct_change(month, previous),
+        'py_month': py_month,
+        'yoy_month_pct': _pct_change(month, py_month),
+        'ytd': ytd,
+        'py_ytd': py_ytd,
+        'ytd_vs_py': ytd - py_ytd,
+        'ytd_vs_py_pct': _pct_change(ytd, py_ytd),
+        'rolling_avg': _rolling_mean(month, window),
+    }
+
+
+def _to_json(array):
+    """Rounded floats with None for missing months"""
+    return [None if np.isnan(v) else round(float(v), 4) for v in array]
+
+
+def get_trends(series, category='gross_profit', window=3, months=None):
+    """Trend report for one category across divisions plus the combined total"""
+    series = series.window(months)
+    cat = CATEGORIES.index(category)
+
+    by_division = trend_measures(series.values[:, cat], window)
+    total = trend_measures(series.total()[cat], window)
+
+    return {
+        'category': category,
+        'window': window,
+        'periods': [str(p) for p in series.periods],
+        'divisions': {
+            name: {measure: _to_json(values[i]) for measure, values in by_division.items()}
+            for i, name in enumerate(series.division_names)
+        },
+        'total': {measure: _to_json(values) for measure, values in total.items()},
+    }
+
+
+# ============================================================================
+# CACHED SERIES
+# ============================================================================
+
+_series = None
+_series_version = None
+_series_lock = threading.Lock()
+
+
+def load_series(conn):
+    """
+    Series over every stored statement, rebuilt only when financial_snapshots changes
+    Where several files cover the same division and month, the newest file wins.
+    """
+    global _series, _series_version
+    version = tuple(conn.execute(
+        "SELECT COUNT(*), MAX(id), MAX(ingested_at) FROM financial_snapshots"
+    ).fetchone())
+
+    with _series_lock:
+        if _series is not None and version == _series_version:
+            return _series
+
+        rows = conn.execute(f"""
+            SELECT division_name, period, {', '.join(VALUE_COLUMNS)} FROM (
+                SELECT d.name AS division_name, fs.*, ROW_NUMBER() OVER (
+                    PARTITION BY fs.division_id, fs.period ORDER BY fs.file_mtime DESC, fs.id DESC
+                ) AS rn
+                FROM financial_snapshots fs
+                JOIN divisions d ON d.id = fs.division_id
+                WHERE fs.period IS NOT NULL
+            )
+            WHERE rn = 1
+        """).fetchall()
+
+        _series = FinancialSeries.from_rows([tuple(row) for row in rows])
+        _series_version = version
+        return _series
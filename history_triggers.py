@@ -0,0 +1,178 @@
+"""
+EOS Platform - History Triggers
+AFTER UPDATE triggers that write the field-level *_history rows for rocks,
+issues and the V/TO tables. The old and new values come from the UPDATE
+itself, so callers no longer SELECT the old row first or insert history rows
+from Python: changing a field and recording it is one statement.
+
+One trigger per tracked column (AFTER UPDATE OF <column> ... WHEN the value
+actually changed), so statements that don't touch a tracked column pay
+nothing. changed_by is taken from the row's updated_by - every UPDATE of a
+tracked column must set updated_by, or the change is attributed to whoever
+edited the row last.
+
+The web apps install them from a before_request hook
+(install_on_first_request), so gunicorn workers - which import the app and
+never run its __main__ block - install them too, while scripts and
+pdf_jobs' spawned workers that merely import the app never touch the schema.
+"""
+
+import threading
+import time
+
+# Base table -> (history table, record id column, tracked columns)
+TRACKED_TABLES = {
+    'rocks': ('rocks_history', 'rock_id', (
+        'description', 'owner', 'owner_user_id', 'status', 'due_date', 'progress',
+        'quarter', 'year', 'priority', 'division_id', 'is_active',
+    )),
+    'issues': ('issues_history', 'issue_id', (
+        'issue', 'category', 'priority', 'owner', 'owner_name', 'owner_user_id', 'status',
+        'ids_stage', 'discussion_notes', 'solution', 'division_id', 'is_active',
+    )),
+    'vto_core_values': ('vto_core_values_history', 'core_value_id', (
+        'value_text', 'sort_order',
+    )),
+    'vto_core_focus': ('vto_core_focus_history', 'core_focus_id', (
+        'passion', 'niche', 'cash_flow_driver',
+    )),
+    'vto_core_target': ('vto_core_target_history', 'core_target_id', (
+        'target_text', 'target_date',
+    )),
+    'vto_marketing_strategy': ('vto_marketing_strategy_history', 'marketing_strategy_id', (
+        'uniques', 'guarantee', 'proven_process', 'target_market',
+    )),
+    'vto_three_year_picture': ('vto_three_year_picture_history', 'three_year_picture_id', (
+        'future_date', 'revenue', 'profit', 'measurables', 'what_does_it_look_like',
+    )),
+    'vto_one_year_plan': ('vto_one_year_plan_history', 'one_year_plan_id', (
+        'future_date', 'revenue', 'profit', 'measurables', 'goals',
+    )),
+}
+
+_installed = False
+
+# Seconds before the request hook retries an install that failed
+INSTALL_RETRY_INTERVAL = 60
+
+
+def _trigger_name(table, column):
+    return f"trg_{table}_history_{column}"
+
+
+def _existing_columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def expected_triggers(conn):
+    """Trigger names for the tracked tables and columns present in this database"""
+    names = set()
+    for table, (history_table, _, columns) in TRACKED_TABLES.items():
+        present = _existing_columns(conn, table)
+        if not present or not _existing_columns(conn, history_table):
+            continue
+        names.update(_trigger_name(table, column) for column in columns if column in present)
+    return names
+
+
+def install_history_triggers(conn):
+    """
+    (Re)create the history triggers; returns how many were installed
+    Tables or columns missing from this database are skipped. Any earlier
+    trg_*_history_* trigger is dropped first, so a change to TRACKED_TABLES
+    takes effect on the next install.
+    """
+    for (name,) in conn.execute("""
+        SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg\\_%\\_history\\_%' ESCAPE '\\'
+    """).fetchall():
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+    installed = 0
+    for table, (history_table, record_column, columns) in TRACKED_TABLES.items():
+        present = _existing_columns(conn, table)
+        if not present or not _existing_columns(conn, history_table):
+            continue
+        changed_by = 'NEW.updated_by' if 'updated_by' in present else 'NULL'
+        for column in columns:
+            if column not in present:
+                continue
+            # COALESCE: a form re-saving NULL as '' is not a change
+            conn.execute(f"""
+                CREATE TRIGGER {_trigger_name(table, column)}
+                AFTER UPDATE OF {column} ON {table}
+                WHEN COALESCE(OLD.{column}, '') IS NOT COALESCE(NEW.{column}, '')
+                BEGIN
+                    INSERT INTO {history_table} ({record_column}, field_changed, old_value, new_value, changed_by)
+                    VALUES (NEW.id, '{column}', OLD.{column}, NEW.{column}, {changed_by});
+                END
+            """)
+            installed += 1
+    return installed
+
+
+def history_mark(conn, table):
+    """Last history row id for table, taken before an UPDATE; see recorded_changes()"""
+    history_table = TRACKED_TABLES[table][0]
+    return conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {history_table}").fetchone()[0]
+
+
+def recorded_changes(conn, table, record_id, mark):
+    """
+    {field: {'old', 'new'}} the triggers recorded for record_id after mark
+    Read it on the connection that ran the UPDATE, before committing, so it
+    only sees this request's changes.
+    """
+    history_table, record_column, _ = TRACKED_TABLES[table]
+    changes = {}
+    for field, old_value, new_value in conn.execute(f"""
+        SELECT field_changed, old_value, new_value FROM {history_table}
+        WHERE {record_column} = ? AND id > ?
+        ORDER BY id
+    """, (record_id, mark)).fetchall():
+        changes[field] = {'old': old_value, 'new': new_value}
+    return changes
+
+
+def ensure_history_triggers(conn):
+    """Install the triggers if any are missing (checked once per process)"""
+    global _installed
+    if _installed:
+        return False
+
+    expected = expected_triggers(conn)
+    present = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    changed = not expected <= present
+    if changed:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            install_history_triggers(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    _installed = True
+    return changed
+
+
+def install_on_first_request(app, install):
+    """
+    Run install() from a before_request hook until it succeeds, once per process
+    install() returns True once the triggers are in place. While it keeps
+    failing it is retried every INSTALL_RETRY_INTERVAL seconds instead of on
+    every request.
+    """
+    lock = threading.Lock()
+    state = {'done': False, 'retry_at': 0.0}
+
+    @app.before_request
+    def install_history_triggers_once():
+        if state['done']:
+            return
+        with lock:
+            if state['done'] or time.monotonic() < state['retry_at']:
+                return
+            state['done'] = bool(install())
+            if not state['done']:
+                state['retry_at'] = time.monotonic() + INSTALL_RETRY_INTERVAL
+
+    return install_history_triggers_once
@@ -6,10 +6,173 @@ IDS (Identify, Discuss, Solve) workflow with categories
 from flask import render_template, request, redirect, url_for, flash, jsonify, session
 from auth import login_required, division_access_required, division_edit_required, can_edit_division
 from db_utils import get_db_connection, retry_on_lock, log_to_audit
+from history_triggers import history_mark, recorded_changes
+from audit_history import get_history_page, HISTORY_PAGE_SIZE
 import sqlite3
 from pathlib import Path
 from datetime import datetime
 
+# =====================================================
+# BRAINSTORM BULK TRIAGE
+# =====================================================
+
+BRAINSTORM_ACTIONS = ('rock', 'todo', 'table', 'resolve')
+
+def process_brainstorm_batch(conn, division_id, user_id, items):
+    """
+    Apply a brainstorm triage (rock/todo/table/resolve per issue) in one
+    BEGIN IMMEDIATE transaction: one IN (...) prefetch, then one executemany
+    per statement type. Returns the summary counts plus a result per item.
+    """
+    results = {'rocks': 0, 'todos': 0, 'tabled': 0, 'resolved': 0, 'errors': [], 'items': []}
+
+    current_month = datetime.now().month
+    current_quarter = (current_month - 1) // 3 + 1
+    current_year = datetime.now().year
+
+    # Validate the request before touching the database
+    pending = []
+    seen = set()
+    for index, item in enumerate(items):
+        issue_id = item.get('id')
+        action = item.get('action')  # rock, todo, table, resolve
+
+        if not issue_id or not action:
+            continue
+
+        try:
+            issue_id = int(issue_id)
+        except (TypeError, ValueError):
+            pass
+
+        if not isinstance(issue_id, int):
+            error = f'Invalid issue id {issue_id!r}'
+        elif action not in BRAINSTORM_ACTIONS:
+            error = f'Unknown action {action!r} for issue {issue_id}'
+        elif issue_id in seen:
+            error = f'Issue {issue_id} listed more than once'
+        else:
+            error = None
+
+        if error:
+            results['errors'].append(error)
+            results['items'].append({'index': index, 'id': issue_id, 'action': action,
+                                     'status': 'error', 'error': error})
+            continue
+
+        seen.add(issue_id)
+        pending.append((index, issue_id, action, item.get('owner', ''), item.get('notes', '')))
+
+    if not pending:
+        results['items'].sort(key=lambda r: r['index'])
+        return results
+
+    owner_updates = []
+    rock_inserts = []
+    todo_inserts = []
+    resolutions = []
+    tablings = []
+
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        # Verify every issue belongs to this division in one query
+        placeholders = ','.join('?' * len(pending))
+        cursor.execute(f"""
+            SELECT id, issue, owner_name FROM issues
+            WHERE division_id = ? AND is_active = 1 AND id IN ({placeholders})
+        """, [division_id] + [issue_id for _, issue_id, _, _, _ in pending])
+        issues = {row['id']: dict(row) for row in cursor.fetchall()}
+
+        for index, issue_id, action, owner_name, notes in pending:
+            issue = issues.get(issue_id)
+            if not issue:
+                error = f'Issue {issue_id} not found'
+                results['errors'].append(error)
+                results['items'].append({'index': index, 'id': issue_id, 'action': action,
+                                         'status': 'error', 'error': error})
+                continue
+
+            # Update owner if provided
+            if owner_name:
+                owner_updates.append((owner_name, owner_name, user_id, issue_id))
+
+            owner = owner_name or issue['owner_name'] or 'Unassigned'
+
+            if action == 'rock':
+                rock_inserts.append((1, division_id, issue['issue'], owner,
+                                     current_quarter, current_year, user_id))
+                solution = f'Converted to Rock (Q{current_quarter} {current_year})'
+                resolutions.append((solution, user_id, user_id, issue_id))
+                results['rocks'] += 1
+            elif action == 'todo':
+                todo_inserts.append((1, division_id, issue['issue'], owner, issue_id, user_id))
+                solution = 'Converted to To-Do'
+                resolutions.append((solution, user_id, user_id, issue_id))
+                results['todos'] += 1
+            elif action == 'resolve':
+                solution = notes or 'Resolved during brainstorm session'
+                resolutions.append((solution, user_id, user_id, issue_id))
+                results['resolved'] += 1
+            else:
+                # Keep on issues list - update notes if provided
+                tablings.append((notes, notes, user_id, issue_id))
+                results['tabled'] += 1
+
+            results['items'].append({'index': index, 'id': issue_id, 'action': action, 'status': 'ok'})
+
+        if owner_updates:
+            cursor.executemany("""
+                UPDATE issues SET owner_name = ?, owner = ?, updated_by = ?
+                WHERE id = ?
+            """, owner_updates)
+
+        if rock_inserts:
+            cursor.executemany("""
+                INSERT INTO rocks (
+                    organization_id, division_id, description, owner,
+                    quarter, year, status, progress, priority,
+                    created_by, is_active
+                )
+                VALUES (?, ?, ?, ?, ?, ?, 'NOT STARTED', 0, 1, ?, 1)
+            """, rock_inserts)
+
+        if todo_inserts:
+            cursor.executemany("""
+                INSERT INTO todos (
+                    organization_id, division_id, task, owner,
+                    status, source, source_issue_id, priority,
+                    created_by, is_active
+                )
+                VALUES (?, ?, ?, ?, 'OPEN', 'ISSUE', ?, 'MEDIUM', ?, 1)
+            """, todo_inserts)
+
+        if resolutions:
+            cursor.executemany("""
+                UPDATE issues
+                SET status = 'RESOLVED', ids_stage = 'SOLVE',
+                    solution = ?, resolved_at = CURRENT_TIMESTAMP,
+                    resolved_by = ?, updated_by = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, resolutions)
+
+        if tablings:
+            cursor.executemany("""
+                UPDATE issues
+                SET ids_stage = 'IDENTIFY',
+                    discussion_notes = CASE WHEN ? != '' THEN ? ELSE discussion_notes END,
+                    updated_by = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, tablings)
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    results['items'].sort(key=lambda r: r['index'])
+    return results
+
 def register_issues_routes(app):
     """Register issues-related routes"""
     
@@ -194,12 +357,9 @@ def register_issues_routes(app):
             # Use context manager to ensure connection is closed
             with get_db_connection() as conn:
                 cursor = conn.cursor()
+                mark = history_mark(conn, 'issues')
                 
-                # Get old values for audit
-                cursor.execute("SELECT * FROM issues WHERE id = ?", (issue_id,))
-                old_issue = dict(cursor.fetchone())
-                
-                # Update issue
+                # Update issue (issues_history rows for changed fields are written by trigger)
                 cursor.execute("""
                     UPDATE issues
                     SET issue = ?, category = ?, priority = ?, status = ?,
@@ -213,33 +373,19 @@ def register_issues_routes(app):
                 """, (issue_text, category, priority, status, owner_name, 
                       discussion_notes, ids_stage, solution, user['id'],
                       status, status, user['id'], issue_id, division_id))
-                
-                # Log changes to history
-                changes = {}
-                if old_issue['issue'] != issue_text:
-                    changes['issue'] = {'old': old_issue['issue'], 'new': issue_text}
-                if old_issue['status'] != status:
-                    changes['status'] = {'old': old_issue['status'], 'new': status}
-                if old_issue['priority'] != priority:
-                    changes['priority'] = {'old': old_issue['priority'], 'new': priority}
-                
-                if changes:
-                    for field, change in changes.items():
-                        cursor.execute("""
-                            INSERT INTO issues_history (issue_id, field_changed, old_value, new_value, changed_by)
-                            VALUES (?, ?, ?, ?, ?)
-                        """, (issue_id, field, str(change['old']), str(change['new']), user['id']))
+                changes = recorded_changes(conn, 'issues', issue_id, mark)
                 
                 conn.commit()
             
             # Log to audit in separate transaction with retry
-            log_to_audit(
-                user['id'], 'issues', issue_id, 'UPDATE',
-                changes=changes,
-                organization_id=1,
-                division_id=division_id,
-                ip_address=request.remote_addr
-            )
+            if changes:
+                log_to_audit(
+                    user['id'], 'issues', issue_id, 'UPDATE',
+                    changes=changes,
+                    organization_id=1,
+                    division_id=division_id,
+                    ip_address=request.remote_addr
+                )
             
             flash('Issue updated successfully', 'success')
             return redirect(url_for('division_issues', division_id=division_id))
@@ -268,8 +414,9 @@ def register_issues_routes(app):
                 FROM issues_history ih
                 LEFT JOIN users u ON ih.changed_by = u.id
                 WHERE ih.issue_id = ?
-                ORDER BY ih.changed_at DESC
-            """, (issue_id,))
+                ORDER BY ih.changed_at DESC, ih.id DESC
+                LIMIT ?
+            """, (issue_id, HISTORY_PAGE_SIZE))
             
             history = [dict(row) for row in cursor.fetchall()]
         
@@ -595,126 +742,12 @@ def register_issues_routes(app):
         if not data or not data.get('items'):
             return jsonify({'error': 'No items to process'}), 400
 
-        results = {'rocks': 0, 'todos': 0, 'tabled': 0, 'resolved': 0, 'errors': []}
-
-        current_month = datetime.now().month
-        current_quarter = (current_month - 1) // 3 + 1
-        current_year = datetime.now().year
-
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-
-            for item in data['items']:
-                issue_id = item.get('id')
-                action = item.get('action')  # rock, todo, table, resolve
-                owner_name = item.get('owner', '')
-                notes = item.get('notes', '')
-
-                if not issue_id or not action:
-                    continue
-
-                try:
-                    # Verify issue belongs to this division
-                    cursor.execute("""
-                        SELECT * FROM issues WHERE id = ? AND division_id = ? AND is_active = 1
-                    """, (issue_id, division_id))
-                    issue = cursor.fetchone()
-                    if not issue:
-                        results['errors'].append(f'Issue {issue_id} not found')
-                        continue
-
-                    issue = dict(issue)
-
-                    # Update owner if provided
-                    if owner_name:
-                        cursor.execute("""
-                            UPDATE issues SET owner_name = ?, owner = ?
-                            WHERE id = ?
-                        """, (owner_name, owner_name, issue_id))
-
-                    if action == 'rock':
-                        # Convert to Rock
-                        cursor.execute("""
-                            INSERT INTO rocks (
-                                organization_id, division_id, description, owner,
-                                quarter, year, status, progress, priority,
-                                created_by, is_active
-                            )
-                            VALUES (?, ?, ?, ?, ?, ?, 'NOT STARTED', 0, 1, ?, 1)
-                        """, (1, division_id, issue['issue'],
-                              owner_name or issue.get('owner_name') or 'Unassigned',
-                              current_quarter, current_year, user['id']))
-
-                        rock_id = cursor.lastrowid
-
-                        cursor.execute("""
-                            UPDATE issues
-                            SET status = 'RESOLVED', ids_stage = 'SOLVE',
-                                solution = ?, resolved_at = CURRENT_TIMESTAMP,
-                                resolved_by = ?, updated_by = ?, updated_at = CURRENT_TIMESTAMP
-                            WHERE id = ?
-                        """, (f'Converted to Rock (Q{current_quarter} {current_year})',
-                              user['id'], user['id'], issue_id))
-
-                        results['rocks'] += 1
-
-                    elif action == 'todo':
-                        # Convert to To-Do
-                        cursor.execute("""
-                            INSERT INTO todos (
-                                organization_id, division_id, task, owner,
-                                status, source, source_issue_id, priority,
-                                created_by, is_active
-                            )
-                            VALUES (?, ?, ?, ?, 'OPEN', 'ISSUE', ?, 'MEDIUM', ?, 1)
-                        """, (1, division_id, issue['issue'],
-                              owner_name or issue.get('owner_name') or 'Unassigned',
-                              issue_id, user['id']))
-
-                        cursor.execute("""
-                            UPDATE issues
-                            SET status = 'RESOLVED', ids_stage = 'SOLVE',
-                                solution = 'Converted to To-Do',
-                                resolved_at = CURRENT_TIMESTAMP,
-                                resolved_by = ?, updated_by = ?, updated_at = CURRENT_TIMESTAMP
-                            WHERE id = ?
-                        """, (user['id'], user['id'], issue_id))
-
-                        results['todos'] += 1
-
-                    elif action == 'table':
-                        # Keep on issues list - update notes/owner if provided
-                        cursor.execute("""
-                            UPDATE issues
-                            SET ids_stage = 'IDENTIFY',
-                                discussion_notes = CASE WHEN ? != '' THEN ? ELSE discussion_notes END,
-                                updated_by = ?, updated_at = CURRENT_TIMESTAMP
-                            WHERE id = ?
-                        """, (notes, notes, user['id'], issue_id))
-
-                        results['tabled'] += 1
-
-                    elif action == 'resolve':
-                        cursor.execute("""
-                            UPDATE issues
-                            SET status = 'RESOLVED', ids_stage = 'SOLVE',
-                                solution = ?,
-                                resolved_at = CURRENT_TIMESTAMP,
-                                resolved_by = ?, updated_by = ?, updated_at = CURRENT_TIMESTAMP
-                            WHERE id = ?
-                        """, (notes or 'Resolved during brainstorm session',
-                              user['id'], user['id'], issue_id))
-
-                        results['resolved'] += 1
-
-                except Exception as e:
-                    results['errors'].append(f'Error processing issue {issue_id}: {str(e)}')
-
-            conn.commit()
+            results = process_brainstorm_batch(conn, division_id, user['id'], data['items'])
 
         log_to_audit(
             user['id'], 'issues', 0, 'BRAINSTORM_PROCESS',
-            changes=results,
+            changes={k: v for k, v in results.items() if k != 'items'},
             organization_id=1,
             division_id=division_id,
             ip_address=request.remote_addr
@@ -747,6 +780,24 @@ def register_issues_routes(app):
             issues = [dict(row) for row in cursor.fetchall()]
         return jsonify({'success': True, 'issues': issues})
 
+    @app.route('/api/division/<int:division_id>/issues/<int:issue_id>/history')
+    @login_required
+    @division_access_required('division_id')
+    def api_issue_history(division_id, issue_id):
+        """Issue change history, newest first, paged with ?cursor=&limit="""
+        with get_db_connection() as conn:
+            issue = conn.execute("SELECT id FROM issues WHERE id = ? AND division_id = ?",
+                                 (issue_id, division_id)).fetchone()
+            if not issue:
+                return jsonify({'success': False, 'error': 'Issue not found'}), 404
+            try:
+                page = get_history_page(conn, 'issues_history', issue_id,
+                                        cursor=request.args.get('cursor'),
+                                        limit=request.args.get('limit', HISTORY_PAGE_SIZE, type=int))
+            except ValueError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
+        return jsonify({'success': True, 'history': page['items'], 'next_cursor': page['next_cursor']})
+
     @app.route('/api/division/<int:division_id>/issues', methods=['POST'])
     @login_required
     @division_edit_required('division_id')
@@ -0,0 +1,270 @@
+"""
+EOS Platform - L10 Autosave Buffer
+Write coalescing for the L10 note autosave endpoints. save-notes and
+save-section put the latest value for a (meeting, field) or (section) into
+an in-memory buffer; a background thread writes every dirty entry in one
+transaction EOS_AUTOSAVE_INTERVAL seconds after the first one arrives. Ten
+attendees typing in the same meeting cost one commit per interval instead of
+one connection checkout, UPDATE and commit per keystroke batch each, and a
+value overwritten before the flush is never written at all.
+
+The request waits until the flush that covers its save has committed, so
+'success' still means the text is in the database. If that takes longer
+than EOS_AUTOSAVE_WAIT seconds (the database is locked), the endpoint
+answers 503 with retry, the entry stays buffered, and the client's retry
+just confirms it. Live attendees (l10_events.py) get one event per flushed
+entry, with the final value, after the commit.
+
+Configuration (environment variables):
+    EOS_AUTOSAVE_BUFFER    - 0 writes every save immediately (default: 1)
+    EOS_AUTOSAVE_INTERVAL  - Seconds a save waits for others to share its commit (default: 0.3)
+    EOS_AUTOSAVE_WAIT      - Seconds a request waits for its save to commit (default: 5)
+"""
+
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+
+from db_utils import get_db, retry_on_lock
+from l10_events import publish
+
+logger = logging.getLogger(__name__)
+
+AUTOSAVE_BUFFER = os.environ.get('EOS_AUTOSAVE_BUFFER', '1') != '0'
+AUTOSAVE_INTERVAL = float(os.environ.get('EOS_AUTOSAVE_INTERVAL', '0.3'))
+AUTOSAVE_WAIT = float(os.environ.get('EOS_AUTOSAVE_WAIT', '5'))
+
+# Meeting-level note columns save-notes may write
+NOTE_FIELDS = ('segue_good_news', 'customer_employee_headlines', 'scorecard_review', 'rock_review')
+
+
+class AutosaveTimeout(Exception):
+    """The save is buffered but not committed yet"""
+
+
+def _is_lock_error(e):
+    return isinstance(e, sqlite3.OperationalError) and 'locked' in str(e).lower()
+
+
+def _section_sql(status):
+    """UPDATE for one section (same timestamps the endpoint always set)"""
+    update_fields = ['notes = ?', 'status = ?']
+    if status == 'COMPLETE':
+        update_fields.append('completed_at = CURRENT_TIMESTAMP')
+    elif status == 'ACTIVE':
+        update_fields.append('started_at = CURRENT_TIMESTAMP')
+    return f"UPDATE l10_sections SET {', '.join(update_fields)} WHERE id = ? AND l10_meeting_id = ?"
+
+
+@retry_on_lock(max_retries=3)
+def _write_batch(entries):
+    """
+    Write buffered entries in one transaction
+    entries: {key: (value, origin, seq)}; notes for the same meeting are
+    merged into one UPDATE of l10_meetings.
+    """
+    meetings = {}
+    sections = []
+    for key, (value, _, _) in entries.items():
+        if key[0] == 'notes':
+            meetings.setdefault(key[1], {})[key[2]] = value
+        else:
+            sections.append((key[1], key[2], value))
+
+    conn = get_db()
+    try:
+        for meeting_id, fields in meetings.items():
+            conn.execute(f"""
+                UPDATE l10_meetings SET {', '.join(f'{f} = ?' for f in fields)}, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, list(fields.values()) + [meeting_id])
+        for meeting_id, section_id, (notes, status) in sections:
+            conn.execute(_section_sql(status), (notes, status, section_id, meeting_id))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def _publish_entries(entries):
+    for key, (value, origin, _) in entries.items():
+        if key[0] == 'notes':
+            publish(key[1], 'notes', {'field': key[2], 'value': value}, origin)
+        else:
+            notes, status = value
+            publish(key[1], 'section', {'section_id': key[2], 'notes': notes, 'status': status}, origin)
+
+
+class AutosaveBuffer:
+    """Latest value per autosave key with a background group-commit writer"""
+
+    def __init__(self, enabled=AUTOSAVE_BUFFER, interval=AUTOSAVE_INTERVAL, wait=AUTOSAVE_WAIT):
+        self.enabled = enabled
+        self.interval = interval
+        self.wait = wait
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()  # one transaction in flight at a time
+        self._dirty = {}    # key -> (value, origin, seq)
+        self._seq = 0       # bumped by every save
+        self._durable = 0   # every save up to this seq is committed (or superseded)
+        self._errors = {}   # seq -> exception, for saves that could not be written
+        self._thread = None
+        self._stopping = False
+        self.saves = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.sync_writes = 0
+        self.failures = 0
+        self.timeouts = 0
+
+    def save(self, key, value, origin=None):
+        """
+        Buffer a value and block until it is committed
+        Raises AutosaveTimeout if it isn't within self.wait seconds; the
+        value stays buffered and is written by a later flush.
+        """
+        if not self.enabled or self._stopping:
+            entries = {key: (value, origin, 0)}
+            _write_batch(entries)
+            with self._cond:
+                self.saves += 1
+                self.sync_writes += 1
+                self.rows_written += 1
+            _publish_entries(entries)
+            return
+
+        with self._cond:
+            self._seq += 1
+            seq = self._seq
+            if key in self._dirty:
+                self.coalesced += 1
+            self._dirty[key] = (value, origin, seq)
+            self.saves += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='eos-l10-autosave', daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+            if not self._cond.wait_for(lambda: self._durable >= seq, timeout=self.wait):
+                self.timeouts += 1
+                raise AutosaveTimeout("Save not committed yet")
+            error = self._errors.pop(seq, None)
+        if error is not None:
+            raise error
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopping or self._dirty)
+                if self._stopping:
+                    return
+                # Let other saves arrive and share this commit
+                self._cond.wait_for(lambda: self._stopping, timeout=self.interval)
+                failures = self.failures
+            self.flush()
+            with self._cond:
+                if self.failures != failures and not self._stopping:
+                    # Back off instead of retrying a failing write in a tight loop
+                    self._cond.wait(self.interval)
+
+    def flush(self):
+        """Write every dirty entry in one transaction, return how many"""
+        with self._flush_lock:
+            with self._cond:
+                batch, self._dirty = self._dirty, {}
+                covered = self._seq
+            if not batch:
+                return 0
+
+            errors = {}
+            try:
+                _write_batch(batch)
+            except Exception as e:
+                if _is_lock_error(e):
+                    # Still locked after the retries - keep everything for the next flush
+                    with self._cond:
+                        for key, entry in batch.items():
+                            self._dirty.setdefault(key, entry)  # unless saved again meanwhile
+                        self.failures += 1
+                    logger.warning("Failed to write %d L10 autosave(s): %s", len(batch), e)
+                    return 0
+                # One bad entry mustn't fail everyone else's saves: write them
+                # one at a time and report the failures to their own requests
+                for key, entry in list(batch.items()):
+                    try:
+                        _write_batch({key: entry})
+                    except Exception as entry_error:
+                        errors[entry[2]] = entry_error
+                        del batch[key]
+                logger.warning("Failed to write %d L10 autosave(s): %s", len(errors), e)
+
+            with self._cond:
+                # Saves made during the write are newer than covered and stay dirty
+                self._durable = covered
+                if len(self._errors) > 1000:
+                    self._errors.clear()  # left by requests that timed out
+                self._errors.update(errors)
+                self.failures += bool(errors)
+                self.flushes += 1
+                self.rows_written += len(batch)
+                self._cond.notify_all()
+            _publish_entries(batch)
+            return len(batch)
+
+    def shutdown(self):
+        """Stop the writer thread and write whatever is buffered"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=self.interval + 5)
+        self.flush()
+
+    def stats(self):
+        """Counters for the health endpoint"""
+        with self._cond:
+            return {
+                'buffered': self.enabled,
+                'interval': self.interval,
+                'dirty': len(self._dirty),
+                'saves': self.saves,
+                'coalesced': self.coalesced,
+                'flushes': self.flushes,
+                'rows_written': self.rows_written,
+                'saves_per_flush': round((self.saves - self.sync_writes) / self.flushes, 1) if self.flushes else 0.0,
+                'sync_writes': self.sync_writes,
+                'failures': self.failures,
+                'timeouts': self.timeouts
+            }
+
+
+_buffer = AutosaveBuffer()
+atexit.register(_buffer.shutdown)
+
+
+def save_meeting_notes(meeting_id, field, value, origin=None):
+    """Autosave one meeting-level note field; returns once it is committed"""
+    if field not in NOTE_FIELDS:
+        raise ValueError(f"Invalid field: {field}")
+    _buffer.save(('notes', meeting_id, field), value, origin)
+
+
+def save_section_notes(meeting_id, section_id, notes, status='ACTIVE', origin=None):
+    """Autosave a section's notes and status; returns once it is committed"""
+    _buffer.save(('section', meeting_id, int(section_id)), (notes, status), origin)
+
+
+def flush_autosaves():
+    """Write buffered autosaves now, return how many"""
+    return _buffer.flush()
+
+
+def get_autosave_stats():
+    """Autosave buffer counters"""
+    return _buffer.stats()
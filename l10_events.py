@@ -0,0 +1,282 @@
+"""
+EOS Platform - L10 Live Events
+In-memory fan-out hub for live L10 meetings. The auto-save endpoints publish
+a small patch (notes, section, rock, to-do, issue, timer) after they commit,
+and every attendee's open page receives it over /api/l10/<id>/events
+(Server-Sent Events) and updates in place, instead of reloading and
+re-running every view_l10_meeting query.
+
+Each meeting keeps its last EOS_L10_STREAM_REPLAY events, so a browser that
+reconnects with Last-Event-ID catches up on what it missed; if it fell
+further behind than that, or its queue overflowed, it is told to reload.
+Streams are closed after EOS_L10_STREAM_MAX_AGE seconds and the browser
+reconnects, which keeps a tab left open overnight from holding a worker
+thread and re-checks the session on the way back in.
+
+The hub lives in one process - with several app processes, attendees only
+see changes made through their own process.
+
+Configuration (environment variables):
+    EOS_L10_STREAM_HEARTBEAT    - Seconds between keep-alive comments (default: 15)
+    EOS_L10_STREAM_MAX_AGE      - Seconds before a stream is closed for reconnect (default: 300)
+    EOS_L10_STREAM_QUEUE        - Events buffered per client before it must reload (default: 100)
+    EOS_L10_STREAM_REPLAY       - Recent events kept per meeting for reconnects (default: 200)
+    EOS_L10_STREAM_MAX_CLIENTS  - Open streams across all meetings (default: 200)
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+STREAM_HEARTBEAT = float(os.environ.get('EOS_L10_STREAM_HEARTBEAT', '15'))
+STREAM_MAX_AGE = float(os.environ.get('EOS_L10_STREAM_MAX_AGE', '300'))
+STREAM_QUEUE = int(os.environ.get('EOS_L10_STREAM_QUEUE', '100'))
+STREAM_REPLAY = int(os.environ.get('EOS_L10_STREAM_REPLAY', '200'))
+STREAM_MAX_CLIENTS = int(os.environ.get('EOS_L10_STREAM_MAX_CLIENTS', '200'))
+
+# Browser reconnect delay after a closed stream, milliseconds
+RECONNECT_MS = 3000
+
+# Meetings nobody has watched for this long are forgotten, seconds
+CHANNEL_IDLE_TTL = 600
+
+
+class StreamLimitReached(Exception):
+    """Every stream slot is taken"""
+
+
+def format_event(event_id, event, data):
+    """One SSE frame"""
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class _Channel:
+    """Subscribers and recent events of one meeting"""
+
+    _tokens = 0
+
+    def __init__(self, replay):
+        # Event ids are '<token>-<seq>'; the token changes whenever the channel
+        # is recreated (or the process restarts), so a stale Last-Event-ID
+        # can't be mistaken for a position in this channel's history
+        _Channel._tokens += 1
+        self.token = f"{int(time.time()):x}{_Channel._tokens:x}"
+        self.seq = 0
+        self.floor = 0  # highest seq no longer in recent
+        self.recent = deque(maxlen=replay)
+        self.subscribers = set()
+        self.last_active = time.monotonic()
+
+    def event_id(self, seq):
+        return f"{self.token}-{seq}"
+
+
+class Subscription:
+    """One open stream: a bounded queue of (id, event, data)"""
+
+    def __init__(self, meeting_id, maxsize):
+        self.meeting_id = meeting_id
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+
+class MeetingHub:
+    """Per-meeting publish/subscribe with bounded per-client queues"""
+
+    def __init__(self, queue_size=STREAM_QUEUE, replay=STREAM_REPLAY, max_clients=STREAM_MAX_CLIENTS):
+        self.queue_size = queue_size
+        self.replay = replay
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._channels = {}  # meeting_id -> _Channel
+        self._clients = 0
+        self._last_sweep = time.monotonic()
+        self.published = 0
+        self.delivered = 0
+        self.dropped_clients = 0
+        self.resyncs = 0
+        self.rejected = 0
+        self.peak_clients = 0
+
+    def _channel(self, meeting_id):
+        """Get or create a meeting's channel (call with lock held)"""
+        now = time.monotonic()
+        if now - self._last_sweep > 60:
+            self._last_sweep = now
+            for key in [k for k, c in self._channels.items()
+                        if not c.subscribers and now - c.last_active > CHANNEL_IDLE_TTL]:
+                del self._channels[key]
+        channel = self._channels.get(meeting_id)
+        if channel is None:
+            channel = self._channels[meeting_id] = _Channel(self.replay)
+        channel.last_active = now
+        return channel
+
+    def position(self, meeting_id):
+        """
+        Id of the latest event for meeting_id
+        Rendered into the page, so the stream opened right after the page
+        loads replays anything published in between.
+        """
+        with self._lock:
+            channel = self._channel(meeting_id)
+            return channel.event_id(channel.seq)
+
+    def subscribe(self, meeting_id, last_event_id=None):
+        """
+        Register a stream; returns (subscription, events to replay)
+        The replay is None when last_event_id is older than the events kept
+        or belongs to another channel - the client missed changes and
+        should reload.
+        """
+        with self._lock:
+            if self._clients >= self.max_clients:
+                self.rejected += 1
+                raise StreamLimitReached("Too many live meeting streams")
+            channel = self._channel(meeting_id)
+            sub = Subscription(meeting_id, self.queue_size)
+
+            replay = []
+            if last_event_id:
+                token, _, seq = str(last_event_id).rpartition('-')
+                try:
+                    seq = int(seq)
+                except ValueError:
+                    seq = -1
+                if token != channel.token or not channel.floor <= seq <= channel.seq:
+                    replay = None
+                    self.resyncs += 1
+                else:
+                    replay = [(channel.event_id(s), event, data)
+                              for s, event, data in channel.recent if s > seq]
+
+            channel.subscribers.add(sub)
+            self._clients += 1
+            self.peak_clients = max(self.peak_clients, self._clients)
+            return sub, replay
+
+    def unsubscribe(self, sub):
+        """Remove a stream"""
+        with self._lock:
+            channel = self._channels.get(sub.meeting_id)
+            if channel is None or sub not in channel.subscribers:
+                return
+            channel.subscribers.discard(sub)
+            channel.last_active = time.monotonic()
+            self._clients -= 1
+
+    def publish(self, meeting_id, event, data, origin=None):
+        """
+        Send an event to everyone watching meeting_id, return how many got it
+        A client whose queue is full is marked overflowed and told to reload.
+        """
+        with self._lock:
+            channel = self._channels.get(meeting_id)
+            if channel is None:
+                return 0  # nobody has the meeting open
+            channel.seq += 1
+            data = dict(data, origin=origin)
+            if len(channel.recent) == channel.recent.maxlen:
+                channel.floor = channel.recent[0][0]
+            channel.recent.append((channel.seq, event, data))
+            self.published += 1
+
+            item = (channel.event_id(channel.seq), event, data)
+            sent = 0
+            for sub in channel.subscribers:
+                if sub.overflowed:
+                    continue
+                try:
+                    sub.queue.put_nowait(item)
+                    sent += 1
+                except queue.Full:
+                    sub.overflowed = True
+                    self.dropped_clients += 1
+            self.delivered += sent
+            return sent
+
+    def stream(self, sub, replay=(), heartbeat=STREAM_HEARTBEAT, max_age=STREAM_MAX_AGE):
+        """SSE frames for a subscription; unsubscribes when the client goes away"""
+        deadline = time.monotonic() + max_age
+        try:
+            yield f"retry: {RECONNECT_MS}\n\n"
+            if replay is None:
+                yield format_event('', 'resync', {'reason': 'missed events'})
+                return
+            for item in replay:
+                yield format_event(*item)
+
+            while True:
+                if sub.overflowed and sub.queue.empty():
+                    yield format_event('', 'resync', {'reason': 'too far behind'})
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    item = sub.queue.get(timeout=min(heartbeat, remaining))
+                except queue.Empty:
+                    # Comment line: keeps proxies from closing an idle stream
+                    # and lets the server notice a disconnected client
+                    yield ": ping\n\n"
+                    continue
+                yield format_event(*item)
+        finally:
+            self.unsubscribe(sub)
+
+    def watchers(self, meeting_id):
+        """Open streams for one meeting"""
+        with self._lock:
+            channel = self._channels.get(meeting_id)
+            return len(channel.subscribers) if channel else 0
+
+    def stats(self):
+        """Counters for the health endpoint"""
+        with self._lock:
+            return {
+                'clients': self._clients,
+                'peak_clients': self.peak_clients,
+                'max_clients': self.max_clients,
+                'meetings': sum(1 for c in self._channels.values() if c.subscribers),
+                'published': self.published,
+                'delivered': self.delivered,
+                'dropped_clients': self.dropped_clients,
+                'resyncs': self.resyncs,
+                'rejected': self.rejected
+            }
+
+
+_hub = MeetingHub()
+
+
+def stream_position(meeting_id):
+    """Latest event id for a meeting, for the page to resume from"""
+    return _hub.position(meeting_id)
+
+
+def subscribe(meeting_id, last_event_id=None):
+    """Open a stream on the shared hub; raises StreamLimitReached when full"""
+    return _hub.subscribe(meeting_id, last_event_id)
+
+
+def stream_events(sub, replay=()):
+    """SSE frames for a subscription from subscribe()"""
+    return _hub.stream(sub, replay)
+
+
+def publish(meeting_id, event, data, origin=None):
+    """Broadcast a patch to a meeting's attendees; never raises"""
+    if not meeting_id:
+        return 0
+    try:
+        return _hub.publish(int(meeting_id), event, data, origin)
+    except Exception:
+        return 0
+
+
+def get_l10_stream_stats():
+    """Hub counters"""
+    return _hub.stats()
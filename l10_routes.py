@@ -4,9 +4,11 @@ Level 10 Meetings - fully interactive with inline editing and auto-save
 Uses db_utils for retry-on-lock and context-managed connections
 """
 
-from flask import render_template, request, redirect, url_for, flash, jsonify, session
-from auth import login_required, division_access_required, division_edit_required, log_action, can_edit_division
+from flask import render_template, request, redirect, url_for, flash, jsonify, session, Response
+from auth import login_required, division_access_required, division_edit_required, log_action, can_edit_division, can_access_division
 from db_utils import get_db_connection, execute_with_retry, retry_on_lock, log_to_audit
+from l10_events import publish, subscribe, stream_events, stream_position, StreamLimitReached
+from l10_autosave import save_meeting_notes, save_section_notes, AutosaveTimeout, NOTE_FIELDS
 import sqlite3
 import json
 import time
@@ -319,7 +321,8 @@ def register_l10_routes(app):
                                user=user, meeting=meeting, sections=sections,
                                rocks=rocks, issues=issues, todos=todos,
                                users=users, division_id=division_id,
-                               can_edit=can_edit, is_living=is_living)
+                               can_edit=can_edit, is_living=is_living,
+                               stream_position=stream_position(meeting_id))
 
     # =========================================================
     # MEETING LIFECYCLE (commit BEFORE log_action)
@@ -399,29 +402,61 @@ def register_l10_routes(app):
 
         return redirect(url_for('l10_meetings', division_id=division_id))
 
+    # =========================================================
+    # LIVE EVENTS (Server-Sent Events, see l10_events.py)
+    # =========================================================
+
+    def _origin():
+        """Page that made this change, so it can skip its own events"""
+        return request.headers.get('X-L10-Client')
+
+    def _changed(data, fields):
+        """The submitted values of fields, for an event payload"""
+        return {field: data[field] for field in fields if field in data}
+
+    @app.route('/api/l10/<int:meeting_id>/events')
+    @login_required
+    def l10_events(meeting_id):
+        """Stream of changes other attendees make to this meeting"""
+        row = execute_with_retry("SELECT division_id FROM l10_meetings WHERE id = ?",
+                                 (meeting_id,), fetch='one', commit=False)
+        if not row:
+            return jsonify({'success': False, 'error': 'Meeting not found'}), 404
+        if not can_access_division(session.get('user'), row['division_id']):
+            return jsonify({'success': False, 'error': 'Access denied'}), 403
+
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('since')
+        try:
+            sub, replay = subscribe(meeting_id, last_event_id)
+        except StreamLimitReached as e:
+            return jsonify({'success': False, 'error': str(e), 'retry': True}), 503
+
+        resp = Response(stream_events(sub, replay), mimetype='text/event-stream')
+        resp.headers['Cache-Control'] = 'no-cache'
+        resp.headers['X-Accel-Buffering'] = 'no'  # nginx: don't buffer the stream
+        return resp
+
     # =========================================================
     # AJAX API - AUTO-SAVE (all use execute_with_retry + try/except)
+    # Note autosaves go through the coalescing buffer in l10_autosave.py,
+    # which also publishes them to live attendees once committed
     # =========================================================
 
     @app.route('/api/l10/<int:meeting_id>/save-notes', methods=['POST'])
     @login_required
     def l10_save_notes(meeting_id):
-        """Save meeting-level notes with retry on lock"""
+        """Save meeting-level notes; answers once they are committed"""
         try:
             data = request.get_json()
             field = data.get('field', '')
             value = data.get('value', '')
 
-            allowed_fields = ['segue_good_news', 'customer_employee_headlines',
-                              'scorecard_review', 'rock_review']
-            if field not in allowed_fields:
+            if field not in NOTE_FIELDS:
                 return jsonify({'success': False, 'error': 'Invalid field'}), 400
 
-            execute_with_retry(
-                f"UPDATE l10_meetings SET {field} = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-                (value, meeting_id))
-            return jsonify({'success': True})
-        except sqlite3.OperationalError as e:
+            save_meeting_notes(meeting_id, field, value, _origin())
+            return jsonify({'success': True, 'durable': True})
+        except (AutosaveTimeout, sqlite3.OperationalError):
             return jsonify({'success': False, 'error': 'Database busy, will retry', 'retry': True}), 503
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)}), 500
@@ -429,26 +464,18 @@ def register_l10_routes(app):
     @app.route('/api/l10/<int:meeting_id>/save-section', methods=['POST'])
     @login_required
     def l10_save_section(meeting_id):
-        """Save section notes with retry"""
+        """Save section notes; answers once they are committed"""
         try:
             data = request.get_json()
-            section_id = data.get('section_id')
-            notes = data.get('notes', '')
-            status = data.get('status', 'ACTIVE')
-
-            update_fields = ['notes = ?', 'status = ?']
-            params = [notes, status]
-            if status == 'COMPLETE':
-                update_fields.append('completed_at = CURRENT_TIMESTAMP')
-            elif status == 'ACTIVE':
-                update_fields.append('started_at = CURRENT_TIMESTAMP')
-            params.extend([section_id, meeting_id])
-
-            execute_with_retry(
-                f"UPDATE l10_sections SET {', '.join(update_fields)} WHERE id = ? AND l10_meeting_id = ?",
-                tuple(params))
-            return jsonify({'success': True})
-        except sqlite3.OperationalError:
+            try:
+                section_id = int(data.get('section_id'))
+            except (TypeError, ValueError):
+                return jsonify({'success': False, 'error': 'Invalid section'}), 400
+
+            save_section_notes(meeting_id, section_id, data.get('notes', ''),
+                               data.get('status', 'ACTIVE'), _origin())
+            return jsonify({'success': True, 'durable': True})
+        except (AutosaveTimeout, sqlite3.OperationalError):
             return jsonify({'success': False, 'error': 'Database busy', 'retry': True}), 503
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)}), 500
@@ -468,11 +495,16 @@ def register_l10_routes(app):
             if not updates:
                 return jsonify({'success': False, 'error': 'Nothing to update'}), 400
 
+            updates.append('updated_by = ?')
             updates.append('updated_at = CURRENT_TIMESTAMP')
-            params.append(rock_id)
+            params.extend([session['user']['id'], rock_id])
             execute_with_retry(
                 f"UPDATE rocks SET {', '.join(updates)} WHERE id = ?",
                 tuple(params))
+            # Rocks/to-dos/issues belong to the division; the page says which meeting it is on
+            publish(data.get('meeting_id'), 'rock',
+                    {'rock_id': rock_id, 'fields': _changed(data, ['status', 'progress', 'description', 'owner'])},
+                    _origin())
             return jsonify({'success': True})
         except sqlite3.OperationalError:
             return jsonify({'success': False, 'error': 'Database busy', 'retry': True}), 503
@@ -505,6 +537,9 @@ def register_l10_routes(app):
                         f"UPDATE todos SET {field} = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
                         (data[field], todo_id))
 
+            publish(data.get('meeting_id'), 'todo',
+                    {'todo_id': todo_id, 'fields': _changed(data, ['is_completed', 'task', 'owner', 'due_date', 'status'])},
+                    _origin())
             return jsonify({'success': True})
         except sqlite3.OperationalError:
             return jsonify({'success': False, 'error': 'Database busy', 'retry': True}), 503
@@ -533,6 +568,10 @@ def register_l10_routes(app):
                   data.get('due_date', ''), data.get('meeting_id'), user['id']),
                 fetch='lastrowid')
 
+            publish(data.get('meeting_id'), 'todo_created',
+                    {'id': new_id, 'task': data.get('task', ''), 'owner': data.get('owner', ''),
+                     'due_date': data.get('due_date', '')},
+                    _origin())
             return jsonify({'success': True, 'id': new_id})
         except sqlite3.OperationalError:
             return jsonify({'success': False, 'error': 'Database busy', 'retry': True}), 503
@@ -556,11 +595,16 @@ def register_l10_routes(app):
                 updates.append('resolved_at = CURRENT_TIMESTAMP')
 
             if updates:
+                updates.append('updated_by = ?')
                 updates.append('updated_at = CURRENT_TIMESTAMP')
-                params.append(issue_id)
+                params.extend([session['user']['id'], issue_id])
                 execute_with_retry(
                     f"UPDATE issues SET {', '.join(updates)} WHERE id = ?",
                     tuple(params))
+                publish(data.get('meeting_id'), 'issue',
+                        {'issue_id': issue_id,
+                         'fields': _changed(data, ['status', 'priority', 'ids_stage', 'discussion_notes', 'solution', 'owner'])},
+                        _origin())
 
             return jsonify({'success': True})
         except sqlite3.OperationalError:
@@ -592,6 +636,10 @@ def register_l10_routes(app):
                   data.get('meeting_id'), user['id']),
                 fetch='lastrowid')
 
+            publish(data.get('meeting_id'), 'issue_created',
+                    {'id': new_id, 'issue': data.get('issue', ''), 'priority': data.get('priority', 'MEDIUM'),
+                     'owner': data.get('owner', '')},
+                    _origin())
             return jsonify({'success': True, 'id': new_id})
         except sqlite3.OperationalError:
             return jsonify({'success': False, 'error': 'Database busy', 'retry': True}), 503
@@ -687,6 +735,7 @@ def register_l10_routes(app):
             except Exception:
                 pass
 
+            publish(meeting_id, 'completed', {'new_meeting_id': new_living_id}, _origin())
             return jsonify({
                 'success': True,
                 'duration': duration,
@@ -714,6 +763,8 @@ def register_l10_routes(app):
                 SET started_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
                 WHERE id = ?
             """, (meeting_id,))
-            return jsonify({'success': True, 'started_at': datetime.now().isoformat()})
+            started_at = datetime.now().isoformat()
+            publish(meeting_id, 'timer', {'started_at_ms': int(time.time() * 1000)}, _origin())
+            return jsonify({'success': True, 'started_at': started_at})
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)}), 500
@@ -0,0 +1,240 @@
+"""
+EOS Platform - Login Guard
+Password verification on a bounded bcrypt worker pool plus per-username and
+per-IP login throttling. bcrypt releases the GIL while hashing, so the pool
+spreads a shift-change login rush over the available cores while capping
+how many hashes run and wait at once; throttled attempts are rejected before
+any hashing happens.
+
+Configuration (environment variables):
+    EOS_BCRYPT_WORKERS      - Concurrent bcrypt verifications (default: CPU count, max 4)
+    EOS_BCRYPT_QUEUE        - Verifications allowed to wait for a worker (default: 32)
+    EOS_BCRYPT_TIMEOUT      - Seconds a login waits for its verification (default: 10)
+    EOS_LOGIN_WINDOW        - Throttle window in seconds (default: 300)
+    EOS_LOGIN_MAX_PER_USER  - Attempts per username per window (default: 10)
+    EOS_LOGIN_MAX_PER_IP    - Attempts per client IP per window (default: 50). The IP is
+                              request.remote_addr, which app_multitenant resolves from
+                              X-Forwarded-For (EOS_PROXY_HOPS) when running behind nginx
+"""
+
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+
+import bcrypt
+
+BCRYPT_WORKERS = int(os.environ.get('EOS_BCRYPT_WORKERS', min(4, os.cpu_count() or 1)))
+BCRYPT_QUEUE = int(os.environ.get('EOS_BCRYPT_QUEUE', '32'))
+BCRYPT_TIMEOUT = float(os.environ.get('EOS_BCRYPT_TIMEOUT', '10'))
+LOGIN_WINDOW = float(os.environ.get('EOS_LOGIN_WINDOW', '300'))
+LOGIN_MAX_PER_USER = int(os.environ.get('EOS_LOGIN_MAX_PER_USER', '10'))
+LOGIN_MAX_PER_IP = int(os.environ.get('EOS_LOGIN_MAX_PER_IP', '50'))
+
+
+class LoginThrottled(Exception):
+    """Too many recent attempts for this username or IP"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Too many login attempts, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class LoginBusy(Exception):
+    """Every bcrypt worker and queue slot is taken"""
+
+
+def _checkpw(password, password_hash):
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
+class PasswordVerifier:
+    """Bounded pool for bcrypt.checkpw with queue-depth accounting"""
+
+    def __init__(self, workers=BCRYPT_WORKERS, max_queue=BCRYPT_QUEUE, timeout=BCRYPT_TIMEOUT):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        # Running plus waiting verifications; beyond this, logins are turned away
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self.in_flight = 0
+        self.running = 0
+        self.peak_queue = 0
+        self.verified = 0
+        self.rejected = 0
+        self.wait_time_total = 0.0
+        self.hash_time_total = 0.0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='eos-bcrypt')
+            return self._executor
+
+    def _run(self, password, password_hash, submitted_at):
+        started = time.perf_counter()
+        with self._lock:
+            self.running += 1
+            self.wait_time_total += started - submitted_at
+        try:
+            return _checkpw(password, password_hash)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.hash_time_total += time.perf_counter() - started
+
+    def verify(self, password, password_hash):
+        """bcrypt.checkpw on a worker; raises LoginBusy if the queue is full"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise LoginBusy("Login service busy")
+
+        with self._lock:
+            self.in_flight += 1
+            self.peak_queue = max(self.peak_queue, self.in_flight - self.workers)
+        try:
+            future = self._get_executor().submit(self._run, password, password_hash, time.perf_counter())
+        except Exception:
+            self._finished(None)
+            raise
+        # The slot is held until the hash finishes (or is cancelled), not until
+        # this request gives up, so abandoned hashes still count against the bound
+        future.add_done_callback(self._finished)
+
+        try:
+            result = future.result(timeout=self.timeout)
+        except FuturesTimeout:
+            future.cancel()  # drops it if still queued; a running hash can't be stopped
+            with self._lock:
+                self.rejected += 1
+            raise LoginBusy("Login service busy")
+        with self._lock:
+            self.verified += 1
+        return result
+
+    def _finished(self, future):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def queue_depth(self):
+        """Verifications waiting for a worker right now"""
+        with self._lock:
+            return max(0, self.in_flight - self.running)
+
+    def stats(self):
+        """Counters for the health endpoint"""
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'running': self.running,
+                'queue_depth': max(0, self.in_flight - self.running),
+                'peak_queue': self.peak_queue,
+                'verified': self.verified,
+                'rejected': self.rejected,
+                'wait_time_avg': round(self.wait_time_total / self.verified, 4) if self.verified else 0.0,
+                'hash_time_avg': round(self.hash_time_total / self.verified, 4) if self.verified else 0.0
+            }
+
+    def shutdown(self):
+        """Stop the worker threads"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+class LoginThrottle:
+    """Sliding-window attempt counts per username and per client IP"""
+
+    def __init__(self, window=LOGIN_WINDOW, max_per_user=LOGIN_MAX_PER_USER, max_per_ip=LOGIN_MAX_PER_IP):
+        self.window = window
+        self.limits = {'user': max_per_user, 'ip': max_per_ip}
+        self._lock = threading.Lock()
+        self._attempts = {}  # ('user', name) / ('ip', addr) -> deque of attempt times
+        self.throttled = 0
+
+    def _keys(self, username, ip_address):
+        keys = [('user', (username or '').strip().lower())]
+        if ip_address:
+            keys.append(('ip', ip_address))
+        return keys
+
+    def check(self, username, ip_address=None):
+        """Count an attempt, or raise LoginThrottled if a limit is already reached"""
+        now = time.monotonic()
+        cutoff = now - self.window
+        with self._lock:
+            keys = self._keys(username, ip_address)
+            for key in keys:
+                attempts = self._attempts.get(key)
+                if attempts is None:
+                    continue
+                while attempts and attempts[0] <= cutoff:
+                    attempts.popleft()
+                if len(attempts) >= self.limits[key[0]]:
+                    self.throttled += 1
+                    raise LoginThrottled(max(1, int(attempts[0] - cutoff) + 1))
+            for key in keys:
+                self._attempts.setdefault(key, deque()).append(now)
+            if len(self._attempts) > 10000:
+                self._sweep(cutoff)
+
+    def succeeded(self, username, ip_address=None):
+        """
+        A correct password clears the username's count and takes this attempt
+        off the IP's, so a shift logging in from one NAT address isn't throttled
+        """
+        with self._lock:
+            self._attempts.pop(('user', (username or '').strip().lower()), None)
+            attempts = self._attempts.get(('ip', ip_address)) if ip_address else None
+            if attempts:
+                attempts.pop()
+
+    def _sweep(self, cutoff):
+        """Drop keys with no attempts left in the window (call with lock held)"""
+        for key in [k for k, attempts in self._attempts.items() if not attempts or attempts[-1] <= cutoff]:
+            del self._attempts[key]
+
+    def stats(self):
+        """Counters for the health endpoint"""
+        with self._lock:
+            return {
+                'window': self.window,
+                'max_per_user': self.limits['user'],
+                'max_per_ip': self.limits['ip'],
+                'tracked_keys': len(self._attempts),
+                'throttled': self.throttled
+            }
+
+
+_verifier = PasswordVerifier()
+_throttle = LoginThrottle()
+atexit.register(_verifier.shutdown)
+
+
+def verify_password_bounded(password, password_hash):
+    """Verify a password on the shared bcrypt pool"""
+    return _verifier.verify(password, password_hash)
+
+
+def check_login_allowed(username, ip_address=None):
+    """Count a login attempt; raises LoginThrottled when over the limit"""
+    _throttle.check(username, ip_address)
+
+
+def record_login_success(username, ip_address=None):
+    """Reset the throttle after a successful login"""
+    _throttle.succeeded(username, ip_address)
+
+
+def get_login_stats():
+    """bcrypt pool and throttle counters"""
+    return {'bcrypt': _verifier.stats(), 'throttle': _throttle.stats()}
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Route Query Indexes
+Adds composite and partial indexes matching the WHERE/ORDER BY shapes the
+route modules actually run, then verifies them with EXPLAIN QUERY PLAN.
+
+Usage:
+    python migrate_add_indexes.py           # create indexes, then verify plans
+    python migrate_add_indexes.py --check   # verify plans only (exit 1 on a table scan)
+"""
+
+import sys
+import sqlite3
+from pathlib import Path
+from datetime import datetime
+
+DATABASE_PATH = Path(__file__).parent / 'eos_data.db'
+
+# Every division-scoped list query filters on the literal is_active = 1, so
+# those indexes are partial and skip soft-deleted rows entirely. The seats
+# query ORs in corporate rows (division_id IS NULL), which SQLite can only
+# split into two index searches with a full composite index.
+INDEXES = [
+    ('idx_rocks_division_active', 'rocks(division_id, year, quarter) WHERE is_active = 1'),
+    ('idx_issues_division_active', 'issues(division_id, status) WHERE is_active = 1'),
+    ('idx_todos_division_active', 'todos(division_id, status) WHERE is_active = 1'),
+    ('idx_todos_source_l10', 'todos(source_l10_id) WHERE is_active = 1'),
+    ('idx_scorecard_division_active', 'scorecard_metrics(division_id) WHERE is_active = 1'),
+    ('idx_accountability_division_active', 'accountability_chart(division_id, is_active)'),
+    ('idx_vto_division_active', 'vto(division_id, updated_at) WHERE is_active = 1'),
+    ('idx_l10_division_status_date', 'l10_meetings(division_id, status, meeting_date)'),
+    ('idx_l10_sections_meeting', 'l10_sections(l10_meeting_id, section_order)'),
+]
+
+# (description, table or alias that must not be scanned, query as the routes run it)
+QUERY_PLAN_CHECKS = [
+    ('rocks list (rocks_routes.division_rocks)', 'rocks', """
+        SELECT id, description, owner, status FROM rocks
+        WHERE division_id = ? AND is_active = 1
+        ORDER BY year DESC, quarter DESC, priority, status ASC
+    """),
+    ('issues list (issues_routes.division_issues)', 'i', """
+        SELECT i.* FROM issues i
+        WHERE i.division_id = ? AND i.is_active = 1
+        ORDER BY i.date_added DESC
+    """),
+    ('open issues (l10_routes.view_l10_meeting)', 'i', """
+        SELECT i.* FROM issues i
+        WHERE i.division_id = ? AND i.is_active = 1 AND i.status != 'RESOLVED'
+    """),
+    ('todos list (todos_routes.division_todos)', 'todos', """
+        SELECT * FROM todos
+        WHERE division_id = ? AND is_active = 1
+        ORDER BY due_date
+    """),
+    ('open todos (l10_routes.view_l10_meeting)', 't', """
+        SELECT t.* FROM todos t
+        WHERE t.division_id = ? AND t.is_active = 1 AND t.is_completed = 0
+    """),
+    ('meeting todos (l10_routes.l10_complete_with_email)', 'todos', """
+        SELECT task, owner FROM todos WHERE source_l10_id = ? AND is_active = 1
+    """),
+    ('scorecard list (scorecard_routes.division_scorecard)', 'scorecard_metrics', """
+        SELECT * FROM scorecard_metrics
+        WHERE division_id = ? AND is_active = 1
+        ORDER BY id
+    """),
+    ('seats (accountability_routes.division_accountability)', 'ac', """
+        SELECT ac.* FROM accountability_chart ac
+        WHERE (ac.division_id = ? OR ac.division_id IS NULL) AND ac.is_active = 1
+    """),
+    ('corporate seats (corporate_routes.corporate_accountability)', 'ac', """
+        SELECT ac.* FROM accountability_chart ac
+        WHERE ac.division_id IS NULL AND ac.is_active = 1
+    """),
+    ('division VTO (vision_routes.division_vision)', 'vto', """
+        SELECT * FROM vto
+        WHERE division_id = ? AND is_active = 1
+        ORDER BY updated_at DESC
+    """),
+    ('corporate VTO (corporate_routes.corporate_vision)', 'vto', """
+        SELECT * FROM vto
+        WHERE division_id IS NULL AND is_active = 1
+        ORDER BY updated_at DESC LIMIT 1
+    """),
+    ('current meeting (l10_routes.l10_current)', 'l10_meetings', """
+        SELECT id FROM l10_meetings
+        WHERE division_id = ? AND status = 'IN_PROGRESS'
+        ORDER BY created_at DESC LIMIT 1
+    """),
+    ('upcoming meetings (l10_routes.l10_meetings)', 'l', """
+        SELECT l.* FROM l10_meetings l
+        WHERE l.division_id = ? AND l.status = 'SCHEDULED'
+        ORDER BY l.meeting_date ASC, l.meeting_time ASC
+    """),
+    ('meeting sections (l10_routes.view_l10_meeting)', 'l10_sections', """
+        SELECT * FROM l10_sections
+        WHERE l10_meeting_id = ? ORDER BY section_order
+    """),
+    ('SSO lookup (app_multitenant.auto_login_from_sso)', 'users', """
+        SELECT id, username, email, full_name
+        FROM users WHERE email = ? AND is_active = 1
+    """),
+]
+
+def check_query_plans(conn):
+    """
+    Run EXPLAIN QUERY PLAN for each route query shape
+    Returns a list of (description, plan lines) for queries that scan their table.
+    """
+    failures = []
+    for description, table, sql in QUERY_PLAN_CHECKS:
+        params = (1,) * sql.count('?')
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        scanned = any(line.startswith('SCAN ') and line.split()[1] == table for line in plan)
+        print(f"  {'❌' if scanned else '✅'} {description}")
+        for line in plan:
+            print(f"       {line}")
+        if scanned:
+            failures.append((description, plan))
+    return failures
+
+def check(conn):
+    """Verify plans and report"""
+    print("Checking query plans:")
+    failures = check_query_plans(conn)
+    print()
+    if failures:
+        print(f"❌ {len(failures)} route quer{'y' if len(failures) == 1 else 'ies'} fall back to a table scan")
+        return False
+    print("✅ All route queries use an index")
+    return True
+
+def migrate():
+    """Create route query indexes"""
+
+    print("=" * 70)
+    print("Database Migration: Route Query Indexes")
+    print("=" * 70)
+    print()
+
+    if not DATABASE_PATH.exists():
+        print(f"❌ Error: Database not found at {DATABASE_PATH}")
+        return False
+
+    # Backup database first
+    backup_path = DATABASE_PATH.parent / f'eos_data_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.db'
+    print(f"Creating backup: {backup_path}")
+
+    import shutil
+    shutil.copy2(DATABASE_PATH, backup_path)
+    print(f"✅ Backup created")
+    print()
+
+    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("BEGIN")
+        print(f"Creating {len(INDEXES)} index(es):")
+        for name, definition in INDEXES:
+            print(f"  - {name} ON {definition}")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+        conn.commit()
+        print()
+
+        ok = check(conn)
+
+        print()
+        print("=" * 70)
+        print("✅ Migration completed successfully!" if ok else "⚠️  Migration completed, but some queries still scan")
+        print("=" * 70)
+        print()
+        print("Backup saved at:")
+        print(f"  {backup_path}")
+        print()
+
+        return ok
+
+    except Exception as e:
+        conn.rollback()
+        print()
+        print(f"❌ Migration failed: {e}")
+        print()
+        print("Database was NOT modified. Backup is available at:")
+        print(f"  {backup_path}")
+        return False
+
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    if '--check' in sys.argv[1:]:
+        conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
+        try:
+            success = check(conn)
+        finally:
+            conn.close()
+    else:
+        success = migrate()
+    exit(0 if success else 1)
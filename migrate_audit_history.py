@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Audit History Indexes
+Adds (record, changed_at, id) and (changed_at, id) indexes to audit_log and
+the *_history tables for keyset paging and time-range queries, and creates
+the history_archive table used by audit_history.py archive
+"""
+
+import sqlite3
+from pathlib import Path
+from datetime import datetime
+
+from audit_history import install_history_indexes
+
+DATABASE_PATH = Path(__file__).parent / 'eos_data.db'
+
+def migrate():
+    """Install history indexes and the archive table"""
+    
+    print("=" * 70)
+    print("Database Migration: Audit History Indexes")
+    print("=" * 70)
+    print()
+    
+    if not DATABASE_PATH.exists():
+        print(f"❌ Error: Database not found at {DATABASE_PATH}")
+        return False
+    
+    # Backup database first
+    backup_path = DATABASE_PATH.parent / f'eos_data_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.db'
+    print(f"Creating backup: {backup_path}")
+    
+    import shutil
+    shutil.copy2(DATABASE_PATH, backup_path)
+    print(f"✅ Backup created")
+    print()
+    
+    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
+    cursor = conn.cursor()
+    
+    try:
+        print("Installing time-ordered history indexes and history_archive...")
+        cursor.execute("BEGIN")
+        install_history_indexes(conn)
+        conn.commit()
+        
+        cursor.execute("""
+            SELECT name FROM sqlite_master
+            WHERE type = 'index' AND (name LIKE 'idx_%_time' OR name LIKE 'idx_history_archive%')
+            ORDER BY name
+        """)
+        print()
+        for (name,) in cursor.fetchall():
+            print(f"  ✅ {name}")
+        
+        print()
+        print("=" * 70)
+        print("✅ Migration completed successfully!")
+        print("=" * 70)
+        print()
+        print("Archive old rows with: python audit_history.py archive --dry-run")
+        print()
+        print("Backup saved at:")
+        print(f"  {backup_path}")
+        print()
+        
+        return True
+        
+    except Exception as e:
+        conn.rollback()
+        print()
+        print(f"❌ Migration failed: {e}")
+        print()
+        print("Database was NOT modified. Backup is available at:")
+        print(f"  {backup_path}")
+        return False
+        
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    success = migrate()
+    exit(0 if success else 1)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Auth Version
+Creates the auth_version stamp and the triggers on user_roles and divisions
+that bump it, so web processes know when compiled permissions are stale
+"""
+
+import sqlite3
+from pathlib import Path
+from datetime import datetime
+
+from auth import install_auth_version
+
+DATABASE_PATH = Path(__file__).parent / 'eos_data.db'
+
+def migrate():
+    """Install the auth_version stamp"""
+    
+    print("=" * 70)
+    print("Database Migration: Auth Version")
+    print("=" * 70)
+    print()
+    
+    if not DATABASE_PATH.exists():
+        print(f"❌ Error: Database not found at {DATABASE_PATH}")
+        return False
+    
+    # Backup database first
+    backup_path = DATABASE_PATH.parent / f'eos_data_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.db'
+    print(f"Creating backup: {backup_path}")
+    
+    import shutil
+    shutil.copy2(DATABASE_PATH, backup_path)
+    print(f"✅ Backup created")
+    print()
+    
+    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
+    cursor = conn.cursor()
+    
+    try:
+        print("Installing auth_version table and triggers on:")
+        print("  - user_roles")
+        print("  - divisions")
+        cursor.execute("BEGIN")
+        install_auth_version(conn)
+        conn.commit()
+        
+        cursor.execute("SELECT version FROM auth_version WHERE id = 1")
+        print()
+        print(f"✅ auth_version at {cursor.fetchone()[0]}")
+        
+        print()
+        print("=" * 70)
+        print("✅ Migration completed successfully!")
+        print("=" * 70)
+        print()
+        print("Backup saved at:")
+        print(f"  {backup_path}")
+        print()
+        
+        return True
+        
+    except Exception as e:
+        conn.rollback()
+        print()
+        print(f"❌ Migration failed: {e}")
+        print()
+        print("Database was NOT modified. Backup is available at:")
+        print(f"  {backup_path}")
+        return False
+        
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    success = migrate()
+    exit(0 if success else 1)
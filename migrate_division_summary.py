@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Division Summary
+Creates the division_summary table and the triggers on rocks, issues, todos,
+scorecard_metrics and l10_meetings that keep it current, then backfills it
+"""
+
+import sqlite3
+from pathlib import Path
+from datetime import datetime
+
+from division_summary import install_division_summary, SUMMARY_SOURCES
+
+DATABASE_PATH = Path(__file__).parent / 'eos_data.db'
+
+def migrate():
+    """Install the materialized division summary"""
+    
+    print("=" * 70)
+    print("Database Migration: Division Summary")
+    print("=" * 70)
+    print()
+    
+    if not DATABASE_PATH.exists():
+        print(f"❌ Error: Database not found at {DATABASE_PATH}")
+        return False
+    
+    # Backup database first
+    backup_path = DATABASE_PATH.parent / f'eos_data_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.db'
+    print(f"Creating backup: {backup_path}")
+    
+    import shutil
+    shutil.copy2(DATABASE_PATH, backup_path)
+    print(f"✅ Backup created")
+    print()
+    
+    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    
+    try:
+        print("Installing division_summary table and triggers on:")
+        for table in SUMMARY_SOURCES:
+            print(f"  - {table}")
+        cursor.execute("BEGIN")  # Keep the DDL in the same transaction as the backfill
+        install_division_summary(conn)
+        conn.commit()
+        
+        cursor.execute("SELECT COUNT(*) FROM division_summary")
+        print()
+        print(f"✅ Backfilled {cursor.fetchone()[0]} division(s)")
+        
+        print()
+        print("=" * 70)
+        print("✅ Migration completed successfully!")
+        print("=" * 70)
+        print()
+        print("Backup saved at:")
+        print(f"  {backup_path}")
+        print()
+        
+        return True
+        
+    except Exception as e:
+        conn.rollback()
+        print()
+        print(f"❌ Migration failed: {e}")
+        print()
+        print("Database was NOT modified. Backup is available at:")
+        print(f"  {backup_path}")
+        return False
+        
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    success = migrate()
+    exit(0 if success else 1)
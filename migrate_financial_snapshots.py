@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Financial Snapshots
+Creates the financial_snapshots table and ingests every Site Lead Statement
+currently in datasheets/
+"""
+
+import sqlite3
+from pathlib import Path
+from datetime import datetime
+
+from financial_snapshots import ingest_statements
+
+DATABASE_PATH = Path(__file__).parent / 'eos_data.db'
+
+def migrate():
+    """Install and backfill financial snapshots"""
+    
+    print("=" * 70)
+    print("Database Migration: Financial Snapshots")
+    print("=" * 70)
+    print()
+    
+    if not DATABASE_PATH.exists():
+        print(f"❌ Error: Database not found at {DATABASE_PATH}")
+        return False
+    
+    # Backup database first
+    backup_path = DATABASE_PATH.parent / f'eos_data_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.db'
+    print(f"Creating backup: {backup_path}")
+    
+    import shutil
+    shutil.copy2(DATABASE_PATH, backup_path)
+    print(f"✅ Backup created")
+    print()
+    
+    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    
+    try:
+        # Creates the table, then parses every statement file
+        count = ingest_statements(conn)
+        print(f"✅ Parsed {count} statement file(s)")
+        
+        cursor.execute("""
+            SELECT d.name, fs.file_name, fs.period, fs.gross_profit_ytd
+            FROM financial_snapshots fs
+            JOIN divisions d ON d.id = fs.division_id
+            ORDER BY d.name, fs.file_mtime DESC
+        """)
+        for row in cursor.fetchall():
+            print(f"  - {row['name']}: {row['file_name']} ({row['period']}) GP YTD ${row['gross_profit_ytd']:,.2f}")
+        
+        print()
+        print("=" * 70)
+        print("✅ Migration completed successfully!")
+        print("=" * 70)
+        print()
+        print("Backup saved at:")
+        print(f"  {backup_path}")
+        print()
+        
+        return True
+        
+    except Exception as e:
+        print()
+        print(f"❌ Migration failed: {e}")
+        print()
+        print("Database was NOT modified. Backup is available at:")
+        print(f"  {backup_path}")
+        return False
+        
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    success = migrate()
+    exit(0 if success else 1)
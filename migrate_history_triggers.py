@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Database Migration: History Triggers
+Installs the AFTER UPDATE triggers that write rocks_history, issues_history
+and vto_*_history rows, replacing the history inserts done in the routes
+"""
+
+import sqlite3
+from pathlib import Path
+from datetime import datetime
+
+from history_triggers import install_history_triggers, TRACKED_TABLES
+
+DATABASE_PATH = Path(__file__).parent / 'eos_data.db'
+
+def migrate():
+    """Install the history triggers"""
+    
+    print("=" * 70)
+    print("Database Migration: History Triggers")
+    print("=" * 70)
+    print()
+    
+    if not DATABASE_PATH.exists():
+        print(f"❌ Error: Database not found at {DATABASE_PATH}")
+        return False
+    
+    # Backup database first
+    backup_path = DATABASE_PATH.parent / f'eos_data_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.db'
+    print(f"Creating backup: {backup_path}")
+    
+    import shutil
+    shutil.copy2(DATABASE_PATH, backup_path)
+    print(f"✅ Backup created")
+    print()
+    
+    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
+    cursor = conn.cursor()
+    
+    try:
+        print("Installing history triggers on:")
+        for table, (history_table, _, columns) in TRACKED_TABLES.items():
+            print(f"  - {table} → {history_table} ({len(columns)} columns)")
+        cursor.execute("BEGIN")
+        installed = install_history_triggers(conn)
+        conn.commit()
+        
+        print()
+        print(f"✅ {installed} triggers installed")
+        
+        print()
+        print("=" * 70)
+        print("✅ Migration completed successfully!")
+        print("=" * 70)
+        print()
+        print("Backup saved at:")
+        print(f"  {backup_path}")
+        print()
+        
+        return True
+        
+    except Exception as e:
+        conn.rollback()
+        print()
+        print(f"❌ Migration failed: {e}")
+        print()
+        print("Database was NOT modified. Backup is available at:")
+        print(f"  {backup_path}")
+        return False
+        
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    success = migrate()
+    exit(0 if success else 1)
@@ -510,6 +510,17 @@ CREATE INDEX IF NOT EXISTS idx_accountability_org_div ON accountability_chart(or
 CREATE INDEX IF NOT EXISTS idx_audit_log_user ON audit_log(user_id);
 CREATE INDEX IF NOT EXISTS idx_audit_log_table ON audit_log(table_name, record_id);
 
+-- Route query shapes (see migrate_add_indexes.py for the EXPLAIN QUERY PLAN checks)
+CREATE INDEX IF NOT EXISTS idx_rocks_division_active ON rocks(division_id, year, quarter) WHERE is_active = 1;
+CREATE INDEX IF NOT EXISTS idx_issues_division_active ON issues(division_id, status) WHERE is_active = 1;
+CREATE INDEX IF NOT EXISTS idx_todos_division_active ON todos(division_id, status) WHERE is_active = 1;
+CREATE INDEX IF NOT EXISTS idx_todos_source_l10 ON todos(source_l10_id) WHERE is_active = 1;
+CREATE INDEX IF NOT EXISTS idx_scorecard_division_active ON scorecard_metrics(division_id) WHERE is_active = 1;
+CREATE INDEX IF NOT EXISTS idx_accountability_division_active ON accountability_chart(division_id, is_active);
+CREATE INDEX IF NOT EXISTS idx_vto_division_active ON vto(division_id, updated_at) WHERE is_active = 1;
+CREATE INDEX IF NOT EXISTS idx_l10_division_status_date ON l10_meetings(division_id, status, meeting_date);
+CREATE INDEX IF NOT EXISTS idx_l10_sections_meeting ON l10_sections(l10_meeting_id, section_order);
+
 -- =====================================================
 -- SEED DATA - STEENSMA ORGANIZATION
 -- =====================================================
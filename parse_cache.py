@@ -0,0 +1,113 @@
+"""
+EOS Platform - Datasheet Parse Cache
+Memoizes parsed datasheet results keyed on (path, mtime, size) so repeated
+dashboard requests skip re-reading unchanged CSVs.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from sync_generation import on_generation_change
+
+# Six datasheet types, a couple of generations each
+DEFAULT_MAX_ENTRIES = 32
+
+
+class ParseCache:
+    """Bounded LRU cache of parse results keyed on file identity"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_parse(self, key, parse):
+        """Return the cached result for key, calling parse() on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Parse outside the lock so a slow sheet doesn't block other lookups
+        result = parse()
+
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def clear(self):
+        """Drop all cached results"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters for the health endpoint"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+_cache = ParseCache()
+
+# A new sync generation means every sheet may have been replaced; drop the
+# old results now instead of waiting for LRU eviction
+on_generation_change(lambda generation: _cache.clear())
+
+
+def cached_parse(func=None, extra_key=None):
+    """
+    Decorator for parse_*(filepath) functions.
+
+    The key includes the file's mtime and size, so a new sheet dropped by
+    eos_sync.py (or an in-place rewrite) misses the cache automatically.
+    extra_key adds a callable's result to the key, for parsers whose output
+    depends on something besides the file (e.g. today's date).
+
+    Cached results are shared between callers and must not be mutated.
+    """
+    def decorator(parse_func):
+        @wraps(parse_func)
+        def wrapper(filepath):
+            try:
+                st = os.stat(filepath)
+            except OSError:
+                # Let the parser report the missing file as it always has
+                return parse_func(filepath)
+
+            key = (parse_func.__name__, os.fspath(filepath), st.st_mtime_ns, st.st_size)
+            if extra_key is not None:
+                key += (extra_key(),)
+            return _cache.get_or_parse(key, lambda: parse_func(filepath))
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def get_cache_stats():
+    """Get parse cache counters"""
+    return _cache.stats()
+
+
+def clear_cache():
+    """Drop all cached parse results"""
+    _cache.clear()
@@ -0,0 +1,196 @@
+"""
+EOS Platform - PDF Cache
+Content-addressed store for rendered VTO/L10 PDFs. Each file is named by a
+hash of the rows the PDF was built from, so an unchanged VTO downloads from
+disk instead of being rebuilt by ReportLab, and the hash doubles as the ETag.
+
+Configuration (environment variables):
+    EOS_PDF_CACHE_DIR   - Cache directory (default: ./pdf_cache)
+    EOS_PDF_CACHE_MB    - Disk cap in megabytes, least recently used evicted first (default: 100)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+PDF_CACHE_DIR = Path(os.environ.get('EOS_PDF_CACHE_DIR', Path(__file__).parent / 'pdf_cache'))
+PDF_CACHE_MAX_BYTES = int(float(os.environ.get('EOS_PDF_CACHE_MB', '100')) * 1024 * 1024)
+
+# Bump when pdf_generator's layout changes so old renders stop matching
+LAYOUT_VERSION = 1
+
+
+def _plain(value):
+    """JSON fallback for sqlite3.Row and anything else non-serializable"""
+    if isinstance(value, sqlite3.Row):
+        return list(value)
+    return str(value)
+
+
+def content_key(kind, data):
+    """SHA-256 of a PDF's source rows, used as both file name and ETag"""
+    payload = json.dumps([kind, LAYOUT_VERSION, data], default=_plain, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class PdfCache:
+    """Directory of <key>.pdf files with a total size cap"""
+
+    def __init__(self, directory=PDF_CACHE_DIR, max_bytes=PDF_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size, least recently used first
+        self._total = 0
+        self._rendering = {}           # key -> Event, so concurrent misses render once
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._load()
+
+    def _path(self, key):
+        return self.directory / f'{key}.pdf'
+
+    def _load(self):
+        """Index whatever an earlier process left on disk, oldest access first"""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            files = [(p.stat().st_mtime, p.stem, p.stat().st_size)
+                     for p in self.directory.glob('*.pdf')]
+        except OSError:
+            files = []
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total += size
+        self._evict()
+
+    def _evict(self):
+        """Drop least recently used files until under the cap (call with lock held)"""
+        while self._total > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total -= size
+            self.evictions += 1
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+    def _read(self, key):
+        """Cached bytes for key, or None (call with lock held)"""
+        if key not in self._entries:
+            return None
+        try:
+            content = self._path(key).read_bytes()
+        except OSError:
+            # Removed behind our back
+            self._total -= self._entries.pop(key)
+            return None
+        self._entries.move_to_end(key)
+        try:
+            os.utime(self._path(key))  # keep LRU order across restarts
+        except OSError:
+            pass
+        return content
+
+    def get(self, key):
+        """Cached PDF bytes for key, or None"""
+        with self._lock:
+            content = self._read(key)
+            if content is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return content
+
+    def put(self, key, content):
+        """Atomically store PDF bytes under key"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self._total += len(content) - self._entries.pop(key, 0)
+            self._entries[key] = len(content)
+            self._evict()
+
+    def get_or_render(self, key, render):
+        """
+        Return the PDF bytes for key, calling render() on a miss
+        render() must return the PDF as bytes. Concurrent requests for the
+        same key wait for the first render instead of repeating it.
+        """
+        while True:
+            with self._lock:
+                content = self._read(key)
+                if content is not None:
+                    self.hits += 1
+                    return content
+                pending = self._rendering.get(key)
+                if pending is None:
+                    self.misses += 1
+                    self._rendering[key] = threading.Event()
+                    break
+            pending.wait()
+
+        try:
+            content = render()
+            self.put(key, content)
+            return content
+        finally:
+            with self._lock:
+                self._rendering.pop(key).set()
+
+    def clear(self):
+        """Delete every cached PDF"""
+        with self._lock:
+            for key in list(self._entries):
+                try:
+                    self._path(key).unlink()
+                except OSError:
+                    pass
+            self._entries.clear()
+            self._total = 0
+
+    def stats(self):
+        """Hit/miss counters for the health endpoint"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_pdf_cache():
+    """Get the shared PDF cache, creating its directory on first use"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PdfCache()
+        return _cache
+
+
+def get_pdf_cache_stats():
+    """Get PDF cache counters"""
+    return get_pdf_cache().stats()
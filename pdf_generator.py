@@ -14,7 +14,6 @@ from io import BytesIO
 from datetime import datetime
 from pathlib import Path
 import json
-import sqlite3
 
 # Paths
 STATIC_DIR = Path(__file__).parent / 'static'
@@ -27,29 +26,54 @@ CELL_BG = colors.HexColor('#f8f8f8')    # Very light gray for cells
 BORDER_COLOR = colors.HexColor('#999999')  # Border gray
 
 
+class PlainRow(tuple):
+    """
+    Picklable stand-in for sqlite3.Row
+    Supports index and column-name access, so fetched data can be handed to
+    a render worker process.
+    """
+
+    def __new__(cls, values, columns):
+        row = super().__new__(cls, values)
+        row._columns = columns
+        return row
+
+    def __getnewargs__(self):
+        return tuple(self), self._columns
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self._columns[key])
+        return tuple.__getitem__(self, key)
+
+    def keys(self):
+        return list(self._columns)
+
+
+def _plain_cursor(db_connection):
+    """Cursor whose rows come back as PlainRow"""
+    cursor = db_connection.cursor()
+
+    def factory(cur, values):
+        columns = {desc[0]: i for i, desc in enumerate(cur.description)}
+        return PlainRow(values, columns)
+
+    cursor.row_factory = factory
+    return cursor
+
+
 def generate_vto_pdf(division_id, db_connection):
     """
     Generate a 2-page landscape VTO PDF with professional table layout
     Page 1: VISION (Core Values, Core Focus, Core Target, Marketing Strategy, 3-Year Picture)
     Page 2: TRACTION (1-Year Plan, Rocks, Issues List)
     """
-    buffer = BytesIO()
-    
-    # Create PDF with landscape orientation
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=landscape(letter),
-        leftMargin=0.5*inch,
-        rightMargin=0.5*inch,
-        topMargin=0.5*inch,
-        bottomMargin=0.5*inch
-    )
-    
-    width, height = landscape(letter)
-    content_width = width - inch  # Available width for content
-    
-    # Fetch data from database
-    cursor = db_connection.cursor()
+    return render_vto_pdf(fetch_vto_data(division_id, db_connection))
+
+
+def fetch_vto_data(division_id, db_connection):
+    """Read every row the VTO PDF shows for a division"""
+    cursor = _plain_cursor(db_connection)
     
     # Get division info
     cursor.execute("SELECT name FROM divisions WHERE id = ?", (division_id,))
@@ -92,6 +116,48 @@ def generate_vto_pdf(division_id, db_connection):
         LIMIT 15
     """, (division_id,))
     issues = cursor.fetchall()
+
+    return {
+        'division_name': division_name,
+        'core_values': core_values,
+        'core_focus': core_focus,
+        'core_target': core_target,
+        'marketing': marketing,
+        'three_year': three_year,
+        'one_year': one_year,
+        'rocks': rocks,
+        'issues': issues,
+        # The header and rocks section print the current quarter and date
+        'as_of': datetime.now().strftime('%Y-%m-%d'),
+    }
+
+
+def render_vto_pdf(data):
+    """Build the VTO PDF from fetch_vto_data() output"""
+    division_name = data['division_name']
+    core_values = data['core_values']
+    core_focus = data['core_focus']
+    core_target = data['core_target']
+    marketing = data['marketing']
+    three_year = data['three_year']
+    one_year = data['one_year']
+    rocks = data['rocks']
+    issues = data['issues']
+
+    buffer = BytesIO()
+    
+    # Create PDF with landscape orientation
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=landscape(letter),
+        leftMargin=0.5*inch,
+        rightMargin=0.5*inch,
+        topMargin=0.5*inch,
+        bottomMargin=0.5*inch
+    )
+    
+    width, height = landscape(letter)
+    content_width = width - inch  # Available width for content
     
     # Styles
     styles = getSampleStyleSheet()
@@ -470,24 +536,16 @@ def generate_l10_pdf(meeting_id, db_connection):
     """
     Generate L10 Meeting PDF with professional table layout
     """
-    buffer = BytesIO()
+    return render_l10_pdf(fetch_l10_data(meeting_id, db_connection))
 
-    # Create PDF with portrait orientation
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=letter,
-        leftMargin=0.5*inch,
-        rightMargin=0.5*inch,
-        topMargin=0.5*inch,
-        bottomMargin=0.5*inch
-    )
-
-    width, height = letter
-    content_width = width - inch
 
-    # Ensure row_factory for dict-style column access
-    db_connection.row_factory = sqlite3.Row
-    cursor = db_connection.cursor()
+def fetch_l10_data(meeting_id, db_connection):
+    """
+    Read every row the L10 PDF shows for a meeting
+    Returns None if the meeting doesn't exist.
+    """
+    # Rows support dict-style column access
+    cursor = _plain_cursor(db_connection)
 
     cursor.execute("""
         SELECT l10.*, d.name as division_name
@@ -498,14 +556,8 @@ def generate_l10_pdf(meeting_id, db_connection):
     meeting = cursor.fetchone()
 
     if not meeting:
-        story = [Paragraph("Meeting not found", getSampleStyleSheet()['Heading1'])]
-        doc.build(story)
-        buffer.seek(0)
-        return buffer
+        return None
 
-    # Use column names instead of fragile indices
-    meeting_date = meeting['meeting_date'] or ""
-    division_name = meeting['division_name'] or "Unknown"
     division_id = meeting['division_id']
 
     # Get agenda items
@@ -579,6 +631,53 @@ def generate_l10_pdf(meeting_id, db_connection):
     """, (meeting_id,))
     headlines_rows = cursor.fetchall()
 
+    return {
+        'meeting': meeting,
+        'agenda_items': agenda_items,
+        'scorecard': scorecard,
+        'rocks': rocks,
+        'meeting_todos': meeting_todos,
+        'division_todos': division_todos,
+        'meeting_issues': meeting_issues,
+        'headlines_rows': headlines_rows,
+    }
+
+
+def render_l10_pdf(data):
+    """Build the L10 Meeting PDF from fetch_l10_data() output"""
+    buffer = BytesIO()
+
+    # Create PDF with portrait orientation
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        leftMargin=0.5*inch,
+        rightMargin=0.5*inch,
+        topMargin=0.5*inch,
+        bottomMargin=0.5*inch
+    )
+
+    width, height = letter
+    content_width = width - inch
+
+    if data is None:
+        story = [Paragraph("Meeting not found", getSampleStyleSheet()['Heading1'])]
+        doc.build(story)
+        buffer.seek(0)
+        return buffer
+
+    # Use column names instead of fragile indices
+    meeting = data['meeting']
+    meeting_date = meeting['meeting_date'] or ""
+    division_name = meeting['division_name'] or "Unknown"
+    agenda_items = data['agenda_items']
+    scorecard = data['scorecard']
+    rocks = data['rocks']
+    meeting_todos = data['meeting_todos']
+    division_todos = data['division_todos']
+    meeting_issues = data['meeting_issues']
+    headlines_rows = data['headlines_rows']
+
     # Styles
     styles = getSampleStyleSheet()
     title_style = ParagraphStyle(
@@ -0,0 +1,211 @@
+"""
+EOS Platform - PDF Render Jobs
+Runs ReportLab renders in a pool of worker processes so a big export never
+ties up a request thread (or the GIL) and several divisions can export at
+once on separate cores. Finished PDFs land in the content-addressed cache
+from pdf_cache, which is where downloads are served from.
+
+Configuration (environment variables):
+    EOS_PDF_WORKERS     - Render processes (default: CPU count, max 4)
+    EOS_PDF_TIMEOUT     - Seconds a synchronous download waits for its render (default: 120)
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from pdf_cache import content_key, get_pdf_cache
+
+PDF_WORKERS = int(os.environ.get('EOS_PDF_WORKERS', min(4, os.cpu_count() or 1)))
+PDF_TIMEOUT = float(os.environ.get('EOS_PDF_TIMEOUT', '120'))
+
+# Finished jobs are forgotten after an hour
+JOB_RETENTION = 3600
+
+
+def _render(kind, data):
+    """Worker-process entry point: render one PDF and return its bytes"""
+    from pdf_generator import render_vto_pdf, render_l10_pdf
+    render = render_vto_pdf if kind == 'vto' else render_l10_pdf
+    return render(data).getvalue()
+
+
+class PdfRenderService:
+    """Process pool plus a table of submitted render jobs"""
+
+    def __init__(self, workers=PDF_WORKERS):
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._pending = {}  # content key -> Future, so identical exports share one render
+        self.rendered = 0
+        self.render_failures = 0
+
+    def _get_executor(self):
+        """Start the pool on first use (call with lock held)"""
+        if self._executor is None:
+            # spawn rather than fork: the web process has DB pool and SMTP
+            # threads whose locks a forked child would inherit mid-use
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def _submit(self, kind, key, data):
+        """Future rendering key, reusing an in-flight render (call with lock held)"""
+        future = self._pending.get(key)
+        if future is not None:
+            return future
+
+        try:
+            future = self._get_executor().submit(_render, kind, data)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM killed) - start a fresh pool
+            self._executor = None
+            future = self._get_executor().submit(_render, kind, data)
+        self._pending[key] = future
+
+        def finished(f):
+            with self._lock:
+                self._pending.pop(key, None)
+                if f.exception() is not None:
+                    self.render_failures += 1
+                    return
+                self.rendered += 1
+            get_pdf_cache().put(key, f.result())
+
+        future.add_done_callback(finished)
+        return future
+
+    def render(self, kind, data, timeout=PDF_TIMEOUT):
+        """Render in the pool and wait for the bytes (for synchronous downloads)"""
+        key = content_key(kind, data)
+        with self._lock:
+            future = self._submit(kind, key, data)
+        return future.result(timeout=timeout)
+
+    def submit(self, kind, data, filename, **meta):
+        """
+        Queue a render and return its job id
+        Already-cached PDFs produce a job that is done immediately.
+        """
+        key = content_key(kind, data)
+        job_id = uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'kind': kind,
+            'key': key,
+            'filename': filename,
+            'data': data,
+            'created_at': time.time(),
+            'future': None,
+            **meta
+        }
+        cached = get_pdf_cache().get(key) is not None
+
+        with self._lock:
+            self._prune()
+            if not cached:
+                job['future'] = self._submit(kind, key, data)
+            self._jobs[job_id] = job
+        return job_id
+
+    def get_job(self, job_id):
+        """Job dict (without the source rows), or None if unknown or expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+
+        future = job['future']
+        status, error = 'done', None
+        if future is not None:
+            if not future.done():
+                status = 'rendering' if future.running() else 'queued'
+            elif future.exception() is not None:
+                status, error = 'failed', str(future.exception())
+
+        info = {k: v for k, v in job.items() if k not in ('data', 'future')}
+        info['status'] = status
+        if error:
+            info['error'] = error
+        return info
+
+    def get_job_pdf(self, job_id):
+        """PDF bytes for a finished job, re-rendering if the cache evicted it"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        content = get_pdf_cache().get(job['key'])
+        future = job['future']
+        if content is None and future is not None and future.done() and future.exception() is None:
+            # Finished, but the done-callback hasn't stored it yet
+            content = future.result()
+        if content is None:
+            content = get_pdf_cache().get_or_render(
+                job['key'], lambda: self.render(job['kind'], job['data'])
+            )
+        return content
+
+    def _prune(self):
+        """Forget finished jobs older than JOB_RETENTION (call with lock held)"""
+        cutoff = time.time() - JOB_RETENTION
+        for job_id in [j for j, job in self._jobs.items()
+                       if job['created_at'] < cutoff and (job['future'] is None or job['future'].done())]:
+            del self._jobs[job_id]
+
+    def stats(self):
+        """Counters for the health endpoint"""
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'started': self._executor is not None,
+                'in_flight': len(self._pending),
+                'jobs': len(self._jobs),
+                'rendered': self.rendered,
+                'render_failures': self.render_failures
+            }
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_service = PdfRenderService()
+atexit.register(_service.shutdown)
+
+
+def render_pdf(kind, data):
+    """Render a 'vto' or 'l10' PDF in the worker pool and return its bytes"""
+    return _service.render(kind, data)
+
+
+def submit_pdf_job(kind, data, filename, **meta):
+    """Queue a 'vto' or 'l10' render, return a job id"""
+    return _service.submit(kind, data, filename, **meta)
+
+
+def get_pdf_job(job_id):
+    """Get render job status"""
+    return _service.get_job(job_id)
+
+
+def get_pdf_job_content(job_id):
+    """Get the PDF bytes for a finished render job"""
+    return _service.get_job_pdf(job_id)
+
+
+def get_pdf_job_stats():
+    """Get render pool counters"""
+    return _service.stats()
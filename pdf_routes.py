@@ -2,16 +2,94 @@
 PDF Generation Routes for EOS Platform
 """
 
-from flask import session, send_file, abort
+from flask import session, send_file, abort, request, Response, jsonify
+from io import BytesIO
 from datetime import datetime
 from db_utils import get_db_connection
 from auth import login_required, can_access_division
-from pdf_generator import generate_vto_pdf, generate_l10_pdf
+from pdf_generator import fetch_vto_data, fetch_l10_data
+from pdf_cache import content_key, get_pdf_cache
+from pdf_jobs import render_pdf, submit_pdf_job, get_pdf_job, get_pdf_job_content
+
+
+def _load_vto(division_id):
+    """Fetch VTO rows, return (data, download filename)"""
+    with get_db_connection() as db:
+        data = fetch_vto_data(division_id, db)
+
+    division_name = data['division_name']
+    if division_name == "Unknown Division":
+        division_name = f"Division_{division_id}"
+    return data, f"VTO_{division_name}_{datetime.now().strftime('%Y%m%d')}.pdf"
+
+
+def _load_l10(division_id, meeting_id):
+    """Fetch L10 rows, return (data, download filename); 404 if not in this division"""
+    with get_db_connection() as db:
+        data = fetch_l10_data(meeting_id, db)
+
+    # Verify meeting belongs to this division
+    if not data or data['meeting']['division_id'] != division_id:
+        abort(404)
+
+    meeting = data['meeting']
+    division_name = meeting['division_name'] or f"Division_{division_id}"
+    meeting_date = meeting['meeting_date'] or datetime.now().strftime('%Y%m%d')
+    return data, f"L10_{division_name}_{meeting_date}.pdf"
+
+
+def _pdf_response(content, filename, etag):
+    """Attachment response for cached PDF bytes"""
+    response = send_file(
+        BytesIO(content),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=filename,
+        etag=etag
+    )
+    # Browsers keep the file but revalidate, so edits show up on the next download
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _not_modified(etag):
+    """304 for a client that already holds this PDF"""
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _send_cached_pdf(kind, data, filename):
+    """
+    Serve a PDF from the content-addressed cache, rendering in the worker pool on a miss
+    A matching If-None-Match gets 304 without touching the cache at all.
+    """
+    etag = content_key(kind, data)
+    if etag in request.if_none_match:
+        return _not_modified(etag)
+
+    content = get_pdf_cache().get_or_render(etag, lambda: render_pdf(kind, data))
+    return _pdf_response(content, filename, etag)
+
+
+def _submit_job(kind, division_id, data, filename):
+    """Queue a render and describe where to poll for it"""
+    user = session.get('user')
+    job_id = submit_pdf_job(kind, data, filename, division_id=division_id, requested_by=user['id'])
+    job = get_pdf_job(job_id)
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status': job['status'],
+        'status_url': f'/division/{division_id}/pdf/jobs/{job_id}',
+        'download_url': f'/division/{division_id}/pdf/jobs/{job_id}/download'
+    }), 202
 
 
 def register_pdf_routes(app):
     """Register PDF generation routes"""
-    
+
     @app.route('/division/<int:division_id>/vto/pdf')
     @login_required
     def download_vto_pdf(division_id):
@@ -20,30 +98,14 @@ def register_pdf_routes(app):
         user = session.get('user')
         if not can_access_division(user, division_id):
             abort(403)
-        
+
         try:
-            with get_db_connection() as db:
-                pdf_buffer = generate_vto_pdf(division_id, db)
-            
-            # Get division name
-            with get_db_connection() as db:
-                cursor = db.cursor()
-                cursor.execute("SELECT name FROM divisions WHERE id = ?", (division_id,))
-                division = cursor.fetchone()
-                division_name = division[0] if division else f"Division_{division_id}"
-            
-            filename = f"VTO_{division_name}_{datetime.now().strftime('%Y%m%d')}.pdf"
-            
-            return send_file(
-                pdf_buffer,
-                mimetype='application/pdf',
-                as_attachment=True,
-                download_name=filename
-            )
+            data, filename = _load_vto(division_id)
+            return _send_cached_pdf('vto', data, filename)
         except Exception as e:
             app.logger.error(f"Error generating VTO PDF: {e}")
             abort(500)
-    
+
     @app.route('/division/<int:division_id>/l10/<int:meeting_id>/pdf')
     @login_required
     def download_l10_pdf(division_id, meeting_id):
@@ -52,38 +114,68 @@ def register_pdf_routes(app):
         user = session.get('user')
         if not can_access_division(user, division_id):
             abort(403)
-        
+
+        data, filename = _load_l10(division_id, meeting_id)
         try:
-            with get_db_connection() as db:
-                # Verify meeting belongs to this division
-                cursor = db.cursor()
-                cursor.execute(
-                    "SELECT meeting_date FROM l10_meetings WHERE id = ? AND division_id = ?",
-                    (meeting_id, division_id)
-                )
-                meeting = cursor.fetchone()
-                
-                if not meeting:
-                    abort(404)
-                
-                pdf_buffer = generate_l10_pdf(meeting_id, db)
-            
-            # Get division name
-            with get_db_connection() as db:
-                cursor = db.cursor()
-                cursor.execute("SELECT name FROM divisions WHERE id = ?", (division_id,))
-                division = cursor.fetchone()
-                division_name = division[0] if division else f"Division_{division_id}"
-            
-            meeting_date = meeting[0] if meeting else datetime.now().strftime('%Y%m%d')
-            filename = f"L10_{division_name}_{meeting_date}.pdf"
-            
-            return send_file(
-                pdf_buffer,
-                mimetype='application/pdf',
-                as_attachment=True,
-                download_name=filename
-            )
+            return _send_cached_pdf('l10', data, filename)
         except Exception as e:
             app.logger.error(f"Error generating L10 PDF: {e}")
             abort(500)
+
+    # ===== BACKGROUND RENDER JOBS =====
+
+    @app.route('/division/<int:division_id>/vto/pdf/jobs', methods=['POST'])
+    @login_required
+    def submit_vto_pdf_job(division_id):
+        """Queue a VTO PDF render, return a job id to poll"""
+        user = session.get('user')
+        if not can_access_division(user, division_id):
+            return jsonify({'success': False, 'error': 'Access denied'}), 403
+
+        data, filename = _load_vto(division_id)
+        return _submit_job('vto', division_id, data, filename)
+
+    @app.route('/division/<int:division_id>/l10/<int:meeting_id>/pdf/jobs', methods=['POST'])
+    @login_required
+    def submit_l10_pdf_job(division_id, meeting_id):
+        """Queue an L10 Meeting PDF render, return a job id to poll"""
+        user = session.get('user')
+        if not can_access_division(user, division_id):
+            return jsonify({'success': False, 'error': 'Access denied'}), 403
+
+        data, filename = _load_l10(division_id, meeting_id)
+        return _submit_job('l10', division_id, data, filename)
+
+    @app.route('/division/<int:division_id>/pdf/jobs/<job_id>')
+    @login_required
+    def pdf_job_status(division_id, job_id):
+        """Get status of a queued PDF render"""
+        user = session.get('user')
+        if not can_access_division(user, division_id):
+            return jsonify({'success': False, 'error': 'Access denied'}), 403
+
+        job = get_pdf_job(job_id)
+        if not job or job['division_id'] != division_id:
+            return jsonify({'success': False, 'error': 'Job not found'}), 404
+
+        return jsonify({'success': True, **job})
+
+    @app.route('/division/<int:division_id>/pdf/jobs/<job_id>/download')
+    @login_required
+    def download_pdf_job(division_id, job_id):
+        """Download the PDF from a finished render job"""
+        user = session.get('user')
+        if not can_access_division(user, division_id):
+            abort(403)
+
+        job = get_pdf_job(job_id)
+        if not job or job['division_id'] != division_id:
+            abort(404)
+        if job['status'] == 'failed':
+            return jsonify({'success': False, 'error': job.get('error', 'Render failed')}), 500
+        if job['status'] != 'done':
+            return jsonify({'success': False, 'status': job['status'], 'error': 'Still rendering'}), 409
+
+        if job['key'] in request.if_none_match:
+            return _not_modified(job['key'])
+        return _pdf_response(get_pdf_job_content(job_id), job['filename'], job['key'])
@@ -5,21 +5,11 @@ Quarterly priorities and goals (90-day rocks)
 
 from flask import render_template, request, redirect, url_for, flash, jsonify, session
 from auth import login_required, division_access_required, division_edit_required, can_edit_division
-from db_utils import log_to_audit
-import sqlite3
-from pathlib import Path
+from db_utils import get_db, log_to_audit
+from history_triggers import history_mark, recorded_changes
+from audit_history import get_history_page, HISTORY_PAGE_SIZE
 from datetime import datetime
 
-DATABASE_PATH = Path(__file__).parent / 'eos_data.db'
-
-def get_db():
-    """Get database connection with timeout for concurrent access"""
-    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
-    conn.row_factory = sqlite3.Row
-    conn.execute('PRAGMA journal_mode=WAL')
-    conn.execute('PRAGMA synchronous=NORMAL')
-    conn.execute('PRAGMA busy_timeout=30000')
-    return conn
 
 def register_rocks_routes(app):
     """Register rocks-related routes"""
@@ -76,27 +66,24 @@ def register_rocks_routes(app):
             'completion_pct': round((on_track / total * 100) if total > 0 else 0, 1)
         }
         
-        # Get current quarter
-        current_month = datetime.now().month
-        current_quarter = f"Q{(current_month - 1) // 3 + 1}"
-        current_year = datetime.now().year
-        
-        conn.close()
-        
-        can_edit = can_edit_division(user, division_id)
-
         # Get division users for owner dropdown
-        conn2 = get_db()
-        cursor2 = conn2.cursor()
-        cursor2.execute("""
+        cursor.execute("""
             SELECT DISTINCT u.id, u.full_name
             FROM users u
             JOIN user_roles ur ON u.id = ur.user_id
             WHERE ur.division_id = ? AND u.is_active = 1
             ORDER BY u.full_name
         """, (division_id,))
-        users = [dict(row) for row in cursor2.fetchall()]
-        conn2.close()
+        users = [dict(row) for row in cursor.fetchall()]
+        
+        conn.close()
+        
+        # Get current quarter
+        current_month = datetime.now().month
+        current_quarter = f"Q{(current_month - 1) // 3 + 1}"
+        current_year = datetime.now().year
+        
+        can_edit = can_edit_division(user, division_id)
         
         return render_template('rocks.html',
                              user=user,
@@ -207,12 +194,9 @@ def register_rocks_routes(app):
             
             conn = get_db()
             cursor = conn.cursor()
+            mark = history_mark(conn, 'rocks')
             
-            # Get old values for history tracking
-            cursor.execute("SELECT * FROM rocks WHERE id = ? AND division_id = ?", (rock_id, division_id))
-            old_rock = dict(cursor.fetchone())
-            
-            # Update rock
+            # Update rock (rocks_history rows for changed fields are written by trigger)
             cursor.execute("""
                 UPDATE rocks
                 SET description = ?, owner = ?, status = ?, quarter = ?, year = ?,
@@ -221,33 +205,19 @@ def register_rocks_routes(app):
                 WHERE id = ? AND division_id = ?
             """, (description, owner, status, quarter, year, due_date, priority, progress,
                   user['id'], rock_id, division_id))
-            
-            # Track changes in history
-            changes = {}
-            if old_rock['description'] != description:
-                changes['description'] = {'old': old_rock['description'], 'new': description}
-            if old_rock['status'] != status:
-                changes['status'] = {'old': old_rock['status'], 'new': status}
-            if old_rock['progress'] != progress:
-                changes['progress'] = {'old': old_rock['progress'], 'new': progress}
-            
-            if changes:
-                for field, change in changes.items():
-                    cursor.execute("""
-                        INSERT INTO rocks_history (rock_id, field_changed, old_value, new_value, changed_by)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, (rock_id, field, str(change['old']), str(change['new']), user['id']))
+            changes = recorded_changes(conn, 'rocks', rock_id, mark)
             
             conn.commit()
             conn.close()
             
-            log_to_audit(
-                user['id'], 'rocks', rock_id, 'UPDATE',
-                changes=changes,
-                organization_id=1,
-                division_id=division_id,
-                ip_address=request.remote_addr
-            )
+            if changes:
+                log_to_audit(
+                    user['id'], 'rocks', rock_id, 'UPDATE',
+                    changes=changes,
+                    organization_id=1,
+                    division_id=division_id,
+                    ip_address=request.remote_addr
+                )
             
             flash('Rock updated successfully', 'success')
             return redirect(url_for('division_rocks', division_id=division_id))
@@ -276,8 +246,9 @@ def register_rocks_routes(app):
             FROM rocks_history rh
             LEFT JOIN users u ON rh.changed_by = u.id
             WHERE rh.rock_id = ?
-            ORDER BY rh.changed_at DESC
-        """, (rock_id,))
+            ORDER BY rh.changed_at DESC, rh.id DESC
+            LIMIT ?
+        """, (rock_id, HISTORY_PAGE_SIZE))
         
         history = [dict(row) for row in cursor.fetchall()]
         conn.close()
@@ -398,6 +369,27 @@ def register_rocks_routes(app):
 
         return jsonify({'success': True, 'rocks': rocks})
 
+    @app.route('/api/division/<int:division_id>/rocks/<int:rock_id>/history')
+    @login_required
+    @division_access_required('division_id')
+    def api_rock_history(division_id, rock_id):
+        """Rock change history, newest first, paged with ?cursor=&limit="""
+        conn = get_db()
+        try:
+            rock = conn.execute("SELECT id FROM rocks WHERE id = ? AND division_id = ?",
+                                (rock_id, division_id)).fetchone()
+            if not rock:
+                return jsonify({'success': False, 'error': 'Rock not found'}), 404
+            page = get_history_page(conn, 'rocks_history', rock_id,
+                                    cursor=request.args.get('cursor'),
+                                    limit=request.args.get('limit', HISTORY_PAGE_SIZE, type=int))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        finally:
+            conn.close()
+
+        return jsonify({'success': True, 'history': page['items'], 'next_cursor': page['next_cursor']})
+
     @app.route('/api/division/<int:division_id>/rocks', methods=['POST'])
     @login_required
     @division_edit_required('division_id')
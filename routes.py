@@ -3,27 +3,18 @@ EOS Platform - Flask Routes for Multi-Tenant System
 Login, Dashboard, Division Selection, and Authentication
 """
 
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, make_response
 from auth import (
-    authenticate_user, login_required, parent_admin_required,
+    authenticate_user, LoginThrottled, LoginBusy, login_required, parent_admin_required,
     division_access_required, division_edit_required,
-    get_user_divisions, can_edit_division, can_access_division,
+    get_user_divisions, can_edit_division, can_access_division, is_parent_admin,
     create_division, log_action, is_saml_enabled, get_authentication_methods
 )
-import sqlite3
-from pathlib import Path
+from db_utils import get_db
+from audit_history import get_audit_page, HISTORY_PAGE_SIZE
+from division_summary import get_division_summaries, get_division_summary
 from datetime import datetime
 
-DATABASE_PATH = Path(__file__).parent / 'eos_data.db'
-
-def get_db():
-    """Get database connection with timeout for concurrent access"""
-    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
-    conn.row_factory = sqlite3.Row
-    conn.execute('PRAGMA journal_mode=WAL')
-    conn.execute('PRAGMA synchronous=NORMAL')
-    conn.execute('PRAGMA busy_timeout=30000')
-    return conn
 
 # =====================================================
 # AUTHENTICATION ROUTES
@@ -42,7 +33,18 @@ def register_auth_routes(app):
             username = request.form.get('username')
             password = request.form.get('password')
             
-            user = authenticate_user(username, password)
+            try:
+                user = authenticate_user(username, password, ip_address=request.remote_addr)
+            except LoginThrottled as e:
+                flash(f'Too many login attempts. Please try again in {e.retry_after} seconds.', 'danger')
+                response = make_response(render_template('login.html', auth_methods=auth_methods), 429)
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response
+            except LoginBusy:
+                flash('Login is busy right now. Please try again in a moment.', 'warning')
+                response = make_response(render_template('login.html', auth_methods=auth_methods), 503)
+                response.headers['Retry-After'] = '5'
+                return response
             
             if user:
                 session['user'] = user
@@ -103,11 +105,12 @@ def register_dashboard_routes(app):
         Parent admins: See all divisions
         Division users: See their assigned divisions
         """
-        user = session.get('user')
+        # The session's is_parent_admin is a login-time snapshot; use the live role
+        user = dict(session.get('user'), is_parent_admin=is_parent_admin(session.get('user')))
         divisions = get_user_divisions(user)
         
         # If user has access to only one division, go directly to it
-        if len(divisions) == 1 and not user.get('is_parent_admin'):
+        if len(divisions) == 1 and not user['is_parent_admin']:
             return redirect(url_for('division_dashboard', division_id=divisions[0]['id']))
         
         # Otherwise show division selector
@@ -118,35 +121,17 @@ def register_dashboard_routes(app):
         cursor.execute("SELECT * FROM organizations WHERE id = 1")
         organization = dict(cursor.fetchone())
         
-        # Enrich division data with metrics
+        # Enrich division data with metrics (one read for all divisions)
+        summaries = get_division_summaries(conn, [d['id'] for d in divisions])
         for division in divisions:
-            # Get active rocks count
-            cursor.execute("""
-                SELECT COUNT(*) as count 
-                FROM rocks 
-                WHERE division_id = ? AND is_active = 1
-            """, (division['id'],))
-            division['rocks_count'] = cursor.fetchone()['count']
-            
-            # Get open issues count
-            cursor.execute("""
-                SELECT COUNT(*) as count 
-                FROM issues 
-                WHERE division_id = ? AND status = 'OPEN' AND is_active = 1
-            """, (division['id'],))
-            division['issues_count'] = cursor.fetchone()['count']
-            
-            # Get pending todos count
-            cursor.execute("""
-                SELECT COUNT(*) as count 
-                FROM todos 
-                WHERE division_id = ? AND status IN ('OPEN', 'IN PROGRESS') AND is_active = 1
-            """, (division['id'],))
-            division['todos_count'] = cursor.fetchone()['count']
+            counts = summaries[division['id']]
+            division['rocks_count'] = counts['rocks_total']
+            division['issues_count'] = counts['issues_open']
+            division['todos_count'] = counts['todos_pending']
         
         # Corporate summary for parent admins
         corporate_summary = None
-        if user.get('is_parent_admin'):
+        if user['is_parent_admin']:
             cursor.execute("SELECT COUNT(*) as count FROM vto WHERE division_id IS NULL AND is_active = 1")
             corp_vto = cursor.fetchone()['count'] > 0
             cursor.execute("SELECT COUNT(*) as count FROM accountability_chart WHERE division_id IS NULL AND is_active = 1")
@@ -184,78 +169,46 @@ def register_dashboard_routes(app):
         division = dict(cursor.fetchone())
         
         # Get summary metrics for each card
-        
-        # ROCKS
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN status = 'COMPLETE' THEN 1 ELSE 0 END) as complete,
-                SUM(CASE WHEN status IN ('ON TRACK', 'COMPLETE') THEN 1 ELSE 0 END) as on_track
-            FROM rocks
-            WHERE division_id = ? AND is_active = 1
-        """, (division_id,))
-        rocks_summary = dict(cursor.fetchone())
-        
-        # SCORECARD
+        counts = get_division_summary(conn, division_id)
+        rocks_summary = {
+            'total': counts['rocks_total'],
+            'complete': counts['rocks_complete'],
+            'on_track': counts['rocks_on_track']
+        }
+        scorecard_summary = {
+            'total': counts['scorecard_total'],
+            'green': counts['scorecard_green'],
+            'yellow': counts['scorecard_yellow'],
+            'red': counts['scorecard_red']
+        }
+        issues_summary = {
+            'total': counts['issues_total'],
+            'high': counts['issues_high'],
+            'open': counts['issues_open']
+        }
+        todos_summary = {
+            'total': counts['todos_total'],
+            'open': counts['todos_open'],
+            'complete': counts['todos_complete']
+        }
+        l10_summary = {
+            'total': counts['l10_total'],
+            'upcoming': counts['l10_upcoming'],
+            'avg_duration': (counts['l10_duration_sum'] / counts['l10_duration_count']
+                             if counts['l10_duration_count'] else None)
+        }
+        
+        # VTO and ACCOUNTABILITY (check if exists)
         cursor.execute("""
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN status = 'GREEN' THEN 1 ELSE 0 END) as green,
-                SUM(CASE WHEN status = 'YELLOW' THEN 1 ELSE 0 END) as yellow,
-                SUM(CASE WHEN status = 'RED' THEN 1 ELSE 0 END) as red
-            FROM scorecard_metrics
-            WHERE division_id = ? AND is_active = 1
-        """, (division_id,))
-        scorecard_summary = dict(cursor.fetchone())
-        
-        # ISSUES
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN priority = 'HIGH' THEN 1 ELSE 0 END) as high,
-                SUM(CASE WHEN status = 'OPEN' THEN 1 ELSE 0 END) as open
-            FROM issues
-            WHERE division_id = ? AND is_active = 1
-        """, (division_id,))
-        issues_summary = dict(cursor.fetchone())
-        
-        # TODOS
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN status = 'OPEN' THEN 1 ELSE 0 END) as open,
-                SUM(CASE WHEN status = 'COMPLETE' THEN 1 ELSE 0 END) as complete
-            FROM todos
-            WHERE division_id = ? AND is_active = 1
-        """, (division_id,))
-        todos_summary = dict(cursor.fetchone())
-        
-        # VTO (check if exists)
-        cursor.execute("""
-            SELECT COUNT(*) as count
-            FROM vto
-            WHERE division_id = ? AND is_active = 1
-        """, (division_id,))
-        vto_exists = cursor.fetchone()['count'] > 0
-        
-        # ACCOUNTABILITY (check if exists)
-        cursor.execute("""
-            SELECT COUNT(*) as count
-            FROM accountability_chart
-            WHERE division_id = ? AND is_active = 1
-        """, (division_id,))
-        accountability_count = cursor.fetchone()['count']
-        
-        # L10 MEETINGS
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN status IN ('SCHEDULED', 'IN_PROGRESS') THEN 1 ELSE 0 END) as upcoming,
-                AVG(CAST(actual_duration_minutes AS FLOAT)) as avg_duration
-            FROM l10_meetings
-            WHERE division_id = ?
-        """, (division_id,))
-        l10_summary = dict(cursor.fetchone())
+            SELECT
+                (SELECT COUNT(*) FROM vto
+                 WHERE division_id = ? AND is_active = 1) as vto_count,
+                (SELECT COUNT(*) FROM accountability_chart
+                 WHERE division_id = ? AND is_active = 1) as accountability_count
+        """, (division_id, division_id))
+        row = cursor.fetchone()
+        vto_exists = row['vto_count'] > 0
+        accountability_count = row['accountability_count']
         
         conn.close()
         
@@ -351,6 +304,32 @@ def register_admin_routes(app):
         conn.close()
         
         return render_template('admin_users.html', user=user, users=users)
+    
+    @app.route('/api/admin/audit')
+    @parent_admin_required
+    def api_admin_audit():
+        """
+        Audit log, newest first, paged with ?cursor=&limit=
+        Filters: table, record_id, user_id, since, until (YYYY-MM-DD[ HH:MM:SS], UTC)
+        """
+        conn = get_db()
+        try:
+            page = get_audit_page(
+                conn,
+                table_name=request.args.get('table'),
+                record_id=request.args.get('record_id', type=int),
+                user_id=request.args.get('user_id', type=int),
+                since=request.args.get('since'),
+                until=request.args.get('until'),
+                cursor=request.args.get('cursor'),
+                limit=request.args.get('limit', HISTORY_PAGE_SIZE, type=int)
+            )
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        finally:
+            conn.close()
+        
+        return jsonify({'success': True, 'entries': page['items'], 'next_cursor': page['next_cursor']})
 
 # =====================================================
 # API ROUTES
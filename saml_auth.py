@@ -4,33 +4,125 @@ Integrates with Identity Center for Single Sign-On
 """
 
 import os
+import copy
 import json
+import hashlib
+import threading
 from pathlib import Path
 from urllib.parse import urlparse
 from flask import request, session, redirect, url_for, make_response
 from onelogin.saml2.auth import OneLogin_Saml2_Auth
+from onelogin.saml2.settings import OneLogin_Saml2_Settings
 from onelogin.saml2.utils import OneLogin_Saml2_Utils
 from onelogin.saml2.errors import OneLogin_Saml2_Error
-import sqlite3
 from datetime import datetime
 
-DATABASE_PATH = Path(__file__).parent / 'eos_data.db'
+from db_utils import get_db
+from auth import get_user_permissions, invalidate_permissions
+
 SAML_SETTINGS_FILE = Path(__file__).parent / 'saml_settings.json'
 
 # =====================================================
 # SAML CONFIGURATION LOADER
 # =====================================================
 
+class SamlSettingsCache:
+    """
+    Parsed saml_settings.json, the OneLogin settings object built from it
+    (certificates included) and the SP metadata XML
+    Everything is rebuilt only when the file's mtime or size changes, so a
+    login, ACS callback or metadata request costs one stat().
+    """
+
+    def __init__(self, path=SAML_SETTINGS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature = None
+        self._raw = None
+        self._settings = None
+        self._metadata = None  # (xml, etag)
+        self.loads = 0
+        self.hits = 0
+
+    def _load(self):
+        """Return (raw dict, settings object or None), re-reading the file if it changed"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            raise FileNotFoundError(
+                f"SAML settings file not found: {self.path}\n"
+                "Run: python configure_saml.py to create it."
+            )
+        signature = (st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            if signature == self._signature:
+                self.hits += 1
+            else:
+                with open(self.path, 'r') as f:
+                    self._raw = json.load(f)
+                self._settings = None
+                self._metadata = None
+                self._signature = signature
+                self.loads += 1
+            return self._raw, self._settings
+
+    def raw(self):
+        """Settings dict as read from the file (shared - don't modify)"""
+        return self._load()[0]
+
+    def settings(self):
+        """OneLogin_Saml2_Settings object, safe to share between requests"""
+        raw, settings = self._load()
+        if settings is not None:
+            return settings
+
+        # OneLogin fills in defaults on the dicts it is given, so hand it a copy
+        settings = OneLogin_Saml2_Settings(copy.deepcopy(raw))
+        with self._lock:
+            # Keep it only if the file didn't change while we parsed it
+            if self._raw is raw and self._settings is None:
+                self._settings = settings
+        return settings
+
+    def metadata(self):
+        """(xml, etag) for the SP metadata; raises OneLogin_Saml2_Error if it doesn't validate"""
+        settings = self.settings()
+        with self._lock:
+            if self._metadata is not None and settings is self._settings:
+                return self._metadata
+
+        metadata = settings.get_sp_metadata()
+        errors = settings.validate_metadata(metadata)
+        if errors:
+            raise OneLogin_Saml2_Error(
+                f"Metadata validation error: {', '.join(errors)}",
+                OneLogin_Saml2_Error.METADATA_SP_INVALID
+            )
+        if isinstance(metadata, str):
+            metadata = metadata.encode('utf-8')
+        entry = (metadata, hashlib.sha256(metadata).hexdigest()[:32])
+
+        with self._lock:
+            # Keep it only if the file didn't change while we built it
+            if settings is self._settings:
+                self._metadata = entry
+        return entry
+
+    def stats(self):
+        """Counters for the health endpoint"""
+        with self._lock:
+            return {'loads': self.loads, 'hits': self.hits, 'metadata_cached': self._metadata is not None}
+
+_settings_cache = SamlSettingsCache()
+
 def load_saml_settings():
-    """Load SAML settings from configuration file"""
-    if not SAML_SETTINGS_FILE.exists():
-        raise FileNotFoundError(
-            f"SAML settings file not found: {SAML_SETTINGS_FILE}\n"
-            "Run: python configure_saml.py to create it."
-        )
-    
-    with open(SAML_SETTINGS_FILE, 'r') as f:
-        return json.load(f)
+    """Load SAML settings from configuration file (cached until the file changes)"""
+    return _settings_cache.raw()
+
+def get_saml_cache_stats():
+    """Settings cache counters"""
+    return _settings_cache.stats()
 
 # =====================================================
 # SAML REQUEST PREPARATION
@@ -59,8 +151,7 @@ def prepare_flask_request(request_obj):
 
 def init_saml_auth(req):
     """Initialize SAML authentication object"""
-    saml_settings = load_saml_settings()
-    auth = OneLogin_Saml2_Auth(req, saml_settings)
+    auth = OneLogin_Saml2_Auth(req, _settings_cache.settings())
     return auth
 
 def saml_login(return_to=None):
@@ -151,6 +242,7 @@ def saml_acs():
         'roles': eos_roles,
         'is_parent_admin': any(r['role_name'] == 'PARENT_ADMIN' for r in eos_roles)
     }
+    get_user_permissions(user['id'], refresh=True)
     session['auth_method'] = 'saml'
     session['saml_session_index'] = session_index
     session['saml_nameid'] = nameid
@@ -191,21 +283,24 @@ def saml_metadata():
     Generate SAML Service Provider metadata
     AWS Identity Center needs this to configure the application
     
+    Served from the settings cache with an ETag; 304 when the client's copy
+    is current
+    
     Returns:
         XML metadata document
     """
-    req = prepare_flask_request(request)
-    auth = init_saml_auth(req)
-    
-    settings = auth.get_settings()
-    metadata = settings.get_sp_metadata()
-    errors = settings.validate_metadata(metadata)
-    
-    if errors:
-        return make_response(f"Metadata validation error: {', '.join(errors)}", 500)
-    
-    resp = make_response(metadata)
-    resp.headers['Content-Type'] = 'text/xml'
+    try:
+        metadata, etag = _settings_cache.metadata()
+    except OneLogin_Saml2_Error as e:
+        return make_response(str(e), 500)
+    
+    if etag in request.if_none_match:
+        resp = make_response('', 304)
+    else:
+        resp = make_response(metadata)
+        resp.headers['Content-Type'] = 'text/xml'
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'no-cache'
     return resp
 
 # =====================================================
@@ -222,8 +317,7 @@ def get_or_create_sso_user(user_info):
     Returns:
         User dict or None
     """
-    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
-    conn.row_factory = sqlite3.Row
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
@@ -300,8 +394,7 @@ def map_sso_groups_to_roles(sso_groups, user_id):
         'Steensma-ReadOnly': 'USER_RO'
     }
     
-    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
-    conn.row_factory = sqlite3.Row
+    conn = get_db()
     cursor = conn.cursor()
     
     roles = []
@@ -346,6 +439,7 @@ def map_sso_groups_to_roles(sso_groups, user_id):
             })
         
         conn.commit()
+        invalidate_permissions(user_id)
         
     except Exception as e:
         conn.rollback()
@@ -5,20 +5,9 @@ Weekly measurables and metrics tracking with gross profit display
 
 from flask import render_template, request, redirect, url_for, flash, jsonify, session
 from auth import login_required, division_access_required, division_edit_required, log_action, can_edit_division
-import sqlite3
-from pathlib import Path
+from db_utils import get_db
 from datetime import datetime
 
-DATABASE_PATH = Path(__file__).parent / 'eos_data.db'
-
-def get_db():
-    """Get database connection with timeout for concurrent access"""
-    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
-    conn.row_factory = sqlite3.Row
-    conn.execute('PRAGMA journal_mode=WAL')
-    conn.execute('PRAGMA synchronous=NORMAL')
-    conn.execute('PRAGMA busy_timeout=30000')
-    return conn
 
 def register_scorecard_routes(app):
     """Register scorecard-related routes"""
@@ -68,8 +57,9 @@ def register_scorecard_routes(app):
         # Get gross profit data
         gross_profit = None
         try:
-            from financial_parser import parse_site_lead_statement
-            gross_profit = parse_site_lead_statement(division_name=division['name'])
+            from financial_snapshots import refresh_financial_snapshots, get_latest_snapshot
+            refresh_financial_snapshots()
+            gross_profit = get_latest_snapshot(conn, division_id)
         except Exception:
             pass
 
@@ -246,17 +236,14 @@ def register_scorecard_routes(app):
     @login_required
     @division_access_required('division_id')
     def get_gross_profit_data(division_id):
-        """API endpoint to fetch gross profit data from Site Lead file"""
+        """API endpoint to fetch gross profit data from the latest Site Lead statement"""
         try:
+            from financial_snapshots import refresh_financial_snapshots, get_latest_snapshot
+            refresh_financial_snapshots()
+
             conn = get_db()
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM divisions WHERE id = ?", (division_id,))
-            row = cursor.fetchone()
+            data = get_latest_snapshot(conn, division_id)
             conn.close()
-            division_name = row['name'] if row else None
-
-            from financial_parser import parse_site_lead_statement
-            data = parse_site_lead_statement(division_name=division_name)
             return jsonify(data)
         except Exception as e:
             return jsonify({
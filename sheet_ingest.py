@@ -0,0 +1,359 @@
+"""
+EOS Platform - Sheet Ingestion
+Applies the rocks/issues/todos/scorecard CSVs that eos_sync pulls from
+Google Drive to the division's SQLite tables. Sheet rows are matched to DB
+rows by natural key (rock description, issue text, task, metric name) and
+only the inserts, changed fields and soft-deletes are written, in one
+transaction - a one-row edit to a 5k-row sheet updates one row. Field-level
+rocks/issues history is written by the history triggers, attributed to
+eos_sync through updated_by; the per-row CREATE/UPDATE/DELETE audit_log
+entries go through audit_sink once the transaction has committed.
+
+The sheet_rows table remembers which DB row each sheet row maps to and a
+hash of its sheet values, so unchanged rows are skipped without reading
+the target table, and rows created in the web app are never touched.
+
+Usage: python sheet_ingest.py [file ...]   (default: every sheet in datasheets/)
+"""
+
+import csv
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from audit_sink import write_audit
+from financial_parser import DATASHEETS_DIR
+from history_triggers import ensure_history_triggers
+
+# Division (slug) the Drive sheets belong to - the original single-site data
+SHEET_DIVISION = os.environ.get('EOS_SHEET_DIVISION', 'plainwell')
+SYNC_USER = 'eos_sync'
+
+
+def _text(value):
+    return ' '.join(value.split()) if value else None
+
+
+def _upper(default):
+    return lambda value: (_text(value) or default).upper()
+
+
+def _owner(value):
+    return _text(value) or 'Unassigned'
+
+
+def _int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _float(value):
+    try:
+        return float(value.replace('$', '').replace(',', ''))
+    except (AttributeError, ValueError):
+        return None
+
+
+def _completed(value):
+    return int(_upper('OPEN')(value) == 'COMPLETE')
+
+
+def _current_quarter():
+    now = datetime.now()
+    return f"Q{(now.month - 1) // 3 + 1}", now.year
+
+
+# Per sheet: target table, key column, (CSV header, DB column, converter) fields,
+# columns set only on insert, and whether the table has updated_at/updated_by
+SHEETS = {
+    'rocks.csv': {
+        'table': 'rocks',
+        'key': 'description',
+        'fields': [
+            ('Description', 'description', _text),
+            ('Owner', 'owner', _owner),
+            ('Status', 'status', _upper('NOT STARTED')),
+            ('DueDate', 'due_date', _text),
+            ('Progress', 'progress', _int),
+        ],
+        'on_insert': lambda: dict(zip(('quarter', 'year'), _current_quarter())),
+        'updated_at': True,
+    },
+    'issues.csv': {
+        'table': 'issues',
+        'key': 'issue',
+        'fields': [
+            ('Issue', 'issue', _text),
+            ('Priority', 'priority', _upper('MEDIUM')),
+            ('Owner', 'owner', _owner),
+            ('DateAdded', 'date_added', _text),
+            ('Status', 'status', _upper('OPEN')),
+        ],
+        'on_insert': lambda: {},
+        'updated_at': True,
+    },
+    'todos.csv': {
+        'table': 'todos',
+        'key': 'task',
+        'fields': [
+            ('Task', 'task', _text),
+            ('Owner', 'owner', _owner),
+            ('DueDate', 'due_date', _text),
+            ('Status', 'status', _upper('OPEN')),
+            ('Status', 'is_completed', _completed),
+            ('Source', 'source', _text),
+        ],
+        'on_insert': lambda: {},
+        'updated_at': True,
+    },
+    'scorecard.csv': {
+        'table': 'scorecard_metrics',
+        'key': 'metric',
+        'fields': [
+            ('Metric', 'metric', _text),
+            ('Owner', 'owner', _owner),
+            ('Goal', 'goal', _text),
+            *((f'Week{i}', f'week_{i}', _float) for i in range(1, 14)),
+            ('Status', 'status', _upper('YELLOW')),
+        ],
+        'on_insert': lambda: {'quarter': ' '.join(map(str, _current_quarter()))},
+        'updated_at': False,
+    },
+}
+
+
+def install_sheet_rows(conn):
+    """Create the sheet_rows mapping table"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sheet_rows (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            division_id INTEGER NOT NULL,
+            natural_key TEXT NOT NULL,
+            record_id INTEGER NOT NULL,
+            row_hash TEXT NOT NULL,
+            is_present BOOLEAN DEFAULT 1,
+            synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (table_name, division_id, natural_key)
+        )
+    """)
+
+
+def natural_key(value):
+    """Match key for a sheet row: whitespace- and case-insensitive"""
+    return ' '.join(str(value or '').split()).lower()
+
+
+def iter_sheet_rows(path, spec):
+    """
+    Stream (natural key, {column: value}) pairs from a pipe-delimited sheet
+    Rows without a key are skipped; repeated keys get a ' #2', ' #3' suffix.
+    """
+    seen = {}
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f, delimiter='|')
+        header = next(reader, None)
+        if header is None:
+            return
+        index = {name.strip(): i for i, name in enumerate(header)}
+        fields = [(index.get(name), column, convert) for name, column, convert in spec['fields']]
+
+        for cells in reader:
+            values = {
+                column: convert(cells[i].strip() if i is not None and i < len(cells) else '')
+                for i, column, convert in fields
+            }
+            key = natural_key(values[spec['key']])
+            if not key:
+                continue
+            seen[key] = seen.get(key, 0) + 1
+            if seen[key] > 1:
+                key = f"{key} #{seen[key]}"
+            yield key, values
+
+
+def _row_hash(values):
+    return hashlib.sha1(json.dumps(values, sort_keys=True).encode()).hexdigest()
+
+
+class _Batch:
+    """Writes collected while diffing, applied together at the end"""
+
+    def __init__(self):
+        self.map_upserts = []
+        self.map_absent = []
+        self.audit = []
+        self.counts = {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+
+
+def _diff_sheet(conn, path, spec, division, batch):
+    """Compare one sheet with the DB, applying row writes and queueing the rest"""
+    table, key_column = spec['table'], spec['key']
+    division_id, org_id = division['id'], division['organization_id']
+    columns = list(dict.fromkeys(column for _, column, _ in spec['fields']))
+
+    mapped = {
+        row[0]: (row[1], row[2], row[3])
+        for row in conn.execute("""
+            SELECT natural_key, record_id, row_hash, is_present FROM sheet_rows
+            WHERE table_name = ? AND division_id = ?
+        """, (table, division_id))
+    }
+    mapped_ids = {record_id for record_id, _, _ in mapped.values()}
+    adoptable = None
+
+    def audit(record_id, action, changes):
+        batch.audit.append({
+            'table_name': table, 'record_id': record_id, 'action': action,
+            'changes': json.dumps(changes, default=str), 'changed_by': SYNC_USER,
+            'organization_id': org_id, 'division_id': division_id
+        })
+
+    def update(record_id, values, reactivate):
+        current = conn.execute(
+            f"SELECT {', '.join(columns)}, is_active FROM {table} WHERE id = ?", (record_id,)
+        ).fetchone()
+        if current is None:
+            return False
+        changes = {column: (current[i], values[column]) for i, column in enumerate(columns)
+                   if current[i] != values[column]}
+        if reactivate or not current[-1]:
+            changes['is_active'] = (current[-1], 1)
+        if not changes:
+            return True
+
+        assignments = [f"{column} = ?" for column in changes]
+        params = [new for _, new in changes.values()]
+        if spec['updated_at']:
+            assignments.append("updated_at = CURRENT_TIMESTAMP")
+            assignments.append("updated_by = ?")
+            params.append(SYNC_USER)
+        conn.execute(f"UPDATE {table} SET {', '.join(assignments)} WHERE id = ?",
+                     params + [record_id])
+
+        audit(record_id, 'UPDATE', {column: new for column, (_, new) in changes.items()})
+        batch.counts['updated'] += 1
+        return True
+
+    present = set()
+    for key, values in iter_sheet_rows(path, spec):
+        present.add(key)
+        row_hash = _row_hash(values)
+        known = mapped.get(key)
+
+        if known is not None:
+            record_id, old_hash, is_present = known
+            if old_hash == row_hash and is_present:
+                batch.counts['unchanged'] += 1
+                continue
+            if update(record_id, values, reactivate=not is_present):
+                batch.map_upserts.append((table, division_id, key, record_id, row_hash))
+                continue
+
+        # New to the sheet: adopt a matching row already in the division, else insert
+        if adoptable is None:
+            adoptable = {}
+            for record_id, value in conn.execute(
+                f"SELECT id, {key_column} FROM {table} WHERE division_id = ? AND is_active = 1 ORDER BY id",
+                (division_id,)
+            ):
+                if record_id not in mapped_ids:
+                    adoptable.setdefault(natural_key(value), record_id)
+        record_id = adoptable.pop(key, None)
+        if record_id is not None and update(record_id, values, reactivate=False):
+            mapped_ids.add(record_id)
+        else:
+            row = {**values, **spec['on_insert'](), 'organization_id': org_id,
+                   'division_id': division_id, 'is_active': 1}
+            record_id = conn.execute(
+                f"INSERT INTO {table} ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                list(row.values())
+            ).lastrowid
+            audit(record_id, 'CREATE', values)
+            batch.counts['inserted'] += 1
+        batch.map_upserts.append((table, division_id, key, record_id, row_hash))
+
+    # Rows that left the sheet are soft-deleted, as the web app does
+    removed = [(key, record_id) for key, (record_id, _, is_present) in mapped.items()
+               if is_present and key not in present]
+    if removed:
+        touch = f", updated_at = CURRENT_TIMESTAMP, updated_by = '{SYNC_USER}'" if spec['updated_at'] else ""
+        conn.executemany(f"UPDATE {table} SET is_active = 0{touch} WHERE id = ?",
+                         [(record_id,) for _, record_id in removed])
+        for key, record_id in removed:
+            batch.map_absent.append((table, division_id, key))
+            audit(record_id, 'DELETE', {'is_active': 0})
+        batch.counts['deleted'] += len(removed)
+
+
+def ingest_sheets(conn, paths=None, division_slug=SHEET_DIVISION):
+    """
+    Apply sheet CSVs to the database in one transaction
+    paths: sheet files to apply (default: every known sheet in datasheets/);
+    files that aren't one of the sheets are ignored.
+    Returns {table: {'inserted', 'updated', 'deleted', 'unchanged'}}.
+    """
+    if paths is None:
+        paths = [os.path.join(DATASHEETS_DIR, name) for name in SHEETS]
+    paths = [path for path in paths
+             if os.path.basename(path).lower() in SHEETS and os.path.exists(path)]
+    if not paths:
+        return {}
+
+    install_sheet_rows(conn)
+    conn.commit()
+    ensure_history_triggers(conn)
+    division = conn.execute(
+        "SELECT id, organization_id FROM divisions WHERE slug = ?", (division_slug,)
+    ).fetchone()
+    if division is None:
+        raise ValueError(f"Unknown division slug '{division_slug}'")
+    division = {'id': division[0], 'organization_id': division[1]}
+
+    results = {}
+    audit_rows = []
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for path in paths:
+            spec = SHEETS[os.path.basename(path).lower()]
+            batch = _Batch()
+            _diff_sheet(conn, path, spec, division, batch)
+
+            conn.executemany("""
+                INSERT INTO sheet_rows (table_name, division_id, natural_key, record_id, row_hash)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (table_name, division_id, natural_key) DO UPDATE SET
+                    record_id = excluded.record_id, row_hash = excluded.row_hash,
+                    is_present = 1, synced_at = CURRENT_TIMESTAMP
+            """, batch.map_upserts)
+            conn.executemany("""
+                UPDATE sheet_rows SET is_present = 0, synced_at = CURRENT_TIMESTAMP
+                WHERE table_name = ? AND division_id = ? AND natural_key = ?
+            """, batch.map_absent)
+            audit_rows.extend(batch.audit)
+            results[spec['table']] = batch.counts
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    # Only audit what was actually committed; the sink writes them in its own
+    # batch instead of holding the ingest's write lock for them
+    for row in audit_rows:
+        write_audit(**row)
+    return results
+
+
+if __name__ == '__main__':
+    import sys
+    from db_utils import get_db
+    conn = get_db()
+    try:
+        results = ingest_sheets(conn, sys.argv[1:] or None)
+    finally:
+        conn.close()
+    for table, counts in results.items():
+        print(f"{table}: {', '.join(f'{n} {label}' for label, n in counts.items())}")
@@ -0,0 +1,259 @@
+"""
+EOS Platform - SSO Identity
+Resolves the X-Auth-Email header from oauth2-proxy to a session user dict,
+cached per email for a short TTL, and records last_login through a
+background writer that coalesces timestamps into one batched UPDATE. A burst
+of cookie-less requests after a session-cookie rotation then costs one
+lookup per user and no write-lock contention on the request path.
+
+Configuration (environment variables):
+    EOS_SSO_CACHE_TTL     - Seconds a resolved email is reused (default: 60)
+    EOS_LAST_LOGIN_FLUSH  - Seconds between batched last_login writes (default: 5)
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from auth import get_auth_version
+from db_utils import get_db
+
+logger = logging.getLogger(__name__)
+
+SSO_CACHE_TTL = float(os.environ.get('EOS_SSO_CACHE_TTL', '60'))
+LAST_LOGIN_FLUSH_INTERVAL = float(os.environ.get('EOS_LAST_LOGIN_FLUSH', '5'))
+
+# Emails with no EOS user are re-checked sooner, so a newly created user
+# doesn't wait out the full TTL
+NEGATIVE_TTL = 10.0
+
+# Expired entries are swept once the cache grows past this
+MAX_ENTRIES = 1000
+
+
+def _load_identity(email):
+    """Session user dict for an active user with this email, or None"""
+    conn = get_db()
+    try:
+        user_row = conn.execute("""
+            SELECT id, username, email, full_name
+            FROM users WHERE email = ? AND is_active = 1
+        """, (email,)).fetchone()
+        if not user_row:
+            return None
+
+        roles = [dict(row) for row in conn.execute("""
+            SELECT
+                ur.id as assignment_id,
+                r.name as role_name,
+                r.display_name as role_display,
+                r.level as role_level,
+                ur.organization_id,
+                ur.division_id,
+                o.name as org_name,
+                o.slug as org_slug,
+                d.name as division_name,
+                d.slug as division_slug,
+                d.full_slug as division_full_slug
+            FROM user_roles ur
+            JOIN roles r ON ur.role_id = r.id
+            LEFT JOIN organizations o ON ur.organization_id = o.id
+            LEFT JOIN divisions d ON ur.division_id = d.id
+            WHERE ur.user_id = ? AND ur.is_active = 1
+        """, (user_row['id'],))]
+
+        # Same structure as authenticate_user
+        return {
+            'id': user_row['id'],
+            'username': user_row['username'],
+            'email': user_row['email'],
+            'full_name': user_row['full_name'],
+            'roles': roles,
+            'is_parent_admin': any(r['role_name'] == 'PARENT_ADMIN' for r in roles)
+        }
+    finally:
+        conn.close()
+
+
+def _copy_user(user):
+    """Copy handed to the session, so later edits can't reach the cache"""
+    if user is None:
+        return None
+    return {**user, 'roles': [dict(role) for role in user['roles']]}
+
+
+class SsoIdentityResolver:
+    """
+    Email -> session user cache with a TTL
+    Entries also expire when auth_version moves (role or division changes).
+    Concurrent misses for one email share a single lookup.
+    """
+
+    def __init__(self, ttl=SSO_CACHE_TTL, negative_ttl=NEGATIVE_TTL):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._entries = {}    # email -> (expires_at, auth version, user dict or None)
+        self._resolving = {}  # email -> Event, so a burst does one lookup
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, email):
+        """Session user dict for email, or None if there is no active EOS user"""
+        version = get_auth_version()
+        while True:
+            with self._lock:
+                entry = self._entries.get(email)
+                if entry is not None and entry[0] > time.monotonic() and entry[1] == version:
+                    self.hits += 1
+                    return _copy_user(entry[2])
+                pending = self._resolving.get(email)
+                if pending is None:
+                    self.misses += 1
+                    self._resolving[email] = threading.Event()
+                    break
+            pending.wait()
+
+        try:
+            user = _load_identity(email)
+            ttl = self.ttl if user else self.negative_ttl
+            with self._lock:
+                if len(self._entries) >= MAX_ENTRIES:
+                    self._sweep()
+                self._entries[email] = (time.monotonic() + ttl, version, user)
+            return _copy_user(user)
+        finally:
+            with self._lock:
+                self._resolving.pop(email).set()
+
+    def _sweep(self):
+        """Drop expired entries (call with lock held)"""
+        now = time.monotonic()
+        for email in [e for e, entry in self._entries.items() if entry[0] <= now]:
+            del self._entries[email]
+
+    def invalidate(self, email=None):
+        """Forget one email, or all of them"""
+        with self._lock:
+            if email is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(email, None)
+
+    def stats(self):
+        """Counters for the health endpoint"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+class LastLoginWriter:
+    """
+    Background writer for users.last_login
+    touch() only records the time in memory; a daemon thread writes every
+    pending timestamp in one executemany per interval. Repeated logins by
+    the same user between flushes collapse into one UPDATE.
+    """
+
+    def __init__(self, interval=LAST_LOGIN_FLUSH_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pending = {}  # user id -> 'YYYY-MM-DD HH:MM:SS' (UTC, like CURRENT_TIMESTAMP)
+        self._thread = None
+        self._stop = threading.Event()
+        self.touches = 0
+        self.written = 0
+        self.flushes = 0
+        self.failures = 0
+
+    def touch(self, user_id):
+        """Record a login now; written on the next flush"""
+        timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            self._pending[user_id] = timestamp
+            self.touches += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='eos-last-login', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        """Write all pending timestamps in one transaction, return how many"""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+
+        try:
+            conn = get_db()
+            try:
+                conn.executemany(
+                    "UPDATE users SET last_login = ? WHERE id = ?",
+                    [(timestamp, user_id) for user_id, timestamp in batch.items()]
+                )
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            # Keep them for the next flush, unless a newer login came in meanwhile
+            with self._lock:
+                for user_id, timestamp in batch.items():
+                    self._pending.setdefault(user_id, timestamp)
+                self.failures += 1
+            logger.warning("Failed to write last_login for %d user(s): %s", len(batch), e)
+            return 0
+
+        with self._lock:
+            self.written += len(batch)
+            self.flushes += 1
+        return len(batch)
+
+    def stats(self):
+        """Counters for the health endpoint"""
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'touches': self.touches,
+                'written': self.written,
+                'flushes': self.flushes,
+                'failures': self.failures
+            }
+
+    def shutdown(self):
+        """Stop the thread and write whatever is pending"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=self.interval + 1)
+        self.flush()
+
+
+_resolver = SsoIdentityResolver()
+_last_login = LastLoginWriter()
+atexit.register(_last_login.shutdown)
+
+
+def resolve_sso_user(email):
+    """Session user dict for an SSO email header, or None"""
+    return _resolver.resolve(email)
+
+
+def record_last_login(user_id):
+    """Queue a last_login update for the background writer"""
+    _last_login.touch(user_id)
+
+
+def get_sso_stats():
+    """Resolver and last_login writer counters"""
+    return {'resolver': _resolver.stats(), 'last_login': _last_login.stats()}
@@ -0,0 +1,128 @@
+"""
+EOS Platform - Sync Generation
+Counter file that eos_sync.py bumps after every sync that brought in new
+data. The web app runs as a separate service; it watches the file with one
+stat() at most once a second and drops its datasheet caches only when the
+generation moves, and browsers poll /api/generation instead of re-fetching
+everything on a timer.
+
+Configuration (environment variables):
+    EOS_SYNC_GENERATION_FILE - Counter file path (default: .eos_sync_generation next to this module)
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+GENERATION_FILE = os.environ.get(
+    'EOS_SYNC_GENERATION_FILE', str(Path(__file__).parent / '.eos_sync_generation')
+)
+
+# Longest a web process can take to notice a bump
+CHECK_INTERVAL = 1.0
+
+
+def read_generation(path=None):
+    """Current counter as {'generation', 'updated_at', 'files'}; generation 0 if never synced"""
+    try:
+        with open(path or GENERATION_FILE) as f:
+            data = json.load(f)
+        return {
+            'generation': int(data.get('generation', 0)),
+            'updated_at': data.get('updated_at'),
+            'files': data.get('files', [])
+        }
+    except (OSError, ValueError, AttributeError):
+        return {'generation': 0, 'updated_at': None, 'files': []}
+
+
+def bump_generation(files=(), path=None):
+    """
+    Advance the counter after a sync (called by eos_sync.py)
+    Written to a temp file and renamed, so readers never see a partial file.
+    Returns the new generation.
+    """
+    path = path or GENERATION_FILE
+    generation = read_generation(path)['generation'] + 1
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({
+            'generation': generation,
+            'updated_at': datetime.now().isoformat(),
+            'files': sorted(files)
+        }, f)
+    os.replace(tmp_path, path)
+    return generation
+
+
+class GenerationWatcher:
+    """Cheap view of the counter for the web process, with change callbacks"""
+
+    def __init__(self, path=None, check_interval=CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._signature = None
+        self._checked_at = 0.0
+        self._current = read_generation(path)
+        self._listeners = []
+        self.changes = 0
+
+    def current(self):
+        """Latest generation dict; re-reads the file only when its stat changes"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return self._current
+            self._checked_at = now
+
+            try:
+                st = os.stat(self.path or GENERATION_FILE)
+                signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+            except OSError:
+                signature = None
+            if signature == self._signature:
+                return self._current
+
+            self._signature = signature
+            previous, self._current = self._current, read_generation(self.path)
+            changed = self._current['generation'] != previous['generation']
+            if changed:
+                self.changes += 1
+            listeners = list(self._listeners)
+            current = self._current
+
+        # Outside the lock: listeners may look the generation up again
+        if changed:
+            for callback in listeners:
+                try:
+                    callback(current['generation'])
+                except Exception as e:
+                    print(f"Error in sync generation listener: {e}")
+        return current
+
+    def subscribe(self, callback):
+        """Call callback(generation) whenever a new generation is seen"""
+        with self._lock:
+            self._listeners.append(callback)
+
+
+_watcher = GenerationWatcher()
+
+
+def current_generation():
+    """Latest sync generation number"""
+    return _watcher.current()['generation']
+
+
+def get_generation_info():
+    """Latest sync generation with its timestamp and synced files"""
+    return dict(_watcher.current())
+
+
+def on_generation_change(callback):
+    """Register callback(generation) to run when eos_sync publishes new data"""
+    _watcher.subscribe(callback)
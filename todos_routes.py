@@ -5,20 +5,9 @@ Action items with owners and due dates, with email notification support
 
 from flask import render_template, request, redirect, url_for, flash, jsonify, session
 from auth import login_required, division_access_required, division_edit_required, log_action, can_edit_division
-import sqlite3
-from pathlib import Path
+from db_utils import get_db
 from datetime import datetime
 
-DATABASE_PATH = Path(__file__).parent / 'eos_data.db'
-
-def get_db():
-    """Get database connection with timeout for concurrent access"""
-    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
-    conn.row_factory = sqlite3.Row
-    conn.execute('PRAGMA journal_mode=WAL')
-    conn.execute('PRAGMA synchronous=NORMAL')
-    conn.execute('PRAGMA busy_timeout=30000')
-    return conn
 
 def register_todos_routes(app):
     """Register todos-related routes"""
@@ -236,10 +225,15 @@ def register_todos_routes(app):
         """Send email notifications for assigned tasks to owners and their leads"""
         user = session.get('user')
 
-        from email_service import send_task_notification, is_email_configured
+        from email_service import build_task_notification, enqueue_emails, is_email_configured
+
+        wants_json = request.accept_mimetypes.best == 'application/json'
 
         if not is_email_configured():
-            flash('Email is not configured. Set EOS_SMTP_HOST, EOS_SMTP_USER, EOS_SMTP_PASS environment variables.', 'danger')
+            error = 'Email is not configured. Set EOS_SMTP_HOST, EOS_SMTP_USER, EOS_SMTP_PASS environment variables.'
+            if wants_json:
+                return jsonify({'success': False, 'error': error}), 400
+            flash(error, 'danger')
             return redirect(url_for('division_todos', division_id=division_id))
 
         conn = get_db()
@@ -304,48 +298,65 @@ def register_todos_routes(app):
 
         conn.close()
 
-        sent_count = 0
-        errors = []
-
+        messages = []
         for owner_key, owner_data in owners.items():
             # Send to owner
             if owner_data['email']:
-                success, err = send_task_notification(
+                messages.append(build_task_notification(
                     owner_data['email'],
                     owner_data['name'],
                     owner_data['tasks'],
                     division_name
-                )
-                if success:
-                    sent_count += 1
-                elif err:
-                    errors.append(f"{owner_data['name']}: {err}")
+                ))
 
             # Send to their lead
             if owner_data['user_id'] and owner_data['user_id'] in lead_map:
                 lead_id = lead_map[owner_data['user_id']]
                 if lead_id in lead_emails:
                     lead = lead_emails[lead_id]
-                    success, err = send_task_notification(
+                    message = build_task_notification(
                         lead['email'],
                         lead['name'],
                         owner_data['tasks'],
                         f"{division_name} - {owner_data['name']}'s Tasks"
                     )
-                    if success:
-                        sent_count += 1
-                    elif err:
-                        errors.append(f"Lead {lead['name']}: {err}")
-
-        if sent_count > 0:
-            flash(f'Sent {sent_count} notification email(s) successfully', 'success')
-        if errors:
-            flash(f'Some emails failed: {"; ".join(errors[:3])}', 'danger')
-        if sent_count == 0 and not errors:
+                    message['label'] = f"Lead {lead['name']}"
+                    messages.append(message)
+
+        # Delivery happens on the background queue; the page polls the job
+        job_id = enqueue_emails(messages, division_id=division_id, requested_by=user['id'])
+
+        if wants_json:
+            return jsonify({'success': True, 'job_id': job_id, 'total': len(messages)}), 202
+
+        if messages:
+            flash(f'Sending {len(messages)} notification email(s) in the background', 'success')
+        else:
             flash('No emails to send - no owners have email addresses configured', 'danger')
 
         return redirect(url_for('division_todos', division_id=division_id))
 
+    @app.route('/division/<int:division_id>/todos/notify/<job_id>')
+    @login_required
+    @division_access_required('division_id')
+    def todo_notification_status(division_id, job_id):
+        """Poll the progress of a queued notification job"""
+        from email_service import get_email_job
+
+        job = get_email_job(job_id)
+        if not job or job.get('division_id') != division_id:
+            return jsonify({'success': False, 'error': 'Unknown notification job'}), 404
+
+        return jsonify({
+            'success': True,
+            'job_id': job['id'],
+            'status': job['status'],
+            'total': job['total'],
+            'sent': job['sent'],
+            'failed': job['failed'],
+            'errors': job['errors']
+        })
+
     @app.route('/division/<int:division_id>/todos/notify-preview')
     @login_required
     @division_access_required('division_id')
@@ -5,21 +5,10 @@ Vision/Traction Organizer: 10-year target, 3-year picture, 1-year plan
 
 from flask import render_template, request, redirect, url_for, flash, jsonify, session
 from auth import login_required, division_access_required, division_edit_required, log_action, can_edit_division
-import sqlite3
+from db_utils import get_db
 import json
-from pathlib import Path
 from datetime import datetime
 
-DATABASE_PATH = Path(__file__).parent / 'eos_data.db'
-
-def get_db():
-    """Get database connection with timeout for concurrent access"""
-    conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
-    conn.row_factory = sqlite3.Row
-    conn.execute('PRAGMA journal_mode=WAL')
-    conn.execute('PRAGMA synchronous=NORMAL')
-    conn.execute('PRAGMA busy_timeout=30000')
-    return conn
 
 def register_vision_routes(app):
     """Register vision/VTO-related routes"""